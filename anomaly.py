@@ -1,3 +1,5 @@
+import logging
+import os
 import streamlit as st
 import pandas as pd
 import numpy as np
@@ -5,11 +7,32 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import datetime as dt
 from scipy import stats
-from database import get_check_data, get_conn
+from database import FLAGGED_TABLES, get_check_data, get_conn
 import json
-from statsmodels.tsa.seasonal import seasonal_decompose
 import uuid
 from sqlalchemy import text
+from spc_rules import evaluate_nelson_rules
+from spc_drift import ewma_statistics, cusum_statistics
+
+logger = logging.getLogger(__name__)
+
+# History loaded before the earliest new measurement by detect_new_anomalies, so
+# rolling statistics, Nelson rules and EWMA/CUSUM have the same context as a full scan
+ANOMALY_CONTEXT_HOURS = int(os.getenv('QA_ANOMALY_CONTEXT_HOURS', '24'))
+
+# Checks saved this recently are examined again by the next run, so a save still
+# committing while a run reads the data is not skipped (duplicates are not re-alerted)
+ANOMALY_SETTLE_SECONDS = float(os.getenv('QA_ANOMALY_SETTLE_SECONDS', '60'))
+
+# Checks measured longer ago than this are not examined when they are saved late
+ANOMALY_MAX_BACKDATE_HOURS = int(os.getenv('QA_ANOMALY_MAX_BACKDATE_HOURS', '168'))
+
+# Hours examined by a full scan (detect_anomalies, "Run Detection Now"); incremental
+# runs size the statistical method's rolling window as such a scan would
+ANOMALY_SCAN_HOURS = 24
+
+# Advisory lock key that keeps incremental runs (worker and app) from overlapping
+ANOMALY_LOCK_KEY = 4807
 
 # Initialize anomaly alert tables
 def initialize_anomaly_detection():
@@ -46,6 +69,38 @@ def initialize_anomaly_detection():
             )
             '''))
             
+            # Recent alerts per parameter (deduplication in detect_anomalies)
+            conn.execute(text('''
+            CREATE INDEX IF NOT EXISTS idx_anomaly_alerts_parameter_time
+            ON anomaly_alerts (parameter_name, timestamp)
+            '''))
+            
+            # Checks examined per parameter by detect_new_anomalies: every check
+            # saved up to last_created_at; last_timestamp is the latest measurement
+            conn.execute(text('''
+            CREATE TABLE IF NOT EXISTS anomaly_watermarks (
+                parameter_name TEXT PRIMARY KEY,
+                last_created_at TIMESTAMP NOT NULL,
+                last_timestamp TIMESTAMP,
+                last_run TIMESTAMP NOT NULL
+            )
+            '''))
+            # Watermarks used to be measurement times; start from them
+            keyed_on_saves = conn.execute(text('''
+            SELECT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'anomaly_watermarks' AND column_name = 'last_created_at'
+            )
+            ''')).scalar()
+            if not keyed_on_saves:
+                conn.execute(text('''
+                ALTER TABLE anomaly_watermarks
+                    ADD COLUMN last_created_at TIMESTAMP,
+                    ALTER COLUMN last_timestamp DROP NOT NULL
+                '''))
+                conn.execute(text("UPDATE anomaly_watermarks SET last_created_at = last_timestamp"))
+                conn.execute(text("ALTER TABLE anomaly_watermarks ALTER COLUMN last_created_at SET NOT NULL"))
+            
             conn.commit()
         except Exception as e:
             st.error(f"Error initializing anomaly detection tables: {e}")
@@ -209,6 +264,91 @@ def save_anomaly_alert(parameter_name, observed_value, expected_value, deviation
     
     return None
 
+def _insert_alerts(conn, alerts):
+    """Insert alerts on the caller's connection (one executemany) and return their IDs"""
+    if not alerts:
+        return []
+    now = dt.datetime.now()
+    rows = [{
+        'alert_id': str(uuid.uuid4()),
+        'param_name': alert['parameter_name'],
+        'timestamp': now,
+        'observed': float(alert['observed_value']),
+        'expected': float(alert['expected_value']),
+        'deviation': float(alert['deviation_score']),
+        'status': 'new'
+    } for alert in alerts]
+    
+    conn.execute(text('''
+    INSERT INTO anomaly_alerts (
+        alert_id, parameter_name, timestamp, observed_value, expected_value, 
+        deviation_score, status
+    )
+    VALUES (
+        :alert_id, :param_name, :timestamp, :observed, :expected, 
+        :deviation, :status
+    )
+    '''), rows)
+    return [row['alert_id'] for row in rows]
+
+def save_anomaly_alerts(alerts):
+    """
+    Save several anomaly alerts in one transaction
+    
+    Args:
+        alerts: List of dicts with parameter_name, observed_value,
+                expected_value and deviation_score
+        
+    Returns:
+        List of the created alert IDs (empty if saving failed)
+    """
+    if not alerts:
+        return []
+    conn = get_conn()
+    if conn:
+        try:
+            alert_ids = _insert_alerts(conn, alerts)
+            conn.commit()
+            return alert_ids
+            
+        except Exception as e:
+            st.error(f"Error saving anomaly alerts: {e}")
+            return []
+        finally:
+            conn.close()
+    
+    return []
+
+def _latest_alert_times(conn, since):
+    result = conn.execute(text('''
+    SELECT parameter_name, MAX(timestamp) FROM anomaly_alerts
+    WHERE timestamp > :since
+    GROUP BY parameter_name
+    '''), {'since': pd.Timestamp(since).to_pydatetime()})
+    return {parameter: pd.Timestamp(latest) for parameter, latest in result}
+
+def get_latest_alert_times(since):
+    """
+    Time of the latest alert per parameter, in one query
+    
+    Args:
+        since: Only alerts after this time are considered
+        
+    Returns:
+        dict of parameter_name -> latest alert timestamp, or None if the query failed
+    """
+    conn = get_conn()
+    if conn:
+        try:
+            return _latest_alert_times(conn, since)
+        except Exception as e:
+            st.error(f"Error checking for existing anomalies: {e}")
+            return None
+        finally:
+            conn.close()
+    
+    return None
+
 # Function to get anomaly alerts
 def get_anomaly_alerts(status=None, days=7):
     """
@@ -366,7 +506,11 @@ def resolve_alert(alert_id, notes=None):
     return False
 
 # Statistical anomaly detection
-def detect_statistical_anomalies(data, parameter, sensitivity=0.9, threshold=3.0):
+def statistical_window(points):
+    """Rolling window for detect_statistical_anomalies: 20% of the points, at least 5"""
+    return max(5, int(points * 0.2))
+
+def detect_statistical_anomalies(data, parameter, sensitivity=0.9, threshold=3.0, window=None):
     """
     Detect anomalies using statistical methods
     
@@ -375,6 +519,8 @@ def detect_statistical_anomalies(data, parameter, sensitivity=0.9, threshold=3.0
         parameter: Parameter to analyze
         sensitivity: Detection sensitivity (0-1)
         threshold: Z-score threshold for anomalies
+        window: Rolling window in points (default: statistical_window of the
+                points in data, so it depends on how much data is passed)
         
     Returns:
         DataFrame with anomalies
@@ -386,13 +532,13 @@ def detect_statistical_anomalies(data, parameter, sensitivity=0.9, threshold=3.0
     if 'timestamp' in data.columns:
         data['timestamp'] = pd.to_datetime(data['timestamp'])
     
-    # Filter relevant data
-    param_data = data[[parameter, 'timestamp']].dropna()
+    # Filter relevant data (in time order: the checks come from several tables)
+    param_data = data[[parameter, 'timestamp']].dropna().sort_values('timestamp', kind='stable')
     if len(param_data) < 5:  # Need enough data points
         return pd.DataFrame()
     
     # Calculate rolling statistics
-    window_size = max(5, int(len(param_data) * 0.2))  # 20% of data or at least 5 points
+    window_size = window or statistical_window(len(param_data))
     param_data['rolling_mean'] = param_data[parameter].rolling(window=window_size, min_periods=2).mean()
     param_data['rolling_std'] = param_data[parameter].rolling(window=window_size, min_periods=2).std()
     
@@ -413,102 +559,385 @@ def detect_statistical_anomalies(data, parameter, sensitivity=0.9, threshold=3.0
     
     return anomalies
 
-# Detect anomalies in recent data
-def detect_anomalies(hours=24):
+# Rule-based anomaly detection
+def detect_rule_anomalies(data, parameter, rules=None):
     """
-    Detect anomalies in recent data
+    Detect anomalies as Nelson rule violations (runs, trends, zone rules)
     
     Args:
-        hours: Hours of recent data to analyze
+        data: DataFrame with data
+        parameter: Parameter to analyze
+        rules: Optional subset of Nelson rule numbers (default: all eight)
         
     Returns:
-        List of detected anomalies
+        DataFrame with anomalies (same columns as detect_statistical_anomalies)
     """
-    # Get recent data
-    end_date = dt.datetime.now()
-    start_date = end_date - dt.timedelta(hours=hours)
+    if data.empty or parameter not in data.columns:
+        return pd.DataFrame()
     
-    recent_data = get_check_data(start_date, end_date)
-    if recent_data.empty:
-        return []
+    param_data = data[['timestamp', parameter]].dropna()
+    if len(param_data) < 5:  # Need enough data points
+        return pd.DataFrame()
     
-    # Get anomaly configurations
-    configs = get_anomaly_config()
-    if configs.empty:
-        return []
+    param_data['timestamp'] = pd.to_datetime(param_data['timestamp'])
+    param_data = param_data.sort_values('timestamp')
+    
+    values = param_data[parameter].to_numpy(dtype=float)
+    center = values.mean()
+    sigma = values.std(ddof=1)
+    
+    flags = evaluate_nelson_rules(values, center, sigma, rules)
+    violated = np.column_stack(list(flags.values())).any(axis=1)
+    
+    anomalies = param_data[violated].copy()
+    if not anomalies.empty:
+        anomalies['expected_value'] = center
+        anomalies['deviation_score'] = np.abs(anomalies[parameter] - center) / (sigma if sigma > 0 else 1)
+        anomalies = anomalies[['timestamp', parameter, 'expected_value', 'deviation_score']]
+        anomalies.columns = ['timestamp', 'observed_value', 'expected_value', 'deviation_score']
+    
+    return anomalies
+
+# Drift (EWMA / CUSUM) anomaly detection
+def detect_drift_anomalies(data, parameter, method='ewma', center=None, sigma=None):
+    """
+    Detect small sustained shifts with an EWMA or tabular CUSUM chart
+    
+    Args:
+        data: DataFrame with data
+        parameter: Parameter to analyze
+        method: 'ewma' or 'cusum'
+        center: Optional target (default: mean of the data)
+        sigma: Optional process standard deviation (default: std of the data)
+        
+    Returns:
+        DataFrame with anomalies (same columns as detect_statistical_anomalies);
+        deviation_score is the chart statistic in sigma units
+    """
+    if data.empty or parameter not in data.columns:
+        return pd.DataFrame()
+    
+    param_data = data[['timestamp', parameter]].dropna()
+    if len(param_data) < 5:  # Need enough data points
+        return pd.DataFrame()
     
-    detected_anomalies = []
+    param_data['timestamp'] = pd.to_datetime(param_data['timestamp'])
+    param_data = param_data.sort_values('timestamp')
+    values = param_data[parameter].to_numpy(dtype=float)
     
-    # Process each enabled parameter
+    if method == 'cusum':
+        result = cusum_statistics(values, center, sigma)
+        score = np.maximum(result['upper'], result['lower'])
+    else:
+        result = ewma_statistics(values, center, sigma)
+        score = np.abs(result['ewma'] - result['center'])
+    score = score / (result['sigma'] if result['sigma'] > 0 else 1)
+    
+    anomalies = param_data[result['out_of_control']].copy()
+    if not anomalies.empty:
+        anomalies['expected_value'] = result['center']
+        anomalies['deviation_score'] = score[result['out_of_control']]
+        anomalies = anomalies[['timestamp', parameter, 'expected_value', 'deviation_score']]
+        anomalies.columns = ['timestamp', 'observed_value', 'expected_value', 'deviation_score']
+    
+    return anomalies
+
+# Detect anomalies in recent data
+def _find_anomalies(data, configs, new_rows=None, windows=None):
+    """
+    Run each enabled parameter's detection method
+    
+    Args:
+        data: DataFrame from get_check_data
+        configs: DataFrame from get_anomaly_config
+        new_rows: Optional dict of parameter -> index of the rows to report;
+                  anomalies in other rows are dropped (they are context only)
+        windows: Optional dict of parameter -> rolling window for the
+                 statistical method (default: sized from data)
+        
+    Returns:
+        List of (parameter, anomalies DataFrame) for parameters with anomalies
+    """
+    found = []
     for _, config in configs[configs['enabled']].iterrows():
         parameter = config['parameter_name']
         
-        if parameter not in recent_data.columns:
+        if parameter not in data.columns:
             continue
         
+        window = (windows or {}).get(parameter)
+        
         # Apply the specified detection method
         if config['method'] == 'statistical':
             anomalies = detect_statistical_anomalies(
-                recent_data, 
+                data, 
                 parameter, 
                 config['sensitivity'],
-                config['alert_threshold']
+                config['alert_threshold'],
+                window
             )
+        elif config['method'] == 'nelson_rules':
+            anomalies = detect_rule_anomalies(data, parameter)
+        elif config['method'] in ('ewma', 'cusum'):
+            anomalies = detect_drift_anomalies(data, parameter, config['method'])
         else:
             # Default to statistical method
             anomalies = detect_statistical_anomalies(
-                recent_data, 
+                data, 
                 parameter, 
                 config['sensitivity'],
-                config['alert_threshold']
+                config['alert_threshold'],
+                window
             )
         
-        # Process anomalies
+        if not anomalies.empty and new_rows is not None:
+            anomalies = anomalies[anomalies.index.isin(new_rows.get(parameter, []))]
         if not anomalies.empty:
-            for _, anomaly in anomalies.iterrows():
-                # Check if this anomaly is already recorded
-                conn = get_conn()
-                if conn:
-                    try:
-                        # Look for similar anomalies in the last hour
-                        one_hour_ago = anomaly['timestamp'] - dt.timedelta(hours=1)
-                        query = text('''
-                        SELECT COUNT(*) FROM anomaly_alerts 
-                        WHERE parameter_name = :param 
-                        AND timestamp > :time_ago
-                        ''')
-                        
-                        result = conn.execute(query, {
-                            'param': parameter,
-                            'time_ago': one_hour_ago
-                        })
-                        
-                        count = result.scalar() or 0
-                    except Exception as e:
-                        st.error(f"Error checking for existing anomalies: {e}")
-                        count = 1  # Assume there's an existing anomaly to prevent duplicate alerts
-                    finally:
-                        conn.close()
+            found.append((parameter, anomalies))
+    return found
+
+def _earliest_anomaly(found):
+    return min(pd.to_datetime(anomalies['timestamp']).min() for _, anomalies in found)
+
+def _select_new_alerts(found, latest_alerts):
+    """
+    Deduplicate anomalies in memory against the latest alert per parameter
+    
+    An anomaly is kept only if its parameter has no alert in the hour before
+    it; a kept anomaly is alerted now, which covers the parameter's later anomalies.
+    """
+    latest_alerts = dict(latest_alerts)
+    now = pd.Timestamp.now()
+    new_alerts = []
+    for parameter, anomalies in found:
+        for _, anomaly in anomalies.iterrows():
+            latest = latest_alerts.get(parameter)
+            if latest is not None and latest > anomaly['timestamp'] - dt.timedelta(hours=1):
+                continue
+            latest_alerts[parameter] = now
+            new_alerts.append({
+                'parameter_name': parameter,
+                'timestamp': anomaly['timestamp'],
+                'observed_value': anomaly['observed_value'],
+                'expected_value': anomaly['expected_value'],
+                'deviation_score': anomaly['deviation_score']
+            })
+    return new_alerts
+
+def _detected_anomalies(alert_ids, new_alerts):
+    return [{
+        'alert_id': alert_id,
+        'parameter': alert['parameter_name'],
+        'timestamp': alert['timestamp'],
+        'observed_value': alert['observed_value'],
+        'expected_value': alert['expected_value'],
+        'deviation_score': alert['deviation_score']
+    } for alert_id, alert in zip(alert_ids, new_alerts)]
+
+def detect_anomalies(hours=ANOMALY_SCAN_HOURS):
+    """
+    Detect anomalies in recent data
+    
+    Args:
+        hours: Hours of recent data to analyze
+        
+    Returns:
+        List of detected anomalies
+    """
+    # Get recent data
+    end_date = dt.datetime.now()
+    start_date = end_date - dt.timedelta(hours=hours)
+    
+    recent_data = get_check_data(start_date, end_date)
+    if recent_data.empty:
+        return []
+    
+    # Get anomaly configurations
+    configs = get_anomaly_config()
+    if configs.empty:
+        return []
+    
+    found = _find_anomalies(recent_data, configs)
+    if not found:
+        return []
+    
+    # Alerts recorded since an hour before the earliest anomaly, loaded once
+    latest_alerts = get_latest_alert_times(_earliest_anomaly(found) - dt.timedelta(hours=1))
+    if latest_alerts is None:
+        return []  # Assume there are existing anomalies to prevent duplicate alerts
+    
+    # Insert every new alert in one transaction
+    new_alerts = _select_new_alerts(found, latest_alerts)
+    alert_ids = save_anomaly_alerts(new_alerts)
+    return _detected_anomalies(alert_ids, new_alerts)
+
+def get_anomaly_watermarks():
+    """
+    Progress of detect_new_anomalies per parameter
+    
+    Returns:
+        DataFrame with parameter_name, last_created_at (checks saved up to
+        then are examined), last_timestamp (latest measurement examined)
+        and last_run
+    """
+    columns = ['parameter_name', 'last_created_at', 'last_timestamp', 'last_run']
+    conn = get_conn()
+    if conn:
+        try:
+            result = conn.execute(text(f'''
+            SELECT {', '.join(columns)} FROM anomaly_watermarks
+            ORDER BY parameter_name
+            '''))
+            return pd.DataFrame(result.fetchall(), columns=columns)
+        except Exception as e:
+            st.error(f"Error retrieving anomaly watermarks: {e}")
+        finally:
+            conn.close()
+    
+    return pd.DataFrame(columns=columns)
+
+def _load_checks(conn, start, end):
+    """
+    Checks measured between start and end from every check table, read on conn
+    
+    Same rows and columns as get_check_data, but errors propagate, so the
+    caller's transaction rolls back instead of working on partial data.
+    """
+    frames = [pd.read_sql(text(f'''
+        SELECT *, '{table}' AS source FROM {table}
+        WHERE timestamp BETWEEN :start AND :end
+        '''), conn, params={'start': start.to_pydatetime(), 'end': end.to_pydatetime()})
+        for table in FLAGGED_TABLES]
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+def _new_check_times(conn, since):
+    """Earliest and latest measurement time of checks saved after since (None, None if none)"""
+    saved_since = ' UNION ALL '.join(
+        f"SELECT timestamp FROM {table} WHERE created_at > :since" for table in FLAGGED_TABLES
+    )
+    earliest, latest = conn.execute(text(
+        f"SELECT MIN(timestamp), MAX(timestamp) FROM ({saved_since}) new_checks"
+    ), {'since': since.to_pydatetime()}).one()
+    if earliest is None:
+        return None, None
+    return pd.Timestamp(earliest), pd.Timestamp(latest)
+
+def detect_new_anomalies(first_run_hours=24, context_hours=ANOMALY_CONTEXT_HOURS):
+    """
+    Detect anomalies only in checks saved after each parameter's watermark
+    
+    Watermarks follow the order checks were saved (created_at), not their
+    measurement time, so checks entered late or back-dated are examined too
+    (up to ANOMALY_MAX_BACKDATE_HOURS old). context_hours of history before
+    the earliest new measurement (and at least the ANOMALY_SCAN_HOURS of a
+    full scan) is loaded, and the statistical method uses the rolling
+    window a full scan run now would use, so both flag the same points for
+    recent checks; only anomalies in new checks are alerted. Checks are
+    read, and the new alerts and advanced watermarks stored, in one
+    transaction: an error rolls everything back, so a restart neither
+    re-alerts nor skips checks.
+    
+    Runs are serialised with a transaction-level PostgreSQL advisory lock;
+    if another run (the background worker or another session) holds it,
+    nothing is done. Committing or rolling back releases it.
+    
+    Args:
+        first_run_hours: Hours of saved checks examined for a parameter
+                         without a watermark; also the furthest back a
+                         watermark is honoured, so one stale parameter
+                         cannot widen every run
+        context_hours: Hours of history loaded before the earliest new measurement
+        
+    Returns:
+        List of detected anomalies (as from detect_anomalies)
+        
+    Raises:
+        Any database error, after logging it (the caller decides how to show it)
+    """
+    configs = get_anomaly_config()
+    if configs.empty or not configs['enabled'].any():
+        return []
+    parameters = configs.loc[configs['enabled'], 'parameter_name'].tolist()
+    
+    conn = get_conn()
+    if not conn:
+        return []
+    try:
+        locked = conn.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {'key': ANOMALY_LOCK_KEY}).scalar()
+        if not locked:
+            conn.rollback()
+            return []  # Another run is in progress
+        
+        # Saved-at times come from the database clock (created_at defaults to it)
+        saved_now = pd.Timestamp(conn.execute(text("SELECT LOCALTIMESTAMP")).scalar())
+        oldest_saved = saved_now - pd.Timedelta(hours=first_run_hours)
+        stored = {parameter: pd.Timestamp(last) for parameter, last in conn.execute(text(
+            "SELECT parameter_name, last_created_at FROM anomaly_watermarks"
+        ))}
+        saved_since = {parameter: max(stored.get(parameter, oldest_saved), oldest_saved)
+                       for parameter in parameters}
+        
+        now = pd.Timestamp.now()
+        new_alerts, alert_ids, examined = [], [], {}
+        earliest, latest = _new_check_times(conn, min(saved_since.values()))
+        if earliest is not None:
+            start = max(earliest, now - pd.Timedelta(hours=ANOMALY_MAX_BACKDATE_HOURS))
+            scan_start = now - pd.Timedelta(hours=ANOMALY_SCAN_HOURS)
+            data = _load_checks(conn, min(start - pd.Timedelta(hours=context_hours), scan_start),
+                                max(latest, now))
+            if not data.empty:
+                if 'created_at' not in data.columns:
+                    raise RuntimeError("Check tables have no created_at column; run initialize_database")
+                data['timestamp'] = pd.to_datetime(data['timestamp'])
+                data['created_at'] = pd.to_datetime(data['created_at'])
+                data = data.sort_values('timestamp', kind='stable')
                 
-                # Only add if we haven't detected a similar anomaly recently
-                if count == 0:
-                    alert_id = save_anomaly_alert(
-                        parameter,
-                        anomaly['observed_value'],
-                        anomaly['expected_value'],
-                        anomaly['deviation_score']
-                    )
-                    
-                    detected_anomalies.append({
-                        'alert_id': alert_id,
-                        'parameter': parameter,
-                        'timestamp': anomaly['timestamp'],
-                        'observed_value': anomaly['observed_value'],
-                        'expected_value': anomaly['expected_value'],
-                        'deviation_score': anomaly['deviation_score']
-                    })
+                # Rows of each parameter saved after its watermark, and the
+                # statistical window a full scan would use now
+                new_rows, windows = {}, {}
+                in_scan = data['timestamp'].between(scan_start, now)
+                for parameter in parameters:
+                    if parameter not in data.columns:
+                        continue
+                    measured = pd.to_numeric(data[parameter], errors='coerce').notna()
+                    windows[parameter] = statistical_window((measured & in_scan).sum())
+                    is_new = measured & (data['created_at'] > saved_since[parameter]) & (data['timestamp'] >= start)
+                    new_rows[parameter] = data.index[is_new]
+                    if is_new.any():
+                        examined[parameter] = data.loc[is_new, 'timestamp'].max()
+                
+                found = _find_anomalies(data, configs, new_rows, windows)
+                if found:
+                    latest_alerts = _latest_alert_times(conn, _earliest_anomaly(found) - dt.timedelta(hours=1))
+                    new_alerts = _select_new_alerts(found, latest_alerts)
+                alert_ids = _insert_alerts(conn, new_alerts)
+        
+        # Every check saved before the settle window has now been read
+        settled = saved_now - pd.Timedelta(seconds=ANOMALY_SETTLE_SECONDS)
+        conn.execute(text('''
+        INSERT INTO anomaly_watermarks AS w (parameter_name, last_created_at, last_timestamp, last_run)
+        VALUES (:param, :last_created_at, :last_timestamp, :last_run)
+        ON CONFLICT (parameter_name) DO UPDATE SET
+            last_created_at = GREATEST(w.last_created_at, EXCLUDED.last_created_at),
+            last_timestamp = GREATEST(w.last_timestamp, EXCLUDED.last_timestamp),
+            last_run = EXCLUDED.last_run
+        '''), [{'param': parameter,
+                'last_created_at': max(settled, saved_since[parameter]).to_pydatetime(),
+                'last_timestamp': examined[parameter].to_pydatetime() if parameter in examined else None,
+                'last_run': now.to_pydatetime()}
+               for parameter in parameters])
+        conn.commit()
+        return _detected_anomalies(alert_ids, new_alerts)
     
-    return detected_anomalies
+    except Exception as e:
+        conn.rollback()
+        logger.error(f"Incremental anomaly detection failed: {str(e)}")
+        raise
+    finally:
+        conn.close()
 
 # Function to display anomaly alerts
 def display_anomaly_alerts(status=None, days=28):
@@ -667,11 +1096,14 @@ def display_anomaly_config_page():
                 help="Higher values make detection more sensitive (may increase false positives)"
             )
             
+            method_options = ["statistical", "nelson_rules", "ewma", "cusum"]
             method = st.selectbox(
                 "Detection Method",
-                ["statistical"],  # Can add more methods later
-                index=0 if default_method=="statistical" else 0,
-                help="Statistical detection uses z-scores to identify outliers"
+                method_options,
+                index=method_options.index(default_method) if default_method in method_options else 0,
+                help="Statistical detection uses z-scores to identify outliers; "
+                     "Nelson rules flag runs, trends and zone patterns; "
+                     "EWMA and CUSUM catch small sustained drifts"
             )
             
             alert_threshold = st.number_input(
@@ -698,6 +1130,7 @@ def display_anomaly_config_page():
             
             - **Detection Method**:
               - **Statistical**: Uses statistical measures like Z-scores to identify values that deviate significantly from recent trends.
+              - **Nelson Rules**: Flags the eight SPC run and trend patterns (e.g. 9 points on one side of the mean, 6 points steadily rising). Sensitivity and threshold are not used.
             
             - **Alert Threshold**: Specifies how far a value must deviate to trigger an alert. Lower values generate more alerts.
             
@@ -745,7 +1178,18 @@ def display_anomaly_config_page():
                 # Display active configurations
                 st.dataframe(display_configs[['Parameter', 'Sensitivity', 'Method', 'Threshold', 'Last Updated', 'Updated By']], use_container_width=True)
                 
-                # Option to run detection manually
+                # Progress of incremental detection (dashboard and anomaly_worker.py)
+                watermarks = get_anomaly_watermarks()
+                if not watermarks.empty:
+                    with st.expander("Incremental detection progress"):
+                        st.dataframe(watermarks.rename(columns={
+                            'parameter_name': 'Parameter',
+                            'last_created_at': 'Checks Saved Up To',
+                            'last_timestamp': 'Latest Measurement',
+                            'last_run': 'Last Run'
+                        }), use_container_width=True, hide_index=True)
+                
+                # Option to run detection manually (full 24-hour scan)
                 if st.button("Run Detection Now", type="primary"):
                     with st.spinner("Running anomaly detection..."):
                         anomalies = detect_anomalies()
@@ -899,9 +1343,13 @@ def display_anomaly_alert_dashboard():
     that may indicate emerging quality issues.
     """)
     
-    # Check for new anomalies (in real-time)
+    # Check measurements saved since the last run (also done by anomaly_worker.py)
     with st.spinner("Scanning for anomalies..."):
-        new_anomalies = detect_anomalies(hours=24)
+        try:
+            new_anomalies = detect_new_anomalies()
+        except Exception as e:
+            st.error(f"Error running incremental anomaly detection: {e}")
+            new_anomalies = []
     
     # Alert counts
     col1, col2, col3 = st.columns(3)
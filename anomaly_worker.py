@@ -0,0 +1,115 @@
+"""
+Background anomaly detection worker.
+
+Runs anomaly.detect_new_anomalies whenever a check is saved (the save
+methods signal database.NEW_CHECK_CHANNEL with NOTIFY) and at least every
+--interval minutes. Each run only examines checks saved after the
+per-parameter watermarks stored in anomaly_watermarks, so restarting the
+worker neither re-alerts nor misses data, including checks entered late.
+
+Usage:
+    python anomaly_worker.py [--interval 15] [--debounce 5] [--no-listen] [--once]
+
+Run it next to the Streamlit app (e.g. as a systemd service).
+"""
+import argparse
+import logging
+import os
+import select
+import time
+
+import psycopg2
+
+from anomaly import detect_new_anomalies, initialize_anomaly_detection
+from database import NEW_CHECK_CHANNEL, get_db
+
+logger = logging.getLogger(__name__)
+
+# Longest wait between runs when no checks are saved
+ANOMALY_INTERVAL_MINUTES = float(os.getenv('QA_ANOMALY_INTERVAL_MINUTES', '15'))
+
+
+def run_once():
+    """Run incremental detection once and log what was found"""
+    start = time.perf_counter()
+    anomalies = detect_new_anomalies()
+    logger.info(f"Anomaly detection: {len(anomalies)} new alerts in {time.perf_counter() - start:.2f}s")
+    for anomaly in anomalies:
+        logger.info(f"  {anomaly['parameter']} at {anomaly['timestamp']}: observed {anomaly['observed_value']:.3f}, "
+                    f"expected {anomaly['expected_value']:.3f}")
+    return anomalies
+
+
+def listen_for_checks():
+    """Dedicated autocommit connection subscribed to NEW_CHECK_CHANNEL"""
+    conn = psycopg2.connect(get_db().DATABASE_URL)
+    conn.autocommit = True
+    conn.cursor().execute(f"LISTEN {NEW_CHECK_CHANNEL}")
+    return conn
+
+
+def wait_for_checks(conn, timeout, debounce):
+    """
+    Block until a check is saved or timeout seconds pass
+
+    After the first notification, waits debounce seconds so a burst of saved
+    checks is handled by one run.
+
+    Returns:
+        Number of notifications received
+    """
+    received = 0
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return received
+        if select.select([conn], [], [], remaining) != ([], [], []):
+            conn.poll()
+            received += len(conn.notifies)
+            conn.notifies.clear()
+            if received:
+                deadline = min(deadline, time.monotonic() + debounce)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--interval', type=float, default=ANOMALY_INTERVAL_MINUTES,
+                        help="Run at least every N minutes")
+    parser.add_argument('--debounce', type=float, default=5.0,
+                        help="Seconds to wait after a saved check before running")
+    parser.add_argument('--no-listen', action='store_true',
+                        help="Only run on the interval, not when checks are saved")
+    parser.add_argument('--once', action='store_true', help="Run once and exit")
+    args = parser.parse_args()
+
+    initialize_anomaly_detection()
+    listener = None
+    while True:
+        try:
+            run_once()
+        except Exception as e:
+            logger.error(f"Anomaly detection run failed: {str(e)}")
+        if args.once:
+            break
+
+        if args.no_listen:
+            time.sleep(args.interval * 60)
+            continue
+        try:
+            if listener is None or listener.closed:
+                listener = listen_for_checks()
+            received = wait_for_checks(listener, args.interval * 60, args.debounce)
+            if received:
+                logger.info(f"{received} new checks saved")
+        except (psycopg2.Error, OSError) as e:
+            # Lost the listening connection: fall back to the interval until it reconnects
+            logger.warning(f"Listening for new checks failed, retrying: {str(e)}")
+            if listener is not None:
+                listener.close()
+            listener = None
+            time.sleep(args.interval * 60)
+
+
+if __name__ == '__main__':
+    main()
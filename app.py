@@ -6,7 +6,7 @@ import datetime as dt
 import pandas as pd
 import sys
 import io
-import matplotlib.pyplot as plt
+import importlib
 from auth import (
     authenticate_user, 
     create_user, 
@@ -173,10 +173,10 @@ APP_START_TIME = time.time()
 @st.cache_resource
 def load_database():
     try:
-        from database import BeverageQADatabase, get_check_data
+        from database import get_db, get_check_data
         from hybrid_db import HybridDatabase
         
-        online_db = BeverageQADatabase()
+        online_db = get_db()
         if not hasattr(online_db, 'test_connection') or not online_db.test_connection():
             raise ConnectionError("Online database connection failed")
             
@@ -220,76 +220,55 @@ def load_form_modules():
         modules['quality_check']
     )
 
+def lazy_page_function(module_name, function_name, label):
+    """
+    Return a stand-in for module_name.function_name that imports on first call
+    
+    Page modules pull in plotly, scipy, statsmodels, docx and matplotlib, so
+    importing them is deferred until the page is actually rendered. After the
+    first call the import is a sys.modules lookup.
+    """
+    def page_function(*args, **kwargs):
+        try:
+            module = importlib.import_module(module_name)
+            function = getattr(module, function_name)
+        except (ImportError, AttributeError) as e:
+            st.error(f"Could not load {label} module: {str(e)}")
+            return None
+        return function(*args, **kwargs)
+    
+    page_function.__name__ = function_name
+    return page_function
+
 @st.cache_resource
 def load_visualization_modules():
-    """Load visualization modules with proper error handling and fallbacks"""
-    modules = {
-        'brix': lambda: st.error("Brix visualization module not loaded"),
-        'torque': lambda: st.error("Torque visualization module not loaded"),
-        'quality': lambda: st.error("Quality visualization module not loaded")
-    }
-    
-    try:
-        from visualization import display_brix_visualization
-        modules['brix'] = display_brix_visualization
-    except ImportError as e:
-        st.warning(f"Could not load brix visualization module: {str(e)}")
-    
-    try:
-        from visualization import display_torque_visualization
-        modules['torque'] = display_torque_visualization
-    except ImportError as e:
-        st.warning(f"Could not load torque visualization module: {str(e)}")
-    
-    try:
-        from visualization import display_quality_metrics_visualization
-        modules['quality'] = display_quality_metrics_visualization
-    except ImportError as e:
-        st.warning(f"Could not load quality visualization module: {str(e)}")
-    
+    """Load visualization modules lazily (imported when first displayed)"""
     return (
-        modules['brix'],
-        modules['torque'],
-        modules['quality']
+        lazy_page_function('visualization', 'display_brix_visualization', 'brix visualization'),
+        lazy_page_function('visualization', 'display_torque_visualization', 'torque visualization'),
+        lazy_page_function('visualization', 'display_quality_metrics_visualization', 'quality visualization')
     )
 
 @st.cache_resource
 def load_report_modules():
-    """Load report modules with proper error handling and fallbacks"""
-    modules = {
-        'generate': lambda *args, **kwargs: st.error("Report generation module not loaded"),
-        'download': lambda *args, **kwargs: st.error("Report download module not loaded")
-    }
-    
-    try:
-        from reports import generate_report
-        modules['generate'] = generate_report
-    except ImportError as e:
-        st.warning(f"Could not load report generation module: {str(e)}")
-    
-    try:
-        from reports import download_report
-        modules['download'] = download_report
-    except ImportError as e:
-        st.warning(f"Could not load report download module: {str(e)}")
-    
+    """Load report modules lazily (imported when a report is first generated)"""
     return (
-        modules['generate'],
-        modules['download']
+        lazy_page_function('reports', 'generate_report', 'report generation'),
+        lazy_page_function('reports', 'download_report', 'report download')
     )
 
 @st.cache_resource
 def load_other_modules():
-    """Load miscellaneous utility modules with proper error handling"""
+    """Load page modules lazily - each is imported when its tab is first opened"""
     modules = {
         'format_timestamp': lambda x: str(x),
-        'display_spc_page': lambda: st.error("SPC module not loaded"),
-        'display_capability_page': lambda: st.error("Capability module not loaded"),
-        'display_compliance_report_page': lambda: st.error("Compliance module not loaded"),
-        'display_prediction_page': lambda: st.error("Prediction module not loaded"),
-        'display_anomaly_detection_page': lambda: st.error("Anomaly module not loaded"),
-        'display_shift_handover_page': lambda: st.error("Handover module not loaded"),
-        'display_lab_inventory_page': lambda: st.error("Inventory module not loaded")
+        'display_spc_page': lazy_page_function('spc', 'display_spc_page', 'SPC'),
+        'display_capability_page': lazy_page_function('capability', 'display_capability_page', 'capability'),
+        'display_compliance_report_page': lazy_page_function('compliance', 'display_compliance_report_page', 'compliance'),
+        'display_prediction_page': lazy_page_function('prediction', 'display_prediction_page', 'prediction'),
+        'display_anomaly_detection_page': lazy_page_function('anomaly', 'display_anomaly_detection_page', 'anomaly'),
+        'display_shift_handover_page': lazy_page_function('handover', 'display_shift_handover_page', 'handover'),
+        'display_lab_inventory_page': lazy_page_function('lab_inventory', 'display_lab_inventory_page', 'inventory')
     }
     
     try:
@@ -298,48 +277,6 @@ def load_other_modules():
     except ImportError as e:
         st.warning(f"Could not load utils module: {str(e)}")
     
-    try:
-        from spc import display_spc_page
-        modules['display_spc_page'] = display_spc_page
-    except ImportError as e:
-        st.warning(f"Could not load SPC module: {str(e)}")
-    
-    try:
-        from capability import display_capability_page
-        modules['display_capability_page'] = display_capability_page
-    except ImportError as e:
-        st.warning(f"Could not load capability module: {str(e)}")
-    
-    try:
-        from compliance import display_compliance_report_page
-        modules['display_compliance_report_page'] = display_compliance_report_page
-    except ImportError as e:
-        st.warning(f"Could not load compliance module: {str(e)}")
-    
-    try:
-        from prediction import display_prediction_page
-        modules['display_prediction_page'] = display_prediction_page
-    except ImportError as e:
-        st.warning(f"Could not load prediction module: {str(e)}")
-    
-    try:
-        from anomaly import display_anomaly_detection_page
-        modules['display_anomaly_detection_page'] = display_anomaly_detection_page
-    except ImportError as e:
-        st.warning(f"Could not load anomaly module: {str(e)}")
-    
-    try:
-        from handover import display_shift_handover_page
-        modules['display_shift_handover_page'] = display_shift_handover_page
-    except ImportError as e:
-        st.warning(f"Could not load handover module: {str(e)}")
-    
-    try:
-        from lab_inventory import display_lab_inventory_page
-        modules['display_lab_inventory_page'] = display_lab_inventory_page
-    except ImportError as e:
-        st.warning(f"Could not load inventory module: {str(e)}")
-    
     return modules
 # =============================================
 # Modified initialization phase
@@ -350,8 +287,8 @@ if st.session_state.init_phase == 'starting':
             st.session_state.app_modules = load_other_modules()
             
             try:
-                from database import BeverageQADatabase
-                online_db = BeverageQADatabase()
+                from database import get_db
+                online_db = get_db()
                 if hasattr(online_db, 'test_connection') and online_db.test_connection():
                     try:
                         from hybrid_db import HybridDatabase
@@ -392,6 +329,8 @@ if st.session_state.init_phase == 'failed':
 # =============================================
 def export_as_png(fig, filename):
     """Helper function to export graphs as PNG"""
+    import matplotlib.pyplot as plt
+    
     buf = io.BytesIO()
     fig.savefig(buf, format="png", dpi=300)
     buf.seek(0)
@@ -996,6 +935,19 @@ def transform_data_for_report(raw_data, report_type):
                         {'Report Section': f'{num_col} Statistics', 'Metric': 'CPK', 'Value': f"{(num_data.mean() - num_data.min()) / (3 * num_data.std()):.2f}" if num_data.std() > 0 else "N/A"}
                     ])
         
+        # Week-over-week capability for parameters with specification limits
+        from capability import weekly_capability
+        from spc import to_long_format
+        from spc_stats import ALL_PRODUCTS
+        # 'source' was coerced to numbers above, so take every row that has the parameter
+        weekly = weekly_capability(to_long_format(raw_data.drop(columns='source', errors='ignore')))
+        for row in weekly[weekly['product'] == ALL_PRODUCTS].itertuples():
+            report_sections.append({
+                'Report Section': 'Weekly Capability',
+                'Metric': f"{row.parameter} (week ending {row.week_ending:%Y-%m-%d})",
+                'Value': f"Cpk {row.cpk:.2f} / Ppk {row.ppk:.2f} (n={row.n})"
+            })
+        
         # Add pass/fail statistics if available
         if 'tamper_evidence' in raw_data.columns:
             pass_fail = raw_data['tamper_evidence'].value_counts(normalize=True) * 100
@@ -1191,7 +1143,14 @@ def show_main_app():
         filtered_tabs = [tab for tab in tab_options if tab in allowed_pages]
         
         # Create tabs - IMPORTANT: This must be at the top level of the function
-        tabs = st.tabs(filtered_tabs)
+        # Tabs track their selection so only the open tab runs (and imports its module)
+        default_tab = st.session_state.get('last_tab')
+        tabs = st.tabs(
+            filtered_tabs,
+            default=default_tab if default_tab in filtered_tabs else None,
+            key="main_tabs",
+            on_change="rerun"
+        )
         
         # Map tab names to their content functions
         tab_content_map = {
@@ -1211,6 +1170,9 @@ def show_main_app():
 
         # Render content for each tab
         for tab, tab_name in zip(tabs, filtered_tabs):
+            if tab.open is False:
+                continue
+            st.session_state.last_tab = tab_name
             with tab:
                 if tab_name in tab_content_map:
                     try:
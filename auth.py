@@ -2,12 +2,12 @@ import streamlit as st
 import hashlib
 import datetime as dt
 import time
-from database import BeverageQADatabase
+from database import LazyDatabase
 from sqlalchemy import text
 import re
 
-# Initialize database connection
-db = BeverageQADatabase()
+# Database connection (connects on first use)
+db = LazyDatabase()
 
 def hash_password(password):
     """
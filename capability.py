@@ -1,14 +1,125 @@
+import logging
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import scipy.stats as stats
+from scipy import special
+from capability_transforms import FITTERS, apply_transform, fitted_pdf, normality_pvalue, percentile_indices
+from chart_downsampling import scatter_class
+from database import LazyDatabase
+from figure_cache import data_fingerprint
+from spec_limits import get_spec_registry
+from spc_stats import ALL_PRODUCTS, D2_MR
+
+logger = logging.getLogger(__name__)
+
+# Database connection (connects on first use)
+db = LazyDatabase()
+
+# Minimum number of measurements for capability indices
+MIN_CAPABILITY_SAMPLES = 10
+
+# Confidence intervals on capability indices
+CAPABILITY_CONFIDENCE = 0.95
+BOOTSTRAP_SAMPLES = int(os.getenv('QA_BOOTSTRAP_SAMPLES', '2000'))
+BOOTSTRAP_SEED = int(os.getenv('QA_BOOTSTRAP_SEED', '12345'))  # fixed so reported intervals can be reproduced
+BOOTSTRAP_MAX_ELEMENTS = 5_000_000  # resampled values held in memory at once
+
+# Distributions capability can be calculated under ('auto' picks normal or Johnson)
+CAPABILITY_METHODS = {
+    'normal': "Normal",
+    'boxcox': "Box-Cox",
+    'johnson': "Johnson SU",
+    'percentile': "Percentile",
+}
+NORMALITY_ALPHA = 0.05
+
+# Fitted transforms by (product, parameter, method, data version), in front of
+# the capability_transforms table so MLE fits run once per data version
+TRANSFORM_CACHE_SIZE = 256
+_transform_cache = OrderedDict()
+_transform_lock = threading.Lock()
+
+def _group_specs(product, parameter, spec_limits=None):
+    """
+    Specification limits for one group
+    
+    spec_limits (parameter -> {'lsl', 'usl'}) when given, otherwise the
+    registry's limits in force now for the product
+    """
+    if spec_limits is not None:
+        return spec_limits.get(parameter, {})
+    return get_spec_registry().limits_for(parameter, None if product == ALL_PRODUCTS else product)
+
+def _capability_indices(mean, sigma_within, sigma_overall, lsl, usl):
+    """
+    Cp/Cpk from within (short-term) sigma and Pp/Ppk from overall (long-term) sigma
+    
+    Works element-wise on scalars or arrays; a missing limit is NaN. With
+    one limit, Cp/Pp equal the one-sided index (CPU or CPL) as before.
+    
+    Returns:
+        dict of cp, cpk, pp, ppk arrays (NaN where not computable)
+    """
+    mean, sigma_within, sigma_overall, lsl, usl = (
+        np.asarray(v, dtype=float) for v in (mean, sigma_within, sigma_overall, lsl, usl)
+    )
+    indices = {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for prefix, sigma in (('c', sigma_within), ('p', sigma_overall)):
+            sigma = np.where(sigma > 0, sigma, np.nan)
+            upper = (usl - mean) / (3 * sigma)
+            lower = (mean - lsl) / (3 * sigma)
+            both = (usl - lsl) / (6 * sigma)
+            indices[f'{prefix}p'] = np.where(np.isnan(lsl), upper, np.where(np.isnan(usl), lower, both))
+            indices[f'{prefix}pk'] = np.fmin(upper, lower)
+    return indices
+
+def _expected_ppm(mean, sigma, lsl, usl):
+    """
+    Expected parts per million below LSL and above USL for a normal distribution
+    
+    Works element-wise on scalars or arrays (one entry per group) with
+    scipy.special.ndtr, the standard normal CDF, so no distribution objects
+    are built. A missing limit (NaN) contributes 0 on its side.
+    
+    Returns:
+        dict of expected_ppm_below, expected_ppm_above and expected_ppm arrays
+        (NaN where sigma is not positive or there are no limits)
+    """
+    mean, sigma, lsl, usl = (np.asarray(v, dtype=float) for v in (mean, sigma, lsl, usl))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sigma = np.where(sigma > 0, sigma, np.nan)
+        below = np.where(np.isnan(lsl), 0.0, 1e6 * special.ndtr((lsl - mean) / sigma))
+        above = np.where(np.isnan(usl), 0.0, 1e6 * special.ndtr((mean - usl) / sigma))
+    total = np.where(np.isnan(lsl) & np.isnan(usl), np.nan, below + above)
+    return {'expected_ppm_below': below, 'expected_ppm_above': above, 'expected_ppm': total}
+
+def _spec_or_nan(limit):
+    return np.nan if limit is None else float(limit)
+
+def _spec_or_none(limit):
+    return None if pd.isna(limit) else float(limit)
 
 def calculate_process_capability(data, column, lsl=None, usl=None):
     """
     Calculate process capability indices (Cp, Cpk, Pp, Ppk)
     
+    Cp/Cpk use the within (short-term) sigma MR-bar / d2 from consecutive
+    measurements in time order; Pp/Ppk use the overall sample standard
+    deviation, so Pp < Cp when the process drifts between measurements.
+    Expected PPM comes from a normal distribution with the overall sigma, so
+    it is non-zero for a poorly capable process even when no measurement
+    has been out of spec yet.
+    
     Args:
         data: DataFrame containing the data
         column: Column name for analysis
@@ -16,42 +127,46 @@ def calculate_process_capability(data, column, lsl=None, usl=None):
         usl: Upper specification limit (optional)
         
     Returns:
-        dict with capability metrics
+        dict with capability metrics (std is the overall sigma, sigma_within
+        the short-term sigma)
     """
+    empty = {
+        "cp": None, "cpk": None, "pp": None, "ppk": None, "n": None,
+        "mean": None, "std": None, "sigma_within": None, "min": None, "max": None,
+        "out_of_spec_percent": None, "expected_ppm_below": None, "expected_ppm_above": None,
+        "expected_ppm": None
+    }
     if data.empty or column not in data.columns:
-        return {
-            "cp": None, "cpk": None, "pp": None, "ppk": None,
-            "mean": None, "std": None, "min": None, "max": None,
-            "out_of_spec_percent": None
-        }
+        return empty
     
-    # Filter out missing values
+    # Filter out missing values (moving ranges need time order)
+    if 'timestamp' in data.columns:
+        data = data.sort_values('timestamp', kind='stable')
     values = data[column].dropna()
     
-    if len(values) < 10:  # Need minimum sample size for reliable calculations
-        return {
-            "cp": None, "cpk": None, "pp": None, "ppk": None,
-            "mean": None, "std": None, "min": None, "max": None,
-            "out_of_spec_percent": None
-        }
+    if len(values) < MIN_CAPABILITY_SAMPLES:  # Need minimum sample size for reliable calculations
+        return empty
     
     # Calculate basic statistics
     mean = values.mean()
     std = values.std(ddof=1)  # Sample standard deviation
-    min_val = values.min()
-    max_val = values.max()
+    sigma_within = values.diff().abs().mean() / D2_MR
     
-    # Process capability calculations
     results = {
+        "n": len(values),
         "mean": mean,
         "std": std,
-        "min": min_val,
-        "max": max_val,
+        "sigma_within": sigma_within,
+        "min": values.min(),
+        "max": values.max(),
         "cp": None,
         "cpk": None,
         "pp": None,
         "ppk": None,
-        "out_of_spec_percent": 0
+        "out_of_spec_percent": 0,
+        "expected_ppm_below": None,
+        "expected_ppm_above": None,
+        "expected_ppm": None
     }
     
     # Check if specification limits are provided
@@ -67,48 +182,451 @@ def calculate_process_capability(data, column, lsl=None, usl=None):
     
     results["out_of_spec_percent"] = 100 * out_of_spec_count / len(values)
     
-    # Calculate process capability and performance indices
-    if lsl is not None and usl is not None:
-        # Cp - Process Capability (assumes process is centered)
-        cp = (usl - lsl) / (6 * std)
-        results["cp"] = cp
+    indices = _capability_indices(mean, sigma_within, std, _spec_or_nan(lsl), _spec_or_nan(usl))
+    indices.update(_expected_ppm(mean, std, _spec_or_nan(lsl), _spec_or_nan(usl)))
+    results.update({key: (None if np.isnan(value) else float(value)) for key, value in indices.items()})
+    return results
+
+def calculate_capability_matrix(series, spec_limits=None, min_samples=MIN_CAPABILITY_SAMPLES):
+    """
+    Capability indices for every (product, parameter) group in one grouped pass
+    
+    Args:
+        series: Long-format DataFrame from spc.prepare_spc_series (sorted, with
+                moving_range); spc.to_long_format output is prepared automatically
+        spec_limits: Dict of parameter -> {'lsl': ..., 'usl': ...} (default: each
+                     product's current limits from the spec registry)
+        min_samples: Groups with fewer measurements get no indices
         
-        # Cpk - Process Capability Index (accounts for process centering)
-        cpu = (usl - mean) / (3 * std)
-        cpl = (mean - lsl) / (3 * std)
-        cpk = min(cpu, cpl)
-        results["cpk"] = cpk
+    Returns:
+        DataFrame indexed by (product, parameter) with n, mean, std (overall),
+        sigma_within (MR-bar / d2), min, max, lsl, usl, cp, cpk, pp, ppk,
+        out_of_spec_percent, observed_ppm and the normal-theory
+        expected_ppm_below / expected_ppm_above / expected_ppm
+    """
+    if 'moving_range' not in series.columns:
+        from spc import prepare_spc_series
+        series = prepare_spc_series(series)
+    
+    groups = series[['product', 'parameter']].drop_duplicates()
+    specs = [_group_specs(product, parameter, spec_limits) for product, parameter in groups.itertuples(index=False)]
+    groups = groups.assign(lsl=[s.get('lsl') for s in specs], usl=[s.get('usl') for s in specs])
+    limits = series[['product', 'parameter']].merge(groups, on=['product', 'parameter'], how='left')
+    lsl = limits['lsl'].to_numpy(dtype=float)
+    usl = limits['usl'].to_numpy(dtype=float)
+    series = series.assign(lsl=lsl, usl=usl, out_of_spec=(series['value'] < lsl) | (series['value'] > usl))
+    
+    matrix = series.groupby(['product', 'parameter'], sort=True).agg(
+        n=('value', 'size'),
+        mean=('value', 'mean'),
+        std=('value', 'std'),
+        MR_bar=('moving_range', 'mean'),
+        min=('value', 'min'),
+        max=('value', 'max'),
+        lsl=('lsl', 'first'),
+        usl=('usl', 'first'),
+        out_of_spec=('out_of_spec', 'sum'),
+    )
+    matrix['sigma_within'] = matrix.pop('MR_bar') / D2_MR
+    matrix['out_of_spec_percent'] = 100 * matrix.pop('out_of_spec') / matrix['n']
+    
+    indices = _capability_indices(matrix['mean'], matrix['sigma_within'], matrix['std'],
+                                  matrix['lsl'], matrix['usl'])
+    indices.update(_expected_ppm(matrix['mean'], matrix['std'], matrix['lsl'], matrix['usl']))
+    too_small = (matrix['n'] < min_samples).to_numpy()
+    for key, values in indices.items():
+        matrix[key] = np.where(too_small, np.nan, values)
+    matrix.loc[matrix[['lsl', 'usl']].isna().all(axis=1), 'out_of_spec_percent'] = np.nan
+    matrix['observed_ppm'] = matrix['out_of_spec_percent'] * 1e4
+    return matrix
+
+def bissell_intervals(indices, n, confidence=CAPABILITY_CONFIDENCE):
+    """
+    Analytic confidence intervals for capability indices (normal theory)
+    
+    Cp/Pp use the chi-square interval of sigma; Cpk/Ppk use Bissell's
+    approximation Cpk ± z·sqrt(1 / (9n) + Cpk² / (2(n - 1))). All inputs
+    may be arrays (one entry per group).
+    
+    Args:
+        indices: dict with cp, cpk, pp, ppk (scalars or arrays)
+        n: Sample size(s)
+        confidence: Two-sided confidence level
         
-        # Pp - Process Performance (overall variation)
-        # For short-term vs long-term distinction
-        pp = cp  # In this simple implementation, we're using the same calculation
-        results["pp"] = pp
+    Returns:
+        dict of index name -> (low, high)
+    """
+    n = np.asarray(n, dtype=float)
+    alpha = 1 - confidence
+    z = stats.norm.ppf(1 - alpha / 2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        chi_low = np.sqrt(stats.chi2.ppf(alpha / 2, n - 1) / (n - 1))
+        chi_high = np.sqrt(stats.chi2.ppf(1 - alpha / 2, n - 1) / (n - 1))
+        
+        intervals = {}
+        for name in ('cp', 'pp'):
+            value = np.asarray(indices[name], dtype=float)
+            intervals[name] = (value * chi_low, value * chi_high)
+        for name in ('cpk', 'ppk'):
+            value = np.asarray(indices[name], dtype=float)
+            half_width = z * np.sqrt(1 / (9 * n) + value ** 2 / (2 * (n - 1)))
+            intervals[name] = (value - half_width, value + half_width)
+    return intervals
+
+def bootstrap_intervals(values, lsl=None, usl=None, n_boot=BOOTSTRAP_SAMPLES, seed=BOOTSTRAP_SEED,
+                        confidence=CAPABILITY_CONFIDENCE):
+    """
+    Percentile bootstrap confidence intervals for Cp, Cpk, Pp and Ppk
+    
+    All resamples are drawn as one (n_boot x n) index matrix, so the
+    statistics of every resample come from row-wise NumPy reductions
+    (processed in row chunks to bound memory). Values are resampled for the
+    mean and overall sigma; the moving ranges of the original time order
+    are resampled (with their own index matrix) for the within sigma,
+    because resampling values would destroy the order MR-bar depends on.
+    
+    Args:
+        values: 1-D array of measurements in time order (no missing values)
+        lsl: Lower specification limit (optional)
+        usl: Upper specification limit (optional)
+        n_boot: Number of bootstrap resamples
+        seed: Random seed (the same inputs and seed give the same intervals)
+        confidence: Two-sided confidence level
         
-        # Ppk - Process Performance Index
-        ppk = cpk  # In this simple implementation, we're using the same calculation
-        results["ppk"] = ppk
-    
-    elif usl is not None:
-        # One-sided upper specification limit
-        cpu = (usl - mean) / (3 * std)
-        results["cp"] = cpu
-        results["cpk"] = cpu
-        results["pp"] = cpu
-        results["ppk"] = cpu
-    
-    elif lsl is not None:
-        # One-sided lower specification limit
-        cpl = (mean - lsl) / (3 * std)
-        results["cp"] = cpl
-        results["cpk"] = cpl
-        results["pp"] = cpl
-        results["ppk"] = cpl
+    Returns:
+        dict of index name -> (low, high); NaN when not computable
+    """
+    x = np.asarray(values, dtype=float)
+    n = len(x)
+    if n < 3 or (lsl is None and usl is None):
+        return {name: (np.nan, np.nan) for name in ('cp', 'cpk', 'pp', 'ppk')}
+    moving_ranges = np.abs(np.diff(x))
+    
+    rng = np.random.default_rng(seed)
+    chunk = max(1, BOOTSTRAP_MAX_ELEMENTS // n)
+    samples = {name: [] for name in ('cp', 'cpk', 'pp', 'ppk')}
+    for start in range(0, n_boot, chunk):
+        rows = min(chunk, n_boot - start)
+        index = rng.integers(0, n, size=(rows, n))
+        resampled = x[index]
+        mr_bar = moving_ranges[rng.integers(0, n - 1, size=(rows, n - 1))].mean(axis=1)
+        indices = _capability_indices(resampled.mean(axis=1), mr_bar / D2_MR, resampled.std(axis=1, ddof=1),
+                                      _spec_or_nan(lsl), _spec_or_nan(usl))
+        for name, value in indices.items():
+            samples[name].append(value)
     
+    alpha = 1 - confidence
+    intervals = {}
+    for name, chunks in samples.items():
+        estimates = np.concatenate(chunks)
+        estimates = estimates[np.isfinite(estimates)]
+        intervals[name] = (tuple(np.quantile(estimates, [alpha / 2, 1 - alpha / 2]))
+                           if estimates.size else (np.nan, np.nan))
+    return intervals
+
+def _group_seed(seed, product, parameter):
+    """Per-group seed that does not depend on the order groups are processed in"""
+    return [seed, zlib.crc32(f"{product}|{parameter}".encode())]
+
+def _bootstrap_group(task):
+    product, parameter, values, lsl, usl, n_boot, seed, confidence = task
+    return (product, parameter), bootstrap_intervals(values, lsl, usl, n_boot, seed, confidence)
+
+def calculate_capability_intervals(series, matrix, n_boot=BOOTSTRAP_SAMPLES, seed=BOOTSTRAP_SEED,
+                                   confidence=CAPABILITY_CONFIDENCE, workers=None):
+    """
+    Bissell and bootstrap intervals for every group of a capability matrix
+    
+    Args:
+        series: Long-format series the matrix was computed from (sorted, as
+                from spc.prepare_spc_series)
+        matrix: DataFrame from calculate_capability_matrix
+        n_boot: Bootstrap resamples per group
+        seed: Base random seed; each group's seed is derived from it and the
+              group key, so results do not depend on workers or order
+        confidence: Two-sided confidence level
+        workers: Spread groups over this many processes (None: run in-process)
+        
+    Returns:
+        DataFrame indexed like matrix with <index>_low / <index>_high
+        (Bissell) and <index>_boot_low / <index>_boot_high columns
+    """
+    intervals = pd.DataFrame(index=matrix.index)
+    for name, (low, high) in bissell_intervals(matrix, matrix['n'], confidence).items():
+        intervals[f'{name}_low'] = low
+        intervals[f'{name}_high'] = high
+    
+    tasks = []
+    for (product, parameter), group in series.groupby(['product', 'parameter'], sort=False):
+        if (product, parameter) not in matrix.index:
+            continue
+        row = matrix.loc[(product, parameter)]
+        if pd.isna(row['cpk']):
+            continue
+        tasks.append((product, parameter, group['value'].to_numpy(dtype=float),
+                      None if pd.isna(row['lsl']) else row['lsl'], None if pd.isna(row['usl']) else row['usl'],
+                      n_boot, _group_seed(seed, product, parameter), confidence))
+    
+    if workers and workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_bootstrap_group, tasks))
+    else:
+        results = [_bootstrap_group(task) for task in tasks]
+    
+    for name in ('cp', 'cpk', 'pp', 'ppk'):
+        intervals[f'{name}_boot_low'] = np.nan
+        intervals[f'{name}_boot_high'] = np.nan
+    for key, group_intervals in results:
+        for name, (low, high) in group_intervals.items():
+            intervals.loc[key, [f'{name}_boot_low', f'{name}_boot_high']] = [low, high]
+    return intervals
+
+# Windows offered for the capability trend
+TREND_WINDOWS = {
+    "7 Days": '7D',
+    "30 Days": '30D',
+    "Last 50 Measurements": 50,
+    "Expanding": None,
+}
+
+def rolling_capability(timestamps, values, lsl=None, usl=None, window='7D', min_samples=MIN_CAPABILITY_SAMPLES):
+    """
+    Capability indices for the window ending at every measurement, in O(n)
+    
+    Prefix sums of x, x² and the moving ranges give each window's count,
+    mean, overall sigma and MR-bar (within sigma) by two lookups, so every
+    window costs O(1) however long it is. Values are centred on their mean
+    before squaring to keep the variance differences numerically stable.
+    
+    Args:
+        timestamps: Measurement times, ascending
+        values: Measurements in the same order (no missing values)
+        lsl: Lower specification limit (optional)
+        usl: Upper specification limit (optional)
+        window: Time window ('7D', pd.Timedelta), number of measurements (int)
+                or None for an expanding window from the first measurement
+        min_samples: Windows with fewer measurements get NaN indices
+        
+    Returns:
+        DataFrame with timestamp, n, mean, std, sigma_within, cp, cpk, pp and ppk
+    """
+    x = np.asarray(values, dtype=float)
+    times = pd.to_datetime(pd.Series(timestamps)).to_numpy()
+    count = len(x)
+    
+    end = np.arange(1, count + 1)  # each window is x[start:end]
+    if window is None:
+        start = np.zeros(count, dtype=int)
+    elif isinstance(window, (int, np.integer)):
+        start = np.maximum(0, end - window)
+    else:
+        start = np.searchsorted(times, times - pd.Timedelta(window), side='right')
+    
+    centre = x.mean() if count else 0.0
+    centred = x - centre
+    sum_x = np.r_[0.0, np.cumsum(centred)]
+    sum_x2 = np.r_[0.0, np.cumsum(centred ** 2)]
+    # sum_mr[k] is the sum of |x_j - x_(j-1)| for 1 <= j < k
+    sum_mr = np.r_[0.0, 0.0, np.cumsum(np.abs(np.diff(x)))][:count + 1]
+    
+    n = end - start
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_centred = (sum_x[end] - sum_x[start]) / n
+        variance = (sum_x2[end] - sum_x2[start] - n * mean_centred ** 2) / (n - 1)
+        std = np.sqrt(np.clip(variance, 0.0, None))
+        mr_bar = (sum_mr[end] - sum_mr[np.minimum(start + 1, count)]) / (n - 1)
+    sigma_within = mr_bar / D2_MR
+    mean = mean_centred + centre
+    
+    indices = _capability_indices(mean, sigma_within, std, _spec_or_nan(lsl), _spec_or_nan(usl))
+    trend = pd.DataFrame({'timestamp': times, 'n': n, 'mean': mean, 'std': std, 'sigma_within': sigma_within})
+    too_small = n < min_samples
+    for key, value in indices.items():
+        trend[key] = np.where(too_small, np.nan, value)
+    return trend
+
+def calculate_rolling_capability(series, spec_limits=None, window='7D', min_samples=MIN_CAPABILITY_SAMPLES):
+    """
+    rolling_capability for every (product, parameter) group with specification limits
+    
+    Args:
+        series: Long-format DataFrame from spc.prepare_spc_series (spc.to_long_format
+                output is prepared automatically)
+        spec_limits: Dict of parameter -> {'lsl': ..., 'usl': ...} (default: each
+                     product's current limits from the spec registry)
+        window: See rolling_capability
+        min_samples: See rolling_capability
+        
+    Returns:
+        DataFrame with product, parameter and the rolling_capability columns
+    """
+    if 'moving_range' not in series.columns:
+        from spc import prepare_spc_series
+        series = prepare_spc_series(series)
+    
+    frames = []
+    for (product, parameter), group in series.groupby(['product', 'parameter'], sort=True):
+        specs = _group_specs(product, parameter, spec_limits)
+        if specs.get('lsl') is None and specs.get('usl') is None:
+            continue
+        trend = rolling_capability(group['timestamp'], group['value'], specs.get('lsl'), specs.get('usl'),
+                                   window, min_samples)
+        frames.append(trend.assign(product=product, parameter=parameter))
+    if not frames:
+        return pd.DataFrame(columns=['product', 'parameter', 'timestamp', 'n', 'mean', 'std', 'sigma_within',
+                                     'cp', 'cpk', 'pp', 'ppk'])
+    trend = pd.concat(frames, ignore_index=True)
+    return trend[['product', 'parameter'] + [col for col in trend.columns if col not in ('product', 'parameter')]]
+
+def weekly_capability(series, spec_limits=None, min_samples=MIN_CAPABILITY_SAMPLES):
+    """
+    Week-over-week capability for reports
+    
+    Returns:
+        One row per (product, parameter, week): the 7-day rolling indices at
+        the week's last measurement, with a week_ending column
+    """
+    trend = calculate_rolling_capability(series, spec_limits, '7D', min_samples)
+    if trend.empty:
+        return trend.assign(week_ending=pd.Series(dtype='datetime64[ns]'))
+    trend['week_ending'] = trend['timestamp'].dt.to_period('W').dt.end_time.dt.normalize()
+    weekly = trend.groupby(['product', 'parameter', 'week_ending'], sort=True).tail(1)
+    return weekly.dropna(subset=['cpk', 'ppk'], how='all').reset_index(drop=True)
+
+def get_transform_params(values, method, product=ALL_PRODUCTS, parameter=None):
+    """
+    Fitted Box-Cox or Johnson parameters for a data set, fitted at most once
+    
+    Looks in the in-memory cache, then the capability_transforms table, and
+    only fits (and stores the fit) when neither has this data version. The
+    data version is a hash of the values, so new measurements trigger a refit.
+    
+    Args:
+        values: 1-D array of measurements
+        method: 'boxcox' or 'johnson'
+        product: Product the values belong to (ALL_PRODUCTS for pooled data)
+        parameter: Parameter name; without it the fit is only cached in memory
+        
+    Returns:
+        dict of transform parameters (see capability_transforms)
+    """
+    values = np.asarray(values, dtype=float)
+    data_version = data_fingerprint(values)
+    key = (product, parameter, method, data_version)
+    with _transform_lock:
+        params = _transform_cache.get(key)
+        if params is not None:
+            _transform_cache.move_to_end(key)
+            return params
+    
+    params = None
+    if parameter is not None:
+        try:
+            params = db.get_capability_transform(product, parameter, method, data_version)
+        except Exception as e:
+            logger.warning(f"Could not read stored {method} fit for {product}/{parameter}: {str(e)}")
+    
+    if params is None:
+        params = FITTERS[method](values)
+        logger.info(f"Fitted {method} transform for {product}/{parameter} ({len(values)} values)")
+        if parameter is not None:
+            try:
+                db.save_capability_transform(product, parameter, method, data_version, params)
+            except Exception as e:
+                logger.warning(f"Could not store {method} fit for {product}/{parameter}: {str(e)}")
+    
+    with _transform_lock:
+        _transform_cache[key] = params
+        while len(_transform_cache) > TRANSFORM_CACHE_SIZE:
+            _transform_cache.popitem(last=False)
+    return params
+
+def calculate_nonnormal_capability(data, column, lsl=None, usl=None, method='auto', product=ALL_PRODUCTS):
+    """
+    Capability indices without assuming normally distributed data
+    
+    - boxcox / johnson: values and specification limits are transformed to
+      (approximate) normality with a cached fit and the indices are
+      calculated on the transformed scale
+    - percentile: Pp/Ppk from empirical 0.135% / 50% / 99.865% quantiles
+      (Cp/Cpk and expected PPM are not defined without a distribution model)
+    - auto: normal when the normality test passes, otherwise johnson
+    
+    Args:
+        data: DataFrame containing the data
+        column: Column name for analysis
+        lsl: Lower specification limit (optional)
+        usl: Upper specification limit (optional)
+        method: Key of CAPABILITY_METHODS or 'auto'
+        product: Product the data belongs to (names the cached fit)
+        
+    A Box-Cox limit at or below -shift is outside the transform's domain:
+    the fitted distribution has no parts that low. An LSL there contributes
+    0 PPM and the indices use the USL only. With a USL there, every part is
+    above it (1,000,000 PPM) and the indices are not computed. Either case
+    is explained in warnings.
+    
+    Returns:
+        dict as from calculate_process_capability plus method, normality_p,
+        warnings (list of messages) and, for transforms, transform (fitted
+        parameters) with transformed_mean / transformed_std
+    """
+    results = calculate_process_capability(data, column, lsl, usl)
+    results['method'] = 'normal' if method == 'auto' else method
+    results['warnings'] = []
+    if results['mean'] is None:
+        return results
+    
+    if 'timestamp' in data.columns:
+        data = data.sort_values('timestamp', kind='stable')
+    values = data[column].dropna().to_numpy(dtype=float)
+    results['normality_p'] = normality_pvalue(values)
+    if method == 'auto':
+        results['method'] = 'normal' if not results['normality_p'] < NORMALITY_ALPHA else 'johnson'
+    method = results['method']
+    if method == 'normal' or (lsl is None and usl is None):
+        return results
+    
+    if method == 'percentile':
+        results.update(cp=None, cpk=None, expected_ppm_below=None, expected_ppm_above=None, expected_ppm=None,
+                       **{key: (None if np.isnan(value) else value)
+                          for key, value in percentile_indices(values, lsl, usl).items()})
+        return results
+    
+    params = get_transform_params(values, method, product, column)
+    transformed = apply_transform(values, params)
+    transformed_mean = np.nanmean(transformed)
+    transformed_std = np.nanstd(transformed, ddof=1)
+    transformed_within = np.nanmean(np.abs(np.diff(transformed))) / D2_MR
+    
+    limits = {}
+    for name, limit in (('LSL', lsl), ('USL', usl)):
+        limits[name] = np.nan if limit is None else float(apply_transform([limit], params)[0])
+        if limit is not None and np.isnan(limits[name]):
+            # Only Box-Cox has a restricted domain: no fitted value is this low
+            limits[name] = -np.inf
+            results['warnings'].append(
+                f"{name} {limit:g} is outside the Box-Cox domain (values above {0.0 - params['shift']:g}): "
+                f"the fitted distribution puts every part above it"
+            )
+    
+    # Both transforms are increasing, so P(X > USL) = P(T(X) > T(USL)) on the normal scale
+    if np.isneginf(limits['USL']):
+        indices = dict.fromkeys(('cp', 'cpk', 'pp', 'ppk'), np.nan)
+    else:
+        # An unreachable LSL leaves the USL as the only limit that can be exceeded
+        index_lsl = np.nan if np.isneginf(limits['LSL']) else limits['LSL']
+        indices = _capability_indices(transformed_mean, transformed_within, transformed_std,
+                                      index_lsl, limits['USL'])
+    indices.update(_expected_ppm(transformed_mean, transformed_std, limits['LSL'], limits['USL']))
+    results.update({key: (None if np.isnan(value) else float(value)) for key, value in indices.items()})
+    results.update(transform=params, transformed_mean=float(transformed_mean),
+                   transformed_std=float(transformed_std))
     return results
 
-def create_capability_chart(data, column, lsl=None, usl=None, title=None):
+def create_capability_chart(data, column, lsl=None, usl=None, title=None, capability=None):
     """
-    Create a process capability chart with histogram and normal distribution overlay
+    Create a process capability chart with histogram and fitted distribution overlay
     
     Args:
         data: DataFrame containing the data
@@ -116,6 +634,8 @@ def create_capability_chart(data, column, lsl=None, usl=None, title=None):
         lsl: Lower specification limit (optional)
         usl: Upper specification limit (optional)
         title: Chart title (optional)
+        capability: Result of calculate_nonnormal_capability; its fitted
+                    transform replaces the normal curve (default: normal)
         
     Returns:
         Plotly figure object
@@ -134,7 +654,8 @@ def create_capability_chart(data, column, lsl=None, usl=None, title=None):
         return fig
     
     # Calculate capability metrics
-    capability = calculate_process_capability(data, column, lsl, usl)
+    if capability is None:
+        capability = calculate_process_capability(data, column, lsl, usl)
     
     # Create figure
     fig = go.Figure()
@@ -155,13 +676,19 @@ def create_capability_chart(data, column, lsl=None, usl=None, title=None):
             min(max(values) + 3 * capability["std"], usl + capability["std"] if usl is not None else np.inf),
             100
         )
-        y = stats.norm.pdf(x, capability["mean"], capability["std"])
+        transform = capability.get("transform")
+        if transform is not None:
+            y = fitted_pdf(x, transform, capability["transformed_mean"], capability["transformed_std"])
+            name = f'{CAPABILITY_METHODS[transform["method"]]} Fit'
+        else:
+            y = stats.norm.pdf(x, capability["mean"], capability["std"])
+            name = 'Normal Distribution'
         
         fig.add_trace(go.Scatter(
             x=x,
             y=y,
             mode='lines',
-            name='Normal Distribution',
+            name=name,
             line=dict(color='darkblue')
         ))
     
@@ -194,6 +721,64 @@ def create_capability_chart(data, column, lsl=None, usl=None, title=None):
     
     return fig
 
+def create_capability_trend_chart(trend, title=None):
+    """
+    Line chart of rolling Cpk and Ppk
+    
+    Args:
+        trend: DataFrame from rolling_capability
+        title: Chart title (optional)
+        
+    Returns:
+        Plotly figure object
+    """
+    fig = go.Figure()
+    trend = trend.dropna(subset=['cpk', 'ppk'], how='all')
+    if trend.empty:
+        fig.update_layout(title="Not enough measurements for a capability trend")
+        return fig
+    
+    for index, name, color in (('cpk', 'Cpk', 'blue'), ('ppk', 'Ppk', 'orange')):
+        fig.add_trace(scatter_class(len(trend))(
+            x=trend['timestamp'],
+            y=trend[index],
+            mode='lines',
+            name=name,
+            line=dict(color=color)
+        ))
+    
+    fig.add_hline(y=1.33, line_dash="dash", line_color="green", annotation_text="1.33")
+    fig.add_hline(y=1.0, line_dash="dash", line_color="red", annotation_text="1.0")
+    fig.update_layout(
+        title=title if title else 'Capability Trend',
+        xaxis_title='Date',
+        yaxis_title='Index',
+        height=400
+    )
+    return fig
+
+def display_capability_trend(data, parameter, lsl=None, usl=None):
+    """
+    Display the rolling Cpk/Ppk trend for one parameter
+    
+    Args:
+        data: DataFrame with the data (needs a timestamp column)
+        parameter: Parameter name
+        lsl: Lower specification limit (optional)
+        usl: Upper specification limit (optional)
+    """
+    if 'timestamp' not in data.columns or (lsl is None and usl is None):
+        return
+    
+    st.subheader("Capability Trend")
+    window_name = st.radio("Window", list(TREND_WINDOWS), horizontal=True, key="capability_trend_window")
+    rows = data[['timestamp', parameter]].dropna().sort_values('timestamp', kind='stable')
+    trend = rolling_capability(rows['timestamp'], rows[parameter], lsl, usl, TREND_WINDOWS[window_name])
+    
+    st.plotly_chart(create_capability_trend_chart(trend, f'Rolling Capability - {parameter} ({window_name})'),
+                    use_container_width=True)
+    st.caption("Normal-theory indices: Cpk from MR̄/d2 and Ppk from the overall standard deviation of each window")
+
 def display_capability_metrics(capability_data):
     """
     Display process capability metrics in a formatted way
@@ -221,6 +806,33 @@ def display_capability_metrics(capability_data):
                  f"{capability_data['out_of_spec_percent']:.2f}%" if capability_data['out_of_spec_percent'] is not None else "N/A")
         st.metric("Standard Deviation", 
                  f"{capability_data['std']:.3f}" if capability_data['std'] is not None else "N/A")
+    
+    # Long-term performance and short-term sigma
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Process Performance (Pp)", 
+                 f"{capability_data['pp']:.3f}" if capability_data['pp'] is not None else "N/A")
+    
+    with col2:
+        st.metric("Process Performance Index (Ppk)", 
+                 f"{capability_data['ppk']:.3f}" if capability_data['ppk'] is not None else "N/A")
+    
+    with col3:
+        st.metric("Within Sigma (MR̄/d2)", 
+                 f"{capability_data['sigma_within']:.3f}" if capability_data.get('sigma_within') is not None else "N/A")
+    
+    # Expected out-of-spec rate from the fitted distribution
+    if capability_data.get('expected_ppm') is not None:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Expected PPM", f"{capability_data['expected_ppm']:,.0f}",
+                      help="Parts per million expected outside the specification limits, "
+                           "from the fitted distribution with the overall sigma")
+        with col2:
+            st.metric("Expected PPM < LSL", f"{capability_data['expected_ppm_below']:,.0f}")
+        with col3:
+            st.metric("Expected PPM > USL", f"{capability_data['expected_ppm_above']:,.0f}")
 
     # Capability index interpretation
     if capability_data['cpk'] is not None:
@@ -235,7 +847,42 @@ def display_capability_metrics(capability_data):
         else:
             st.success("✓✓ Process is highly capable (Cpk ≥ 1.67). Excellent process control.")
 
-def display_capability_analysis(data, parameter, lsl=None, usl=None):
+def display_capability_intervals(data, parameter, capability_data, lsl=None, usl=None):
+    """
+    Display Bissell and bootstrap confidence intervals for one parameter
+    
+    Args:
+        data: DataFrame with the data
+        parameter: Parameter name
+        capability_data: Result of calculate_process_capability for the same data
+        lsl: Lower specification limit (optional)
+        usl: Upper specification limit (optional)
+    """
+    if 'timestamp' in data.columns:
+        data = data.sort_values('timestamp', kind='stable')
+    values = data[parameter].dropna().to_numpy(dtype=float)
+    
+    analytic = bissell_intervals(capability_data, capability_data['n'])
+    resampled = bootstrap_intervals(values, lsl, usl)
+    
+    rows = [{
+        'Index': name.capitalize(),
+        'Estimate': capability_data[name],
+        'Bissell Low': analytic[name][0],
+        'Bissell High': analytic[name][1],
+        'Bootstrap Low': resampled[name][0],
+        'Bootstrap High': resampled[name][1],
+    } for name in ('cp', 'cpk', 'pp', 'ppk')]
+    
+    low, high = resampled['cpk']
+    st.caption(f"Cpk {capability_data['cpk']:.2f} from {capability_data['n']} measurements: "
+               f"{CAPABILITY_CONFIDENCE:.0%} bootstrap interval {low:.2f} - {high:.2f}")
+    with st.expander(f"{CAPABILITY_CONFIDENCE:.0%} Confidence Intervals"):
+        st.dataframe(pd.DataFrame(rows).round(3), use_container_width=True, hide_index=True)
+        st.caption(f"Bootstrap: {BOOTSTRAP_SAMPLES} resamples, seed {BOOTSTRAP_SEED}. "
+                   "Bissell intervals assume normally distributed data.")
+
+def display_capability_analysis(data, parameter, lsl=None, usl=None, method='normal', product=ALL_PRODUCTS):
     """
     Display comprehensive capability analysis for a parameter
     
@@ -244,41 +891,130 @@ def display_capability_analysis(data, parameter, lsl=None, usl=None):
         parameter: Parameter name to analyze
         lsl: Lower specification limit (optional)
         usl: Upper specification limit (optional)
+        method: Key of CAPABILITY_METHODS
+        product: Product the data belongs to (names the cached transform fit)
     """
     if data.empty or parameter not in data.columns:
         st.info(f"No data available for {parameter} capability analysis")
         return
     
     # Calculate process capability
-    capability_data = calculate_process_capability(data, parameter, lsl, usl)
+    capability_data = calculate_nonnormal_capability(data, parameter, lsl, usl, method, product)
+    
+    normality_p = capability_data.get('normality_p')
+    if normality_p is not None and not np.isnan(normality_p):
+        if normality_p < NORMALITY_ALPHA and method == 'normal':
+            st.warning(f"Data does not look normally distributed (normality test p = {normality_p:.3f}). "
+                       "Consider the Box-Cox, Johnson SU or Percentile method.")
+        else:
+            st.caption(f"Normality test p = {normality_p:.3f}")
+    
+    for warning in capability_data.get('warnings', []):
+        st.warning(warning)
     
     # Display metrics
     display_capability_metrics(capability_data)
     
+    # Confidence intervals (normal theory)
+    if capability_data['cpk'] is not None and method == 'normal':
+        display_capability_intervals(data, parameter, capability_data, lsl, usl)
+    
     # Create and display capability chart
-    fig = create_capability_chart(data, parameter, lsl, usl)
+    fig = create_capability_chart(data, parameter, lsl, usl, capability=capability_data)
     st.plotly_chart(fig, use_container_width=True)
     
+    # Is capability improving?
+    display_capability_trend(data, parameter, lsl, usl)
+    
     # Show data summary
     with st.expander("View Data Summary"):
         st.dataframe(data[[parameter]].describe())
 
-def display_capability_page(data, product_filter=None, edit_mode=False):
+def _cached_capability_matrix(series, spec_limits=None, intervals=False):
+    """
+    calculate_capability_matrix (and optionally its confidence intervals) for
+    this session, recomputed only when the data or the specification limits change
+    
+    Selecting a row for drill-down reruns the page, so without this every
+    click would redo the grouped pass and the bootstrap.
+    """
+    key = data_fingerprint(series[['product', 'parameter', 'timestamp', 'value']],
+                           get_spec_registry().versions if spec_limits is None else spec_limits)
+    cached = st.session_state.get('capability_matrix_cache')
+    if cached is None or cached['key'] != key:
+        cached = {'key': key, 'matrix': calculate_capability_matrix(series, spec_limits), 'intervals': None}
+        st.session_state.capability_matrix_cache = cached
+    if intervals and cached['intervals'] is None:
+        cached['intervals'] = calculate_capability_intervals(series, cached['matrix'])
+    return cached['matrix'].join(cached['intervals']) if intervals else cached['matrix']
+
+# Matrix sort options: column -> ascending (worst groups first)
+MATRIX_SORT_ORDERS = {'cpk': True, 'ppk': True, 'cp': True, 'pp': True, 'expected_ppm': False,
+                      'observed_ppm': False, 'n': False}
+MATRIX_COLUMNS = ['product', 'parameter', 'n', 'mean', 'sigma_within', 'std', 'lsl', 'usl',
+                  'cp', 'cpk', 'pp', 'ppk', 'expected_ppm_below', 'expected_ppm_above', 'expected_ppm',
+                  'observed_ppm']
+
+def display_capability_matrix(data, spec_limits=None, method='normal'):
     """
-    Display capability analysis page with parameter selection
+    Display Cp/Cpk/Pp/Ppk and PPM for every product and SPC parameter, with
+    drill-down into the capability chart of a selected group
+    
+    Args:
+        data: DataFrame with the quality data (as from get_check_data)
+        spec_limits: Dict of parameter -> {'lsl': ..., 'usl': ...} (default: each
+                     product's current limits from the spec registry)
+        method: Key of CAPABILITY_METHODS used for the drill-down
+    """
+    from spc import SPC_PARAMETERS, prepare_spc_series, to_long_format
+    
+    series = prepare_spc_series(to_long_format(data))
+    if series.empty:
+        st.info("No SPC parameters in the selected data")
+        return
+    
+    st.subheader("Capability Matrix")
+    index = st.radio("Index", ["cpk", "ppk", "cp", "pp"], horizontal=True, key="capability_matrix_index",
+                     format_func=lambda name: name.capitalize())
+    intervals = st.checkbox(f"Include {CAPABILITY_CONFIDENCE:.0%} confidence intervals",
+                            key="capability_matrix_intervals")
+    matrix = _cached_capability_matrix(series, spec_limits, intervals)
+    st.dataframe(matrix[index].unstack('parameter').round(3), use_container_width=True)
+    
+    sort_by = st.selectbox("Sort by", list(MATRIX_SORT_ORDERS), key="capability_matrix_sort",
+                           format_func=lambda name: name.replace('_', ' ').capitalize(),
+                           help="Worst groups first")
+    table = matrix.reset_index().sort_values(sort_by, ascending=MATRIX_SORT_ORDERS[sort_by],
+                                             na_position='last', ignore_index=True)
+    columns = MATRIX_COLUMNS + [col for col in table.columns if col.endswith(('_low', '_high'))]
+    event = st.dataframe(table[columns].round(4), use_container_width=True, hide_index=True,
+                         on_select="rerun", selection_mode="single-row", key="capability_matrix_table")
+    
+    if not event.selection.rows:
+        st.caption("Select a row to open its capability chart")
+        return
+    
+    # Drill-down into one group with the single-parameter analysis
+    selected = table.iloc[event.selection.rows[0]]
+    product, parameter = selected['product'], selected['parameter']
+    st.markdown(f"#### {parameter} - {product}")
+    rows = data[data['source'].isin(SPC_PARAMETERS[parameter])] if 'source' in data.columns else data
+    if product != ALL_PRODUCTS:
+        rows = rows[rows['product'] == product]
+    rows = rows.assign(**{parameter: pd.to_numeric(rows[parameter], errors='coerce')})
+    display_capability_analysis(rows, parameter, _spec_or_none(selected['lsl']), _spec_or_none(selected['usl']),
+                                method, product)
+
+def display_single_parameter_capability(data, product_filter=None, edit_mode=False, method='normal'):
+    """
+    Display the capability analysis of one selected parameter with editable specification limits
     
     Args:
         data: DataFrame with all quality data
         product_filter: Optional product filter
         edit_mode: Boolean indicating if edit controls should be shown
+        method: Key of CAPABILITY_METHODS
     """
-    st.title("Process Capability Analysis")
-    
-    st.markdown("""
-    Process capability analysis measures how well your production process meets specifications.
-    It quantifies process performance with indices like Cp and Cpk to assess quality and consistency.
-    """)
-    
     # Available parameters for capability analysis
     numerical_columns = [col for col in data.columns if 
                          pd.api.types.is_numeric_dtype(data[col]) and 
@@ -300,13 +1036,11 @@ def display_capability_page(data, product_filter=None, edit_mode=False):
     
     col1, col2 = st.columns(2)
     
-    # Initialize session state for specs if not exists
-    if 'spec_limits' not in st.session_state:
-        st.session_state.spec_limits = {}
-    
-    # Get current values or initialize
-    current_lsl = st.session_state.spec_limits.get(parameter, {}).get('lsl')
-    current_usl = st.session_state.spec_limits.get(parameter, {}).get('usl')
+    # Current limits from the spec registry (a single filtered product gets its own)
+    spec_product = product_filter[0] if product_filter and len(product_filter) == 1 else None
+    current_specs = get_spec_registry().limits_for(parameter, spec_product)
+    current_lsl = current_specs['lsl']
+    current_usl = current_specs['usl']
     
     with col1:
         lsl = st.number_input("Lower Specification Limit (LSL)", 
@@ -322,40 +1056,52 @@ def display_capability_page(data, product_filter=None, edit_mode=False):
         if usl == 0.0:  # Streamlit doesn't support true None for number_input
             usl = None
     
-    # Apply specification defaults for common parameters
-    spec_defaults = {
-        "brix": {"lsl": 8.0, "usl": 9.5},
-        "head1_torque": {"lsl": 5.0, "usl": 12.0},
-        "head2_torque": {"lsl": 5.0, "usl": 12.0},
-        "head3_torque": {"lsl": 5.0, "usl": 12.0},
-        "head4_torque": {"lsl": 5.0, "usl": 12.0},
-        "head5_torque": {"lsl": 5.0, "usl": 12.0}
-    }
-    
-    if parameter in spec_defaults and (lsl is None or usl is None):
-        default_specs = spec_defaults[parameter]
-        if lsl is None:
-            lsl = default_specs["lsl"]
-            st.info(f"Using default LSL of {lsl} for {parameter}")
-        if usl is None:
-            usl = default_specs["usl"]
-            st.info(f"Using default USL of {usl} for {parameter}")
-    
-    # Save button for edit mode
+    # Save button for edit mode (a new version, effective from now)
     if edit_mode and (lsl != current_lsl or usl != current_usl):
+        st.caption(f"New limits apply to {spec_product or 'all products'} from now on; "
+                   "earlier checks keep the limits in force when they were made.")
         if st.button("Save Specification Limits"):
-            if parameter not in st.session_state.spec_limits:
-                st.session_state.spec_limits[parameter] = {}
-            st.session_state.spec_limits[parameter]['lsl'] = lsl
-            st.session_state.spec_limits[parameter]['usl'] = usl
-            st.success("Specification limits saved!")
+            if db.add_spec_limit(parameter, lsl, usl, product=spec_product,
+                                 username=st.session_state.get('username')):
+                st.success("Specification limits saved!")
     
     # Warn if no specification limits are set
     if lsl is None and usl is None:
         st.warning("No specification limits set. Cannot calculate Cp/Cpk without at least one limit.")
     
     # Display capability analysis
-    display_capability_analysis(data, parameter, lsl, usl)
+    display_capability_analysis(data, parameter, lsl, usl, method,
+                                ', '.join(product_filter) if product_filter else ALL_PRODUCTS)
+
+def display_capability_page(data, product_filter=None, edit_mode=False):
+    """
+    Display capability analysis page: one parameter in detail, or every product and parameter at once
+    
+    Args:
+        data: DataFrame with all quality data
+        product_filter: Optional product filter
+        edit_mode: Boolean indicating if edit controls should be shown
+    """
+    st.title("Process Capability Analysis")
+    
+    st.markdown("""
+    Process capability analysis measures how well your production process meets specifications.
+    It quantifies process performance with indices like Cp and Cpk to assess quality and consistency.
+    """)
+    
+    view = st.radio("View", ["Single Parameter", "Capability Matrix"], horizontal=True, key="capability_view",
+                    help="The matrix shows every product and parameter; select a row to open its chart")
+    
+    # Distribution used for the indices
+    method = st.radio("Distribution", list(CAPABILITY_METHODS), horizontal=True, key="capability_method",
+                      format_func=CAPABILITY_METHODS.get,
+                      help="Box-Cox and Johnson SU transform skewed data (e.g. torque) to normal first; "
+                           "Percentile uses the data's own 0.135% and 99.865% quantiles")
+    
+    if view == "Capability Matrix":
+        display_capability_matrix(data, method=method)
+    else:
+        display_single_parameter_capability(data, product_filter, edit_mode, method)
     
     # Guide for interpreting process capability
     with st.expander("How to Interpret Process Capability", expanded=False):
@@ -374,6 +1120,16 @@ def display_capability_page(data, product_filter=None, edit_mode=False):
         - Cpk = min[(USL - mean) / (3 × std), (mean - LSL) / (3 × std)]
         - Always less than or equal to Cp
         
+        #### Pp and Ppk (Process Performance)
+        - Same formulas, but with the overall standard deviation of all measurements
+        - Cp/Cpk use the within (short-term) sigma, estimated as MR̄ / d2 from consecutive measurements
+        - Ppk well below Cpk means the process shifts or drifts between measurements
+        
+        #### Non-normal Data
+        - The indices above assume normally distributed measurements; skewed data (e.g. torque) misstates them
+        - Box-Cox and Johnson SU fit a transform that makes the data normal and apply it to the specification limits too
+        - Percentile replaces ±3σ by the 0.135% and 99.865% quantiles of the data (Pp/Ppk only; needs many measurements)
+        
         #### Interpretation
         
         | Cpk Value | Interpretation | Action |
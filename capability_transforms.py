@@ -0,0 +1,112 @@
+import numpy as np
+from scipy import stats
+
+# Fraction of a normal distribution beyond 3 sigma on one side (0.135%)
+NORMAL_TAIL = stats.norm.sf(3)
+
+
+def fit_boxcox(values):
+    """
+    Maximum-likelihood Box-Cox fit
+
+    Data with zero or negative values is shifted so its minimum is 1.
+
+    Returns:
+        dict with method, lmbda and shift (JSON serialisable)
+    """
+    x = np.asarray(values, dtype=float)
+    shift = float(1.0 - x.min()) if x.min() <= 0 else 0.0
+    lmbda = stats.boxcox_normmax(x + shift, method='mle')
+    return {'method': 'boxcox', 'lmbda': float(lmbda), 'shift': shift}
+
+
+def fit_johnson(values):
+    """
+    Maximum-likelihood Johnson SU fit
+
+    SU is unbounded, so every specification limit has a transformed value
+    (a bounded SB fit would send limits outside its support to infinity).
+
+    Returns:
+        dict with method, a, b, loc and scale (JSON serialisable)
+    """
+    a, b, loc, scale = stats.johnsonsu.fit(np.asarray(values, dtype=float))
+    return {'method': 'johnson', 'a': float(a), 'b': float(b), 'loc': float(loc), 'scale': float(scale)}
+
+
+FITTERS = {'boxcox': fit_boxcox, 'johnson': fit_johnson}
+
+
+def apply_transform(values, params):
+    """
+    Transform values with fitted parameters
+
+    Both transforms are increasing, so specification limits can be
+    transformed the same way. Values outside the Box-Cox domain give NaN.
+    """
+    x = np.asarray(values, dtype=float)
+    if params['method'] == 'boxcox':
+        shifted = x + params['shift']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if abs(params['lmbda']) < 1e-12:
+                return np.where(shifted > 0, np.log(shifted), np.nan)
+            return np.where(shifted > 0, (shifted ** params['lmbda'] - 1) / params['lmbda'], np.nan)
+    # Johnson SU: z = a + b * asinh((x - loc) / scale) is standard normal
+    return params['a'] + params['b'] * np.arcsinh((x - params['loc']) / params['scale'])
+
+
+def fitted_pdf(x, params, mean=None, std=None):
+    """
+    Density of the fitted distribution on the original scale
+
+    Args:
+        x: Points to evaluate
+        params: Fitted parameters
+        mean, std: Mean and standard deviation of the transformed data
+                   (needed for Box-Cox, whose transformed data is N(mean, std))
+    """
+    x = np.asarray(x, dtype=float)
+    if params['method'] == 'boxcox':
+        shifted = x + params['shift']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            jacobian = np.where(shifted > 0, shifted ** (params['lmbda'] - 1), 0.0)
+        return np.nan_to_num(stats.norm.pdf(apply_transform(x, params), mean, std) * jacobian)
+    return stats.johnsonsu.pdf(x, params['a'], params['b'], params['loc'], params['scale'])
+
+
+def percentile_indices(values, lsl=None, usl=None):
+    """
+    Percentile (ISO 22514-2 quantile) performance indices
+
+    Pp = (USL - LSL) / (X99.865 - X0.135) and
+    Ppk = min((USL - median) / (X99.865 - median), (median - LSL) / (median - X0.135)),
+    using the empirical quantiles, so no distribution is assumed. The
+    extreme quantiles need a large sample to be stable.
+
+    Returns:
+        dict with pp and ppk (NaN when not computable)
+    """
+    x = np.asarray(values, dtype=float)
+    low, median, high = np.quantile(x, [NORMAL_TAIL, 0.5, 1 - NORMAL_TAIL])
+    lsl = np.nan if lsl is None else lsl
+    usl = np.nan if usl is None else usl
+    with np.errstate(divide='ignore', invalid='ignore'):
+        upper = (usl - median) / (high - median)
+        lower = (median - lsl) / (median - low)
+        both = (usl - lsl) / (high - low)
+    pp = upper if np.isnan(lsl) else lower if np.isnan(usl) else both
+    return {'pp': float(pp), 'ppk': float(np.fmin(upper, lower))}
+
+
+def normality_pvalue(values):
+    """
+    p-value of a normality test (Shapiro-Wilk up to 5000 points, D'Agostino beyond)
+
+    Small values (< 0.05) mean the normal-theory indices are unreliable.
+    """
+    x = np.asarray(values, dtype=float)
+    if len(x) < 8:
+        return np.nan
+    if len(x) <= 5000:
+        return float(stats.shapiro(x).pvalue)
+    return float(stats.normaltest(x).pvalue)
@@ -0,0 +1,160 @@
+import os
+
+import numpy as np
+import plotly.graph_objects as go
+
+# Series longer than this are downsampled before being sent to the browser
+MAX_CHART_POINTS = int(os.getenv('QA_CHART_MAX_POINTS', '2000'))
+
+# Traces with more points than this are drawn with WebGL instead of SVG
+WEBGL_THRESHOLD = int(os.getenv('QA_CHART_WEBGL_THRESHOLD', '1000'))
+
+
+def _as_float(x):
+    """Numeric view of an x axis (datetimes become int64 nanoseconds)"""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(float)
+    return x.astype(float)
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets selection
+
+    Keeps the first and last points and, from each of `threshold - 2` equal
+    buckets, the point forming the largest triangle with the previously
+    kept point and the next bucket's mean. The loop is per bucket, and the
+    work inside a bucket is vectorised.
+
+    Args:
+        x: 1-D x values (numeric or datetime64), ascending
+        y: 1-D y values without NaN
+        threshold: Number of points to keep
+
+    Returns:
+        Sorted integer index array
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    xf = _as_float(x)
+    yf = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, stop = edges[bucket], max(edges[bucket + 1], edges[bucket] + 1)
+        next_start = stop
+        next_stop = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_stop = max(next_stop, next_start + 1)
+        avg_x = xf[next_start:next_stop].mean()
+        avg_y = yf[next_start:next_stop].mean()
+
+        area = np.abs(
+            (xf[previous] - avg_x) * (yf[start:stop] - yf[previous])
+            - (xf[previous] - xf[start:stop]) * (avg_y - yf[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[bucket + 1] = previous
+    return np.unique(selected)
+
+
+def _bucket_ids(n, buckets):
+    return (np.arange(n) * buckets) // n
+
+
+def minmax_indices(y, buckets):
+    """
+    Indices of the minimum and maximum of each of `buckets` equal buckets
+
+    Args:
+        y: 1-D y values without NaN
+        buckets: Number of buckets
+
+    Returns:
+        Sorted integer index array (at most 2 * buckets entries)
+    """
+    n = len(y)
+    if 2 * buckets >= n:
+        return np.arange(n)
+
+    bucket = _bucket_ids(n, buckets)
+    order = np.lexsort((y, bucket))
+    starts = np.flatnonzero(np.r_[True, bucket[order][1:] != bucket[order][:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    return np.unique(np.concatenate([order[starts], order[ends]]))
+
+
+def minmax_envelope(x, y, buckets):
+    """
+    Per-bucket min/max band for a downsampled line
+
+    Returns:
+        (x_bucket, y_min, y_max): each bucket's first x with the bucket's
+        minimum and maximum y
+    """
+    n = len(y)
+    buckets = min(buckets, n)
+    starts = np.flatnonzero(np.r_[True, np.diff(_bucket_ids(n, buckets)) != 0])
+    y = np.asarray(y, dtype=float)
+    return np.asarray(x)[starts], np.minimum.reduceat(y, starts), np.maximum.reduceat(y, starts)
+
+
+def downsample_indices(x, y, max_points=MAX_CHART_POINTS, keep=None, method='lttb'):
+    """
+    Choose which points of a series to draw
+
+    Args:
+        x: 1-D x values, ascending
+        y: 1-D y values (NaN values are skipped)
+        max_points: Point budget; shorter series are returned unchanged
+        keep: Optional boolean mask of points that must always be drawn
+              (e.g. out-of-control points)
+        method: 'lttb' or 'minmax'
+
+    Returns:
+        Sorted integer index array into the original series
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= max_points:
+        return np.arange(n)
+
+    valid = np.flatnonzero(~np.isnan(y))
+    if method == 'minmax':
+        chosen = valid[minmax_indices(y[valid], max(1, max_points // 2))]
+    else:
+        chosen = valid[lttb_indices(np.asarray(x)[valid], y[valid], max_points)]
+
+    if keep is not None:
+        chosen = np.union1d(chosen, np.flatnonzero(keep))
+    return chosen
+
+
+def scatter_class(n_points):
+    """go.Scattergl for long traces, go.Scatter otherwise"""
+    return go.Scattergl if n_points > WEBGL_THRESHOLD else go.Scatter
+
+
+def add_envelope(fig, x, y, buckets=MAX_CHART_POINTS // 4, name='Min/Max Range', color='rgba(0,0,255,0.12)'):
+    """
+    Add a shaded min/max band behind a downsampled series
+
+    Only added when the series is longer than the point budget, so every
+    extreme stays visible even if LTTB skipped it.
+    """
+    y = np.asarray(y, dtype=float)
+    valid = ~np.isnan(y)
+    if valid.sum() <= MAX_CHART_POINTS:
+        return fig
+    x_bucket, y_min, y_max = minmax_envelope(np.asarray(x)[valid], y[valid], buckets)
+    trace = scatter_class(2 * len(x_bucket))
+    fig.add_trace(trace(x=x_bucket, y=y_max, mode='lines', line=dict(width=0),
+                        showlegend=False, hoverinfo='skip'))
+    fig.add_trace(trace(x=x_bucket, y=y_min, mode='lines', line=dict(width=0), fill='tonexty',
+                        fillcolor=color, name=name, hoverinfo='skip'))
+    return fig
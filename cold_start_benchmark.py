@@ -0,0 +1,105 @@
+"""
+Cold-start benchmark for the Streamlit app.
+
+Each run uses a fresh interpreter so nothing is already imported or cached:
+  - server_ready_s: `streamlit run app.py` launch until /_stcore/health answers
+  - first_paint_s: executing app.py until show_auth_page has rendered its title
+
+Usage:
+    python cold_start_benchmark.py [--runs 3] [--port 8599]
+
+Medians of 3 runs against a local PostgreSQL over a Unix socket:
+
+    tree                                   server_ready_s  first_paint_s
+    before lazy database (e69954b^)                  1.77           6.06
+    lazy database (e69954b)                          1.86           6.32
+    with lazy page imports (9f69609)                 1.81           2.68
+
+With a local database, connecting is cheap. The lazy database alone is
+within noise there; its saving is the connection latency to a remote
+server. Most of the first-paint gain comes from deferring the page imports.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+APP_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.py')
+AUTH_TITLE = "Beverage QA Tracker Authentication"
+
+_FIRST_PAINT_SNIPPET = f"""
+import json, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({APP_FILE!r}, default_timeout=300)
+at.run()
+elapsed = time.perf_counter() - start
+painted = any(t.value == {AUTH_TITLE!r} for t in at.title)
+print(json.dumps({{"first_paint_s": elapsed, "painted": painted}}))
+"""
+
+
+def measure_first_paint():
+    """Run app.py once in a new interpreter and time it to the auth page"""
+    result = subprocess.run(
+        [sys.executable, '-c', _FIRST_PAINT_SNIPPET],
+        capture_output=True, text=True, cwd=os.path.dirname(APP_FILE)
+    )
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith('{'):
+            return json.loads(line)
+    raise RuntimeError(f"First paint run failed:\n{result.stderr[-2000:]}")
+
+
+def measure_server_ready(port, timeout=120):
+    """Time `streamlit run app.py` until the health endpoint responds"""
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', APP_FILE,
+         '--server.headless', 'true', '--server.port', str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        cwd=os.path.dirname(APP_FILE)
+    )
+    try:
+        url = f"http://localhost:{port}/_stcore/health"
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.05)
+        raise TimeoutError(f"Server not ready after {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--port', type=int, default=8599)
+    args = parser.parse_args()
+
+    ready, paint = [], []
+    for run in range(1, args.runs + 1):
+        ready.append(measure_server_ready(args.port))
+        result = measure_first_paint()
+        if not result['painted']:
+            print(f"run {run}: auth page title not rendered", file=sys.stderr)
+        paint.append(result['first_paint_s'])
+        print(f"run {run}: server_ready={ready[-1]:.2f}s first_paint={paint[-1]:.2f}s")
+
+    print(json.dumps({
+        'runs': args.runs,
+        'server_ready_median_s': statistics.median(ready),
+        'first_paint_median_s': statistics.median(paint),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
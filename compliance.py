@@ -6,13 +6,28 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import io
 import base64
-from database import BeverageQADatabase  # Updated import
-from capability import calculate_process_capability
+from database import LazyDatabase  # Updated import
+from capability import calculate_nonnormal_capability
 from spc import calculate_control_limits
+from spec_limits import get_spec_registry
 from utils import format_timestamp
 
-# Initialize database connection
-db = BeverageQADatabase()
+# Database connection (connects on first use)
+db = LazyDatabase()
+
+def out_of_spec_measurements(data, source=None):
+    """
+    Number of out-of-spec measurements, from the flags stored with each check
+    
+    Args:
+        data: DataFrame from get_check_data
+        source: Only count checks from this table (e.g. 'torque_tamper')
+    """
+    if 'out_of_spec' not in data.columns:
+        return 0
+    if source is not None and 'source' in data.columns:
+        data = data[data['source'] == source]
+    return int(pd.to_numeric(data['out_of_spec'], errors='coerce').fillna(0).sum())
 
 def generate_compliance_report(start_date, end_date, product_filter=None, report_type="GMP", facility_name=None, report_number=None):
     """
@@ -81,10 +96,8 @@ def generate_compliance_report(start_date, end_date, product_filter=None, report
     # Check for out-of-spec measurements
     out_of_spec_count = 0
     
-    # Check torque values (should be between 5-12)
-    for head in ['head1_torque', 'head2_torque', 'head3_torque', 'head4_torque', 'head5_torque']:
-        if head in data.columns:
-            out_of_spec_count += ((data[head] < 5) | (data[head] > 12)).sum()
+    # Measurements outside their specification limits (flagged when the checks were saved)
+    out_of_spec_count += out_of_spec_measurements(data)
     
     # Check tamper evidence
     if 'tamper_evidence' in data.columns:
@@ -171,16 +184,11 @@ def display_non_compliance_report(data):
     # Identify non-compliant checks
     non_compliant = pd.DataFrame()
     
-    # Check for torque issues
-    if 'source' in data.columns and 'torque_tamper' in data['source'].values:
-        torque_data = data[data['source'] == 'torque_tamper']
-        for head in ['head1_torque', 'head2_torque', 'head3_torque', 'head4_torque', 'head5_torque']:
-            if head in torque_data.columns:
-                out_of_spec = torque_data[
-                    (torque_data[head] < 5) | (torque_data[head] > 12)
-                ]
-                if not out_of_spec.empty:
-                    non_compliant = pd.concat([non_compliant, out_of_spec])
+    # Check for measurements outside their specification limits (torque, BRIX, ...)
+    if 'out_of_spec' in data.columns:
+        out_of_spec = data[pd.to_numeric(data['out_of_spec'], errors='coerce') > 0]
+        if not out_of_spec.empty:
+            non_compliant = pd.concat([non_compliant, out_of_spec])
     
     # Check for tamper evidence issues
     if 'tamper_evidence' in data.columns:
@@ -260,14 +268,15 @@ def create_process_capability_section(data):
     Returns:
         Plotly figure object with capability summaries
     """
-    # Parameters to check capability
+    # Parameters to check capability (current limits from the spec registry)
+    registry = get_spec_registry()
     capability_params = {
-        'brix': {'lsl': 8.0, 'usl': 9.5, 'title': 'BRIX'},
-        'head1_torque': {'lsl': 5.0, 'usl': 12.0, 'title': 'Torque Head 1'},
-        'head2_torque': {'lsl': 5.0, 'usl': 12.0, 'title': 'Torque Head 2'},
-        'head3_torque': {'lsl': 5.0, 'usl': 12.0, 'title': 'Torque Head 3'},
-        'head4_torque': {'lsl': 5.0, 'usl': 12.0, 'title': 'Torque Head 4'},
-        'head5_torque': {'lsl': 5.0, 'usl': 12.0, 'title': 'Torque Head 5'}
+        'brix': dict(registry.limits_for('brix'), title='BRIX'),
+        'head1_torque': dict(registry.limits_for('head1_torque'), title='Torque Head 1'),
+        'head2_torque': dict(registry.limits_for('head2_torque'), title='Torque Head 2'),
+        'head3_torque': dict(registry.limits_for('head3_torque'), title='Torque Head 3'),
+        'head4_torque': dict(registry.limits_for('head4_torque'), title='Torque Head 4'),
+        'head5_torque': dict(registry.limits_for('head5_torque'), title='Torque Head 5')
     }
     
     # Create subplots for capability summary
@@ -283,12 +292,13 @@ def create_process_capability_section(data):
     
     for param, specs in capability_params.items():
         if param in data.columns and data[param].notna().sum() >= 10:
-            # Calculate capability
-            cap = calculate_process_capability(
+            # Calculate capability (transformed when the data is not normal)
+            cap = calculate_nonnormal_capability(
                 data, 
                 param, 
                 specs['lsl'], 
-                specs['usl']
+                specs['usl'],
+                method='auto'
             )
             
             capability_results[param] = cap
@@ -594,11 +604,7 @@ def generate_gmp_report_doc(report_data):
     quality_issues = []
     
     # Torque issues
-    torque_cols = ['head1_torque', 'head2_torque', 'head3_torque', 'head4_torque', 'head5_torque']
-    torque_issues = 0
-    for col in torque_cols:
-        if col in data.columns:
-            torque_issues += ((data[col] < 5) | (data[col] > 12)).sum()
+    torque_issues = out_of_spec_measurements(data, 'torque_tamper')
     
     if torque_issues > 0:
         impact = "High" if torque_issues > metrics["total_checks"] * 0.1 else "Medium"
@@ -1,5 +1,4 @@
 import logging
-from logging.handlers import RotatingFileHandler
 import os
 import time
 import pandas as pd
@@ -9,20 +8,20 @@ from sqlalchemy.pool import NullPool
 from dotenv import load_dotenv
 from datetime import datetime
 import json
-
-# Set up logging configuration
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        RotatingFileHandler(
-            'database_operations.log', 
-            maxBytes=1024*1024,  # 1MB
-            backupCount=5
-        ),
-        logging.StreamHandler()
-    ]
+from logging_config import configure_logging
+from db_pool import (
+    TimedQueuePool, PoolKeepalive, POOL_SIZE, POOL_RECYCLE, CONNECT_ARGS
+)
+from spc_stats import (
+    TRACKED_PARAMETERS, ALL_PRODUCTS, STATS_COLUMNS, D2_MR, RunningStats, merge_stats_frame
 )
+from spec_limits import (
+    ANY_PRODUCT, DEFAULT_EFFECTIVE_FROM, DEFAULT_SPEC_LIMITS, SPEC_COLUMNS, SpecRegistry,
+    get_spec_registry, reload_spec_registry
+)
+
+# Set up logging configuration (non-blocking, written by a background thread)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Load environment variables
@@ -37,14 +36,63 @@ import psycopg2
 from psycopg2.extras import RealDictCursor
 from sqlalchemy import create_engine, text
 import streamlit as st
+import threading
 
 logger = logging.getLogger(__name__)
 
+# Tables the application cannot run without
+REQUIRED_TABLES = ['users', 'torque_tamper', 'net_content', 'quality_check']
+
+# How long (seconds) a health probe result is reused before querying again
+HEALTH_CHECK_TTL = float(os.getenv('QA_HEALTH_CHECK_TTL', '30'))
+
+# Health probe results shared by every caller, keyed by database URL
+_health_cache = {}
+_health_lock = threading.Lock()
+
+# Fitted capability transforms kept per product/parameter/method, one per data version
+CAPABILITY_TRANSFORM_VERSIONS = int(os.getenv('QA_CAPABILITY_TRANSFORM_VERSIONS', '20'))
+
+# Check tables whose measurements get out-of-spec flags when saved
+FLAGGED_TABLES = ['torque_tamper', 'net_content', 'quality_check']
+
+# NOTIFY channel signalled when a check is saved (wakes anomaly_worker.py)
+NEW_CHECK_CHANNEL = 'qa_new_check'
+
+# Merge one stored accumulator (EXCLUDED) into another (parallel Welford).
+# Works for a single new value (count 1, m2 0) and for whole pre-aggregated buckets.
+_RUNNING_STATS_UPSERT = '''
+INSERT INTO spc_running_stats AS s (
+    product, parameter, bucket, count, mean, m2, mr_count, mr_sum,
+    min_value, max_value, first_value, last_value, first_ts, last_ts
+) VALUES (
+    :product, :parameter, :bucket, :count, :mean, :m2, :mr_count, :mr_sum,
+    :min_value, :max_value, :first_value, :last_value, :first_ts, :last_ts
+)
+ON CONFLICT (product, parameter, bucket) DO UPDATE SET
+    count = s.count + EXCLUDED.count,
+    mean = s.mean + (EXCLUDED.mean - s.mean) * EXCLUDED.count / (s.count + EXCLUDED.count),
+    m2 = s.m2 + EXCLUDED.m2
+        + (EXCLUDED.mean - s.mean) ^ 2 * s.count * EXCLUDED.count / (s.count + EXCLUDED.count),
+    mr_count = s.mr_count + EXCLUDED.mr_count
+        + CASE WHEN EXCLUDED.first_ts >= s.last_ts THEN 1 ELSE 0 END,
+    mr_sum = s.mr_sum + EXCLUDED.mr_sum
+        + CASE WHEN EXCLUDED.first_ts >= s.last_ts THEN ABS(EXCLUDED.first_value - s.last_value) ELSE 0 END,
+    min_value = LEAST(s.min_value, EXCLUDED.min_value),
+    max_value = GREATEST(s.max_value, EXCLUDED.max_value),
+    first_value = CASE WHEN EXCLUDED.first_ts < s.first_ts THEN EXCLUDED.first_value ELSE s.first_value END,
+    first_ts = LEAST(s.first_ts, EXCLUDED.first_ts),
+    last_value = CASE WHEN EXCLUDED.last_ts >= s.last_ts THEN EXCLUDED.last_value ELSE s.last_value END,
+    last_ts = GREATEST(s.last_ts, EXCLUDED.last_ts),
+    updated_at = NOW()
+'''
+
 class BeverageQADatabase:
     def __init__(self):
         self.DATABASE_URL = os.getenv('DATABASE_URL')
         self.connection = None  # Initialize psycopg2 connection attribute
         self._engine = None     # SQLAlchemy engine
+        self._keepalive = None  # Background pool prewarm/keepalive thread
         
         if not self.DATABASE_URL:
             logger.critical("DATABASE_URL environment variable not set")
@@ -106,15 +154,11 @@ class BeverageQADatabase:
             try:
                 logger.info(f"Database initialization attempt {attempt}/{max_attempts}")
                 
-                # Test basic connection first
-                if not self.test_connection():
-                    raise ConnectionError("Initial connection test failed")
-                    
-                # Initialize schema
+                # Initialize schema (this also proves the connection works)
                 self.initialize_database()
                 
-                # Final verification
-                if not self.test_connection():
+                # Final verification - refreshes the shared health probe
+                if not self.health_check(max_age=0)['ok']:
                     raise ConnectionError("Post-initialization test failed")
                     
                 logger.info("Database initialization successful")
@@ -134,18 +178,41 @@ class BeverageQADatabase:
             try: 
                 self._engine = create_engine(
                     self.DATABASE_URL,
-                    pool_size=5,           # Number of permanent connections
-                    max_overflow=10,       # Additional connections when needed
-                    pool_timeout=30,       # Wait 30 seconds for connection
-                    pool_pre_ping=True,    # Test connections before use
-                    pool_recycle=300       # Recycle connections after 5 minutes
+                    poolclass=TimedQueuePool,    # Records checkout latency
+                    pool_size=POOL_SIZE,         # Number of permanent connections
+                    max_overflow=10,             # Additional connections when needed
+                    pool_timeout=30,             # Wait 30 seconds for connection
+                    pool_pre_ping=True,          # Verify connections before use
+                    pool_recycle=POOL_RECYCLE,   # Recycle age, see db_pool.POOL_RECYCLE
+                    connect_args=CONNECT_ARGS
                 )
+                self._keepalive = PoolKeepalive(self._engine).start()
                 logger.info("Database engine created successfully")
             except Exception as e:
                 logger.critical(f"Failed to create database engine: {str(e)}")
                 raise
         return self._engine
 
+    def get_pool_stats(self):
+        """
+        Connection pool status and checkout latency
+        
+        Returns:
+            dict with pool counters and checkout latency summary (ms)
+        """
+        if not self._engine:
+            return {}
+        pool = self._engine.pool
+        stats = {
+            'size': pool.size(),
+            'idle': pool.checkedin(),
+            'in_use': pool.checkedout(),
+            'overflow': pool.overflow()
+        }
+        if isinstance(pool, TimedQueuePool):
+            stats.update(pool.metrics.snapshot())
+        return stats
+
     def initialize_database(self):
         """Initialize all database tables if they don't exist"""
         logger.info("Initializing database tables")
@@ -265,6 +332,135 @@ class BeverageQADatabase:
                 )
                 '''))
                 
+                # Running SPC statistics per product, parameter and day (see spc_stats)
+                conn.execute(text('''
+                CREATE TABLE IF NOT EXISTS spc_running_stats (
+                    product TEXT NOT NULL DEFAULT '',
+                    parameter TEXT NOT NULL,
+                    bucket DATE NOT NULL,
+                    count INTEGER NOT NULL,
+                    mean DOUBLE PRECISION NOT NULL,
+                    m2 DOUBLE PRECISION NOT NULL,
+                    mr_count INTEGER NOT NULL,
+                    mr_sum DOUBLE PRECISION NOT NULL,
+                    min_value DOUBLE PRECISION,
+                    max_value DOUBLE PRECISION,
+                    first_value DOUBLE PRECISION,
+                    last_value DOUBLE PRECISION,
+                    first_ts TIMESTAMP,
+                    last_ts TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT NOW(),
+                    PRIMARY KEY (product, parameter, bucket)
+                )
+                '''))
+                
+                # Frozen (Phase I) control limits, one row per version
+                conn.execute(text('''
+                CREATE TABLE IF NOT EXISTS spc_control_limits (
+                    id SERIAL PRIMARY KEY,
+                    product TEXT NOT NULL,
+                    parameter TEXT NOT NULL,
+                    version INTEGER NOT NULL,
+                    n INTEGER NOT NULL,
+                    cl DOUBLE PRECISION NOT NULL,
+                    ucl DOUBLE PRECISION NOT NULL,
+                    lcl DOUBLE PRECISION NOT NULL,
+                    sigma DOUBLE PRECISION NOT NULL,
+                    mr_bar DOUBLE PRECISION,
+                    mr_ucl DOUBLE PRECISION,
+                    baseline_start DATE NOT NULL,
+                    baseline_end DATE NOT NULL,
+                    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+                    notes TEXT,
+                    created_by TEXT REFERENCES users(username),
+                    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                    UNIQUE (product, parameter, version)
+                )
+                '''))
+                
+                # Results of the headless SPC batch job (spc_batch.py), read by the SPC page
+                conn.execute(text('''
+                CREATE TABLE IF NOT EXISTS spc_batch_runs (
+                    id SERIAL PRIMARY KEY,
+                    period TEXT NOT NULL,
+                    start_date DATE NOT NULL,
+                    end_date DATE NOT NULL,
+                    phase TEXT NOT NULL,
+                    group_count INTEGER NOT NULL,
+                    violation_count INTEGER NOT NULL,
+                    started_at TIMESTAMP NOT NULL,
+                    finished_at TIMESTAMP NOT NULL DEFAULT NOW()
+                )
+                '''))
+                
+                conn.execute(text('''
+                CREATE TABLE IF NOT EXISTS spc_batch_limits (
+                    run_id INTEGER NOT NULL REFERENCES spc_batch_runs(id) ON DELETE CASCADE,
+                    product TEXT NOT NULL,
+                    parameter TEXT NOT NULL,
+                    n INTEGER NOT NULL,
+                    cl DOUBLE PRECISION,
+                    ucl DOUBLE PRECISION,
+                    lcl DOUBLE PRECISION,
+                    sigma DOUBLE PRECISION,
+                    mean DOUBLE PRECISION,
+                    std DOUBLE PRECISION,
+                    min_value DOUBLE PRECISION,
+                    max_value DOUBLE PRECISION,
+                    mr_bar DOUBLE PRECISION,
+                    mr_ucl DOUBLE PRECISION,
+                    phase TEXT NOT NULL,
+                    version INTEGER,
+                    PRIMARY KEY (run_id, product, parameter)
+                )
+                '''))
+                
+                conn.execute(text('''
+                CREATE TABLE IF NOT EXISTS spc_batch_violations (
+                    id SERIAL PRIMARY KEY,
+                    run_id INTEGER NOT NULL REFERENCES spc_batch_runs(id) ON DELETE CASCADE,
+                    product TEXT NOT NULL,
+                    parameter TEXT NOT NULL,
+                    timestamp TIMESTAMP NOT NULL,
+                    value DOUBLE PRECISION NOT NULL,
+                    chart TEXT NOT NULL,
+                    rule INTEGER NOT NULL,
+                    description TEXT NOT NULL
+                )
+                '''))
+                conn.execute(text(
+                    "CREATE INDEX IF NOT EXISTS idx_spc_batch_violations_run ON spc_batch_violations (run_id)"
+                ))
+                
+                # Fitted non-normal capability transforms, one row per data version so
+                # switching between date ranges reuses earlier fits
+                conn.execute(text('''
+                CREATE TABLE IF NOT EXISTS capability_transforms (
+                    product TEXT NOT NULL,
+                    parameter TEXT NOT NULL,
+                    method TEXT NOT NULL,
+                    data_version TEXT NOT NULL,
+                    params JSONB NOT NULL,
+                    fitted_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                    PRIMARY KEY (product, parameter, method, data_version)
+                )
+                '''))
+                # Tables created before data_version was part of the key kept one fit per group
+                keyed_on_version = conn.execute(text('''
+                SELECT EXISTS (
+                    SELECT 1 FROM information_schema.key_column_usage
+                    WHERE table_name = 'capability_transforms'
+                      AND constraint_name = 'capability_transforms_pkey'
+                      AND column_name = 'data_version'
+                )
+                ''')).scalar()
+                if not keyed_on_version:
+                    conn.execute(text('''
+                    ALTER TABLE capability_transforms
+                        DROP CONSTRAINT capability_transforms_pkey,
+                        ADD PRIMARY KEY (product, parameter, method, data_version)
+                    '''))
+                
                 # Create capability data table
                 conn.execute(text('''
                 CREATE TABLE IF NOT EXISTS capability_data (
@@ -309,6 +505,57 @@ class BeverageQADatabase:
                 )
                 '''))
                 
+                # Versioned specification limits (see spec_limits.SpecRegistry)
+                conn.execute(text('''
+                CREATE TABLE IF NOT EXISTS spec_limits (
+                    id SERIAL PRIMARY KEY,
+                    product TEXT NOT NULL DEFAULT '',
+                    parameter TEXT NOT NULL,
+                    lsl DOUBLE PRECISION,
+                    usl DOUBLE PRECISION,
+                    effective_from TIMESTAMP NOT NULL,
+                    notes TEXT,
+                    created_by TEXT,
+                    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+                    UNIQUE (product, parameter, effective_from)
+                )
+                '''))
+                conn.execute(text('''
+                INSERT INTO spec_limits (product, parameter, lsl, usl, effective_from, notes)
+                VALUES (:product, :parameter, :lsl, :usl, :effective_from, 'Initial limits')
+                ON CONFLICT (product, parameter, effective_from) DO NOTHING
+                '''), [{'product': ANY_PRODUCT, 'parameter': parameter, 'lsl': specs['lsl'], 'usl': specs['usl'],
+                       'effective_from': DEFAULT_EFFECTIVE_FROM.to_pydatetime()}
+                      for parameter, specs in DEFAULT_SPEC_LIMITS.items()])
+                
+                # Out-of-spec measurements per check, set when the check is saved. ALTER
+                # TABLE locks the table exclusively even when the column exists, so
+                # only alter tables that still lack the columns.
+                flagged = conn.execute(text('''
+                SELECT table_name FROM information_schema.columns
+                WHERE table_name = ANY(:tables) AND column_name = 'out_of_spec_parameters'
+                '''), {'tables': FLAGGED_TABLES}).scalars().all()
+                for table in set(FLAGGED_TABLES) - set(flagged):
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS out_of_spec INTEGER"))
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS out_of_spec_parameters TEXT"))
+                
+                # When each check was saved, so incremental anomaly detection also
+                # examines checks entered late or back-dated. Existing checks take
+                # their measurement time.
+                stamped = conn.execute(text('''
+                SELECT table_name FROM information_schema.columns
+                WHERE table_name = ANY(:tables) AND column_name = 'created_at'
+                '''), {'tables': FLAGGED_TABLES}).scalars().all()
+                for table in set(FLAGGED_TABLES) - set(stamped):
+                    conn.execute(text(f"ALTER TABLE {table} ADD COLUMN created_at TIMESTAMP"))
+                    conn.execute(text(f"UPDATE {table} SET created_at = timestamp"))
+                    conn.execute(text(f'''
+                    ALTER TABLE {table}
+                        ALTER COLUMN created_at SET DEFAULT LOCALTIMESTAMP,
+                        ALTER COLUMN created_at SET NOT NULL
+                    '''))
+                    conn.execute(text(f"CREATE INDEX IF NOT EXISTS idx_{table}_created_at ON {table} (created_at)"))
+                
                 conn.commit()
                 logger.info("Database initialization completed successfully")
             except Exception as e:
@@ -316,6 +563,12 @@ class BeverageQADatabase:
                 conn.rollback()
                 st.error(f"Error initializing database: {e}")
                 raise
+        
+        # Flag checks saved before out-of-spec flags existed
+        try:
+            self.refresh_out_of_spec_flags(only_missing=True)
+        except Exception as e:
+            logger.warning(f"Could not backfill out-of-spec flags: {str(e)}")
 
     def execute_query(self, query, params=None):
         """Execute a SQL query and return results as DataFrame using psycopg2"""
@@ -328,6 +581,8 @@ class BeverageQADatabase:
                 if cursor.description:  # If it's a SELECT query
                     columns = [col[0] for col in cursor.description]
                     data = cursor.fetchall()
+                    # End the read transaction so its table locks don't block other sessions' DDL
+                    self.connection.commit()
                     return pd.DataFrame(data, columns=columns)
                 self.connection.commit()
                 return pd.DataFrame({'status': ['success']})  # For non-SELECT queries
@@ -338,6 +593,564 @@ class BeverageQADatabase:
             st.error(f"Database query failed: {str(e)}")
             return pd.DataFrame()
 
+    # Running SPC statistics
+    def _update_running_stats(self, conn, table, data):
+        """
+        Fold a saved check's measurements into spc_running_stats
+        
+        Runs on the caller's connection so the statistics commit (or roll
+        back) together with the check itself.
+        """
+        timestamp = pd.Timestamp(data['timestamp']).to_pydatetime()
+        rows = []
+        for parameter in TRACKED_PARAMETERS.get(table, []):
+            value = data.get(parameter)
+            if value is None or pd.isna(value):
+                continue
+            value = float(value)
+            rows.append({
+                'product': data.get('product') or '',
+                'parameter': parameter,
+                'bucket': timestamp.date(),
+                'count': 1, 'mean': value, 'm2': 0.0, 'mr_count': 0, 'mr_sum': 0.0,
+                'min_value': value, 'max_value': value,
+                'first_value': value, 'last_value': value,
+                'first_ts': timestamp, 'last_ts': timestamp,
+            })
+        if rows:
+            conn.execute(text(_RUNNING_STATS_UPSERT), rows)
+    
+    def _notify_new_check(self, conn, table):
+        """Signal NEW_CHECK_CHANNEL; listeners receive it when the caller commits"""
+        conn.execute(text("SELECT pg_notify(:channel, :table)"), {'channel': NEW_CHECK_CHANNEL, 'table': table})
+    
+    def get_running_stats(self, parameter, product=None, start_date=None, end_date=None):
+        """
+        Merge stored accumulators for a parameter without reading raw checks
+        
+        Args:
+            parameter: Parameter name (e.g. 'head1_torque', 'brix')
+            product: Product name; None or ALL_PRODUCTS pools every product
+            start_date: Optional first day of the window (inclusive)
+            end_date: Optional last day of the window (inclusive)
+            
+        Returns:
+            RunningStats for the window (day granularity)
+        """
+        query = f"SELECT product, {', '.join(STATS_COLUMNS)} FROM spc_running_stats WHERE parameter = :parameter"
+        params = {'parameter': parameter}
+        if product and product != ALL_PRODUCTS:
+            query += " AND product = :product"
+            params['product'] = product
+        if start_date is not None:
+            query += " AND bucket >= :start_date"
+            params['start_date'] = pd.Timestamp(start_date).date()
+        if end_date is not None:
+            query += " AND bucket <= :end_date"
+            params['end_date'] = pd.Timestamp(end_date).date()
+        
+        try:
+            with self.get_engine().connect() as conn:
+                frame = pd.read_sql(text(query), conn, params=params)
+        except Exception as e:
+            logger.error(f"Failed to read running stats for {parameter}: {str(e)}")
+            return RunningStats()
+        return merge_stats_frame(frame)
+    
+    def get_control_limits(self, parameter, product=None, start_date=None, end_date=None, n_sigma=3):
+        """
+        Control limits for any day window from the running statistics
+        
+        Returns:
+            dict in the form of spc.calculate_control_limits (plus n and MR figures)
+        """
+        stats = self.get_running_stats(parameter, product, start_date, end_date)
+        return stats.control_limits(n_sigma)
+    
+    def rebuild_running_stats(self):
+        """
+        Recompute spc_running_stats from every stored check
+        
+        Needed once for checks saved before the table existed, or after
+        editing historical rows.
+        
+        Returns:
+            Number of (product, parameter, day) rows written
+        """
+        from spc_stats import summarise_series
+        
+        data = self.get_check_data("1900-01-01", "2100-01-01")
+        frames = []
+        for table, parameters in TRACKED_PARAMETERS.items():
+            if data.empty:
+                break
+            rows = data[data['source'] == table]
+            for parameter in parameters:
+                if parameter not in rows.columns:
+                    continue
+                frames.append(pd.DataFrame({
+                    'timestamp': rows['timestamp'],
+                    'product': rows['product'] if 'product' in rows.columns else '',
+                    'parameter': parameter,
+                    'value': pd.to_numeric(rows[parameter], errors='coerce'),
+                }))
+        summary = summarise_series(pd.concat(frames, ignore_index=True)) if frames else pd.DataFrame()
+        
+        records = []
+        for row in summary.to_dict('records'):
+            row['first_ts'] = pd.Timestamp(row['first_ts']).to_pydatetime()
+            row['last_ts'] = pd.Timestamp(row['last_ts']).to_pydatetime()
+            records.append({key: (value.item() if hasattr(value, 'item') else value)
+                            for key, value in row.items()})
+        
+        with self.get_engine().connect() as conn:
+            try:
+                conn.execute(text("DELETE FROM spc_running_stats"))
+                if records:
+                    conn.execute(text(_RUNNING_STATS_UPSERT), records)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Rebuilding running stats failed: {str(e)}")
+                raise
+        logger.info(f"Rebuilt running stats: {len(records)} rows")
+        return len(records)
+    
+    # Phase I / Phase II control limits
+    def freeze_control_limits(self, limits, baseline_start, baseline_end, username, notes=None):
+        """
+        Store Phase I limits as a new version per (product, parameter)
+        
+        The previous version of each group stays in the table as history
+        but is no longer active.
+        
+        Args:
+            limits: DataFrame indexed by (product, parameter) as returned by
+                    spc.calculate_control_limits_batch
+            baseline_start: First day of the baseline period
+            baseline_end: Last day of the baseline period
+            username: User establishing the limits
+            notes: Optional reason for the new version
+            
+        Returns:
+            Number of groups frozen
+        """
+        limits = limits.dropna(subset=['CL', 'UCL', 'LCL', 'sigma'])
+        if limits.empty:
+            return 0
+        
+        records = [{
+            'product': product,
+            'parameter': parameter,
+            'n': int(row['n']),
+            'cl': float(row['CL']),
+            'ucl': float(row['UCL']),
+            'lcl': float(row['LCL']),
+            'sigma': float(row['sigma']),
+            'mr_bar': None if pd.isna(row.get('MR_bar')) else float(row['MR_bar']),
+            'mr_ucl': None if pd.isna(row.get('MR_UCL')) else float(row['MR_UCL']),
+            'baseline_start': pd.Timestamp(baseline_start).date(),
+            'baseline_end': pd.Timestamp(baseline_end).date(),
+            'notes': notes,
+            'created_by': username,
+        } for (product, parameter), row in limits.iterrows()]
+        
+        with self.get_engine().connect() as conn:
+            try:
+                conn.execute(text('''
+                UPDATE spc_control_limits SET is_active = FALSE
+                WHERE is_active AND product = :product AND parameter = :parameter
+                '''), records)
+                conn.execute(text('''
+                INSERT INTO spc_control_limits (
+                    product, parameter, version, n, cl, ucl, lcl, sigma, mr_bar, mr_ucl,
+                    baseline_start, baseline_end, notes, created_by
+                ) VALUES (
+                    :product, :parameter,
+                    (SELECT COALESCE(MAX(version), 0) + 1 FROM spc_control_limits
+                     WHERE product = :product AND parameter = :parameter),
+                    :n, :cl, :ucl, :lcl, :sigma, :mr_bar, :mr_ucl,
+                    :baseline_start, :baseline_end, :notes, :created_by
+                )
+                '''), records)
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Freezing control limits failed: {str(e)}")
+                st.error(f"Error saving control limits: {e}")
+                return 0
+        
+        logger.info(f"Froze control limits for {len(records)} groups ({baseline_start} - {baseline_end})")
+        return len(records)
+    
+    def get_active_control_limits(self):
+        """
+        Get the active frozen limits for every (product, parameter)
+        
+        Returns:
+            DataFrame indexed by (product, parameter) with the columns of
+            spc.calculate_control_limits_batch plus version and baseline dates
+        """
+        columns = ['product', 'parameter', 'n', 'CL', 'UCL', 'LCL', 'sigma', 'MR_bar', 'MR_UCL',
+                   'version', 'baseline_start', 'baseline_end', 'created_by', 'created_at']
+        limits = self.execute_query('''
+        SELECT product, parameter, n, cl, ucl, lcl, sigma, mr_bar, mr_ucl,
+               version, baseline_start, baseline_end, created_by, created_at
+        FROM spc_control_limits
+        WHERE is_active
+        ''')
+        if limits.empty:
+            return pd.DataFrame(columns=columns).set_index(['product', 'parameter'])
+        limits.columns = columns
+        return limits.set_index(['product', 'parameter']).sort_index()
+    
+    def get_control_limit_history(self, product=None, parameter=None):
+        """Get every stored limits version, newest first, optionally for one group"""
+        query = '''
+        SELECT product, parameter, version, is_active, n, cl, ucl, lcl, sigma, mr_bar, mr_ucl,
+               baseline_start, baseline_end, notes, created_by, created_at
+        FROM spc_control_limits
+        WHERE (%s IS NULL OR product = %s) AND (%s IS NULL OR parameter = %s)
+        ORDER BY product, parameter, version DESC
+        '''
+        return self.execute_query(query, (product, product, parameter, parameter))
+    
+    # Precomputed SPC results (spc_batch.py)
+    def save_spc_batch_run(self, period, start_date, end_date, phase, limits, violations,
+                           started_at, keep_runs=10):
+        """
+        Store one batch run's limits and rule violations
+        
+        Args:
+            period: Page period the run covers (e.g. "Last Week")
+            start_date: First day of the window
+            end_date: Last day of the window
+            phase: 'Phase I' or 'Phase II' (limits the violations were evaluated against)
+            limits: DataFrame indexed by (product, parameter) as returned by
+                    spc.calculate_control_limits_batch
+            violations: DataFrame with product, parameter, timestamp, value,
+                        chart, rule and description columns
+            started_at: When the run started
+            keep_runs: Older runs of the same period and phase beyond this many are deleted
+            
+        Returns:
+            The new run id
+        """
+        def number(value):
+            return None if pd.isna(value) else float(value)
+        
+        limit_records = [{
+            'product': product,
+            'parameter': parameter,
+            'n': int(row['n']),
+            'cl': number(row['CL']),
+            'ucl': number(row['UCL']),
+            'lcl': number(row['LCL']),
+            'sigma': number(row['sigma']),
+            'mean': number(row['mean']),
+            'std': number(row['std']),
+            'min_value': number(row['min']),
+            'max_value': number(row['max']),
+            'mr_bar': number(row['MR_bar']),
+            'mr_ucl': number(row['MR_UCL']),
+            'phase': row['phase'],
+            'version': None if pd.isna(row.get('version')) else int(row['version']),
+        } for (product, parameter), row in limits.iterrows()]
+        
+        violation_records = [{
+            'product': row['product'],
+            'parameter': row['parameter'],
+            'timestamp': pd.Timestamp(row['timestamp']).to_pydatetime(),
+            'value': float(row['value']),
+            'chart': row['chart'],
+            'rule': int(row['rule']),
+            'description': row['description'],
+        } for row in violations.to_dict('records')]
+        
+        with self.get_engine().connect() as conn:
+            try:
+                run_id = conn.execute(text('''
+                INSERT INTO spc_batch_runs (period, start_date, end_date, phase, group_count, violation_count, started_at)
+                VALUES (:period, :start_date, :end_date, :phase, :group_count, :violation_count, :started_at)
+                RETURNING id
+                '''), {
+                    'period': period,
+                    'start_date': pd.Timestamp(start_date).date(),
+                    'end_date': pd.Timestamp(end_date).date(),
+                    'phase': phase,
+                    'group_count': len(limit_records),
+                    'violation_count': len(violation_records),
+                    'started_at': started_at,
+                }).scalar_one()
+                if limit_records:
+                    conn.execute(text('''
+                    INSERT INTO spc_batch_limits (
+                        run_id, product, parameter, n, cl, ucl, lcl, sigma, mean, std,
+                        min_value, max_value, mr_bar, mr_ucl, phase, version
+                    ) VALUES (
+                        :run_id, :product, :parameter, :n, :cl, :ucl, :lcl, :sigma, :mean, :std,
+                        :min_value, :max_value, :mr_bar, :mr_ucl, :phase, :version
+                    )
+                    '''), [dict(record, run_id=run_id) for record in limit_records])
+                if violation_records:
+                    conn.execute(text('''
+                    INSERT INTO spc_batch_violations (
+                        run_id, product, parameter, timestamp, value, chart, rule, description
+                    ) VALUES (
+                        :run_id, :product, :parameter, :timestamp, :value, :chart, :rule, :description
+                    )
+                    '''), [dict(record, run_id=run_id) for record in violation_records])
+                conn.execute(text('''
+                DELETE FROM spc_batch_runs
+                WHERE period = :period AND phase = :phase AND id NOT IN (
+                    SELECT id FROM spc_batch_runs WHERE period = :period AND phase = :phase
+                    ORDER BY id DESC LIMIT :keep_runs
+                )
+                '''), {'period': period, 'phase': phase, 'keep_runs': keep_runs})
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Saving SPC batch run for {period} failed: {str(e)}")
+                raise
+        
+        logger.info(f"Saved SPC batch run {run_id} for {period}: {len(limit_records)} groups, "
+                    f"{len(violation_records)} violations")
+        return run_id
+    
+    def get_latest_spc_batch_run(self, period, end_date, phase, max_age_minutes):
+        """
+        Latest batch run for a page period, if it is recent enough to use
+        
+        Args:
+            period: Page period (e.g. "Last Week")
+            end_date: Last day the page is showing; runs for another day are ignored
+            phase: 'Phase I' or 'Phase II'
+            max_age_minutes: Runs that finished longer ago than this are ignored
+            
+        Returns:
+            dict of the spc_batch_runs row, or None
+        """
+        runs = self.execute_query('''
+        SELECT id, period, start_date, end_date, phase, group_count, violation_count, started_at, finished_at
+        FROM spc_batch_runs
+        WHERE period = %s AND end_date = %s AND phase = %s
+          AND finished_at >= NOW() - make_interval(mins => %s)
+        ORDER BY id DESC
+        LIMIT 1
+        ''', (period, pd.Timestamp(end_date).date(), phase, int(max_age_minutes)))
+        if runs.empty:
+            return None
+        return runs.iloc[0].to_dict()
+    
+    def get_spc_batch_limits(self, run_id):
+        """
+        Limits stored by a batch run
+        
+        Returns:
+            DataFrame indexed by (product, parameter) with the columns of
+            spc.calculate_control_limits_batch (sigma_mr is derived from MR_bar)
+        """
+        columns = ['product', 'parameter', 'n', 'CL', 'UCL', 'LCL', 'sigma', 'mean', 'std',
+                   'min', 'max', 'MR_bar', 'MR_UCL', 'phase', 'version']
+        limits = self.execute_query('''
+        SELECT product, parameter, n, cl, ucl, lcl, sigma, mean, std,
+               min_value, max_value, mr_bar, mr_ucl, phase, version
+        FROM spc_batch_limits
+        WHERE run_id = %s
+        ''', (int(run_id),))
+        if limits.empty:
+            return pd.DataFrame(columns=columns + ['sigma_mr']).set_index(['product', 'parameter'])
+        limits.columns = columns
+        numeric = ['n', 'CL', 'UCL', 'LCL', 'sigma', 'mean', 'std', 'min', 'max', 'MR_bar', 'MR_UCL', 'version']
+        limits[numeric] = limits[numeric].apply(pd.to_numeric)
+        limits['sigma_mr'] = limits['MR_bar'] / D2_MR
+        return limits.set_index(['product', 'parameter']).sort_index()
+    
+    def get_spc_batch_violations(self, run_id):
+        """Rule violations stored by a batch run, newest first"""
+        return self.execute_query('''
+        SELECT product, parameter, timestamp, value, chart, rule, description
+        FROM spc_batch_violations
+        WHERE run_id = %s
+        ORDER BY timestamp DESC, product, parameter, rule
+        ''', (int(run_id),))
+    
+    # Non-normal capability transforms
+    def get_capability_transform(self, product, parameter, method, data_version):
+        """
+        Stored transform parameters, if they were fitted to this data version
+        
+        Returns:
+            dict of parameters, or None
+        """
+        with self.get_engine().connect() as conn:
+            params = conn.execute(text('''
+            SELECT params FROM capability_transforms
+            WHERE product = :product AND parameter = :parameter AND method = :method
+              AND data_version = :data_version
+            '''), {'product': product, 'parameter': parameter, 'method': method,
+                  'data_version': data_version}).scalar()
+        return params
+    
+    def save_capability_transform(self, product, parameter, method, data_version, params):
+        """
+        Store fitted transform parameters for one data version
+        
+        Only the CAPABILITY_TRANSFORM_VERSIONS most recent fits of the group
+        are kept.
+        """
+        group = {'product': product, 'parameter': parameter, 'method': method}
+        with self.get_engine().connect() as conn:
+            conn.execute(text('''
+            INSERT INTO capability_transforms (product, parameter, method, data_version, params)
+            VALUES (:product, :parameter, :method, :data_version, :params)
+            ON CONFLICT (product, parameter, method, data_version) DO UPDATE SET
+                params = EXCLUDED.params,
+                fitted_at = NOW()
+            '''), {**group, 'data_version': data_version, 'params': json.dumps(params)})
+            conn.execute(text('''
+            DELETE FROM capability_transforms
+            WHERE product = :product AND parameter = :parameter AND method = :method
+              AND data_version NOT IN (
+                  SELECT data_version FROM capability_transforms
+                  WHERE product = :product AND parameter = :parameter AND method = :method
+                  ORDER BY fitted_at DESC
+                  LIMIT :keep
+              )
+            '''), {**group, 'keep': CAPABILITY_TRANSFORM_VERSIONS})
+            conn.commit()
+    
+    # Specification limits
+    def get_spec_limits(self):
+        """
+        Every specification limit version
+        
+        Returns:
+            DataFrame with product, parameter, lsl, usl and effective_from
+            (product '' means every product)
+        """
+        with self.get_engine().connect() as conn:
+            versions = pd.read_sql(text(f"SELECT {', '.join(SPEC_COLUMNS)} FROM spec_limits"), conn)
+        return versions
+    
+    def get_spec_limits_version(self):
+        """
+        Cheap fingerprint of the spec_limits table
+        
+        Saving a limit inserts a row or refreshes created_at, so the pair
+        changes with every edit.
+        
+        Returns:
+            (row count, latest created_at) tuple
+        """
+        with self.get_engine().connect() as conn:
+            count, latest = conn.execute(text("SELECT COUNT(*), MAX(created_at) FROM spec_limits")).one()
+        return count, latest
+    
+    def get_spec_limit_history(self, parameter=None):
+        """Every specification limit version with its author, newest first"""
+        query = '''
+        SELECT product, parameter, lsl, usl, effective_from, notes, created_by, created_at
+        FROM spec_limits
+        WHERE (%s IS NULL OR parameter = %s)
+        ORDER BY parameter, product, effective_from DESC
+        '''
+        return self.execute_query(query, (parameter, parameter))
+    
+    def add_spec_limit(self, parameter, lsl, usl, effective_from=None, product=None, username=None, notes=None):
+        """
+        Add a specification limit version and re-flag the checks it covers
+        
+        Args:
+            parameter: Parameter name
+            lsl: Lower specification limit (None for none)
+            usl: Upper specification limit (None for none)
+            effective_from: First time the limits apply (default: now)
+            product: Product the limits are for (None: every product)
+            username: User making the change
+            notes: Optional reason
+            
+        Returns:
+            True when saved
+        """
+        effective_from = pd.Timestamp.now() if effective_from is None else pd.Timestamp(effective_from)
+        with self.get_engine().connect() as conn:
+            try:
+                conn.execute(text('''
+                INSERT INTO spec_limits (product, parameter, lsl, usl, effective_from, notes, created_by)
+                VALUES (:product, :parameter, :lsl, :usl, :effective_from, :notes, :created_by)
+                ON CONFLICT (product, parameter, effective_from) DO UPDATE SET
+                    lsl = EXCLUDED.lsl, usl = EXCLUDED.usl, notes = EXCLUDED.notes,
+                    created_by = EXCLUDED.created_by, created_at = NOW()
+                '''), {'product': product or ANY_PRODUCT, 'parameter': parameter, 'lsl': lsl, 'usl': usl,
+                      'effective_from': effective_from.to_pydatetime(), 'notes': notes, 'created_by': username})
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                logger.error(f"Saving specification limits for {parameter} failed: {str(e)}")
+                st.error(f"Error saving specification limits: {e}")
+                return False
+        
+        reload_spec_registry()
+        logger.info(f"Specification limits for {parameter} ({product or 'all products'}) from "
+                    f"{effective_from}: {lsl} - {usl}")
+        # The limit is stored; stale flags are only a reporting issue, so don't fail the save
+        try:
+            self.refresh_out_of_spec_flags(since=effective_from)
+        except Exception as e:
+            logger.warning(f"Could not refresh out-of-spec flags for {parameter} from {effective_from}: {str(e)}")
+        return True
+    
+    def _out_of_spec_fields(self, data):
+        """out_of_spec / out_of_spec_parameters values for a check about to be saved"""
+        counts, names = get_spec_registry().flag_out_of_spec(pd.DataFrame([data]))
+        return {'out_of_spec': int(counts[0]), 'out_of_spec_parameters': names[0] or None}
+    
+    def refresh_out_of_spec_flags(self, only_missing=False, since=None):
+        """
+        Recompute the stored out-of-spec flags from the specification limits
+        
+        Args:
+            only_missing: Only checks without flags (saved before flags existed).
+                          Tables without such checks are skipped after a cheap
+                          EXISTS probe, so this is fast once backfilled.
+            since: Only checks at or after this time (e.g. a new limit's effective_from)
+            
+        Returns:
+            Number of checks updated
+        """
+        registry = SpecRegistry(self.get_spec_limits())
+        updated = 0
+        with self.get_engine().connect() as conn:
+            for table in FLAGGED_TABLES:
+                query = f"SELECT * FROM {table} WHERE TRUE"
+                params = {}
+                if only_missing:
+                    missing = conn.execute(text(
+                        f"SELECT EXISTS (SELECT 1 FROM {table} WHERE out_of_spec IS NULL)"
+                    )).scalar()
+                    if not missing:
+                        continue
+                    query += " AND out_of_spec IS NULL"
+                if since is not None:
+                    query += " AND timestamp >= :since"
+                    params['since'] = pd.Timestamp(since).to_pydatetime()
+                rows = pd.read_sql(text(query), conn, params=params)
+                if rows.empty:
+                    continue
+                
+                counts, names = registry.flag_out_of_spec(rows)
+                conn.execute(text(f'''
+                UPDATE {table} SET out_of_spec = :out_of_spec, out_of_spec_parameters = :out_of_spec_parameters
+                WHERE check_id = :check_id
+                '''), [{'check_id': check_id, 'out_of_spec': int(count), 'out_of_spec_parameters': name or None}
+                      for check_id, count, name in zip(rows['check_id'], counts, names)])
+                updated += len(rows)
+            conn.commit()
+        if updated:
+            logger.info(f"Refreshed out-of-spec flags for {updated} checks")
+        return updated
+    
     # Data Operations (using SQLAlchemy)
     def save_torque_tamper(self, data):
         """Save torque and tamper evidence data"""
@@ -347,13 +1160,15 @@ class BeverageQADatabase:
                 INSERT INTO torque_tamper (
                     check_id, username, timestamp, start_time,
                     head1_torque, head2_torque, head3_torque, head4_torque, head5_torque,
-                    tamper_evidence, comments
+                    tamper_evidence, comments, out_of_spec, out_of_spec_parameters
                 ) VALUES (
                     :check_id, :username, :timestamp, :start_time, 
                     :head1_torque, :head2_torque, :head3_torque, :head4_torque, :head5_torque,
-                    :tamper_evidence, :comments
+                    :tamper_evidence, :comments, :out_of_spec, :out_of_spec_parameters
                 )
-                '''), data)
+                '''), dict(data, **self._out_of_spec_fields(data)))
+                self._update_running_stats(conn, 'torque_tamper', data)
+                self._notify_new_check(conn, 'torque_tamper')
                 conn.commit()
                 return True
             except Exception as e:
@@ -370,14 +1185,16 @@ class BeverageQADatabase:
                     check_id, username, timestamp, start_time,
                     brix, titration_acid, density, tare, nominal_volume,
                     bottle1_weight, bottle2_weight, bottle3_weight, bottle4_weight, bottle5_weight,
-                    average_weight, net_content, comments
+                    average_weight, net_content, comments, out_of_spec, out_of_spec_parameters
                 ) VALUES (
                     :check_id, :username, :timestamp, :start_time,
                     :brix, :titration_acid, :density, :tare, :nominal_volume,
                     :bottle1_weight, :bottle2_weight, :bottle3_weight, :bottle4_weight, :bottle5_weight,
-                    :average_weight, :net_content, :comments
+                    :average_weight, :net_content, :comments, :out_of_spec, :out_of_spec_parameters
                 )
-                '''), data)
+                '''), dict(data, **self._out_of_spec_fields(data)))
+                self._update_running_stats(conn, 'net_content', data)
+                self._notify_new_check(conn, 'net_content')
                 conn.commit()
                 return True
             except Exception as e:
@@ -397,7 +1214,8 @@ class BeverageQADatabase:
                     torque_test, pack_size, pallet_check, date_code, odour, appearance,
                     product_taste, filler_height, keepers_sample, colour_taste_sample,
                     micro_sample, bottle_check, bottle_seams, foreign_material_test,
-                    container_rinse_inspection, container_rinse_water_odour, comments
+                    container_rinse_inspection, container_rinse_water_odour, comments,
+                    out_of_spec, out_of_spec_parameters
                 ) VALUES (
                     :check_id, :username, :timestamp, :start_time,
                     :trade_name, :product, :volume, :best_before, :manufacturing_date,
@@ -405,9 +1223,12 @@ class BeverageQADatabase:
                     :torque_test, :pack_size, :pallet_check, :date_code, :odour, :appearance,
                     :product_taste, :filler_height, :keepers_sample, :colour_taste_sample,
                     :micro_sample, :bottle_check, :bottle_seams, :foreign_material_test,
-                    :container_rinse_inspection, :container_rinse_water_odour, :comments
+                    :container_rinse_inspection, :container_rinse_water_odour, :comments,
+                    :out_of_spec, :out_of_spec_parameters
                 )
-                '''), data)
+                '''), dict(data, **self._out_of_spec_fields(data)))
+                self._update_running_stats(conn, 'quality_check', data)
+                self._notify_new_check(conn, 'quality_check')
                 conn.commit()
                 return True
             except Exception as e:
@@ -623,38 +1444,64 @@ class BeverageQADatabase:
             st.error(f"Error retrieving check data: {e}")
             return pd.DataFrame()
     
-    def test_connection(self):
-        """Test database connection and basic functionality"""
-        logger.info("Testing database connection")
-        try:
-            # Test both SQLAlchemy and psycopg2 connections
-            with self.get_engine().connect() as conn:
-                if conn.execute(text("SELECT 1")).scalar() != 1:
-                    logger.warning("SQLAlchemy connection test failed")
-                    return False
+    def health_check(self, max_age=None):
+        """
+        Probe the database with a single pg_catalog query
+        
+        The result is memoised for HEALTH_CHECK_TTL seconds and shared by
+        every caller and instance using the same DATABASE_URL.
+        
+        Args:
+            max_age: Maximum age in seconds of a cached result to accept
+                     (default: HEALTH_CHECK_TTL, 0 forces a fresh probe)
+        
+        Returns:
+            dict with ok, connected, missing_tables and checked_at (epoch seconds)
+        """
+        if max_age is None:
+            max_age = HEALTH_CHECK_TTL
+        
+        with _health_lock:
+            cached = _health_cache.get(self.DATABASE_URL)
+            if cached and time.time() - cached['checked_at'] < max_age:
+                return cached
             
-            # Test psycopg2 connection
-            test_result = self.execute_query("SELECT 1")
-            if test_result.empty or test_result.iloc[0, 0] != 1:
-                logger.warning("Psycopg2 connection test failed")
-                return False
+            logger.info("Testing database connection")
+            result = {
+                'ok': False,
+                'connected': False,
+                'missing_tables': list(REQUIRED_TABLES),
+                'checked_at': time.time()
+            }
+            try:
+                with self.get_engine().connect() as conn:
+                    present = conn.execute(text("""
+                    SELECT c.relname
+                    FROM pg_catalog.pg_class c
+                    JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace
+                    WHERE c.relkind IN ('r', 'p')
+                    AND n.nspname = ANY (current_schemas(false))
+                    AND c.relname = ANY (:tables)
+                    """), {'tables': REQUIRED_TABLES}).scalars().all()
                 
-            # Verify critical tables exist
-            required_tables = ['users', 'torque_tamper', 'net_content', 'quality_check']
-            for table in required_tables:
-                result = self.execute_query(
-                    "SELECT 1 FROM information_schema.tables WHERE table_name = %s",
-                    (table,))
-                if result.empty:
-                    logger.error(f"Missing required table: {table}")
-                    return False
-            
-            logger.info("Database connection test passed")
-            return True
+                result['connected'] = True
+                result['missing_tables'] = [t for t in REQUIRED_TABLES if t not in present]
+                result['ok'] = not result['missing_tables']
+                
+                if result['ok']:
+                    logger.info("Database connection test passed")
+                else:
+                    logger.error(f"Missing required tables: {', '.join(result['missing_tables'])}")
+                    
+            except Exception as e:
+                logger.critical(f"Connection test failed: {e}")
             
-        except Exception as e:
-            logger.critical(f"Connection test failed: {e}")
-            return False
+            _health_cache[self.DATABASE_URL] = result
+            return result
+    
+    def test_connection(self):
+        """Test database connection and required tables (cached, see health_check)"""
+        return self.health_check()['ok']
     
     def repair_database(self):
         """Attempt to repair common database issues"""
@@ -949,6 +1796,20 @@ def get_db():
         _global_db_instance = BeverageQADatabase()
     return _global_db_instance
 
+class LazyDatabase:
+    """
+    Module-level stand-in for BeverageQADatabase.
+
+    Importing a page module no longer connects, retries or runs DDL;
+    the shared instance from get_db() is created on first attribute access.
+    """
+    def __getattr__(self, name):
+        return getattr(get_db(), name)
+
+    def __repr__(self):
+        state = "connected" if _global_db_instance is not None else "not connected"
+        return f"<LazyDatabase ({state})>"
+
 def get_conn():
     """Backward compatible connection getter"""
     return get_db().get_engine().connect()
@@ -956,7 +1817,6 @@ def get_conn():
 def get_check_data(start_date, end_date, product_filter=None):
     """Get combined check data for visualization or reporting"""
     try:
-        db = BeverageQADatabase()
         with st.spinner("Loading data..."):  # Add visual feedback
             data = st.session_state.db.get_check_data(start_date, end_date)
             if 'product' in data.columns:
@@ -970,41 +1830,41 @@ def get_check_data(start_date, end_date, product_filter=None):
     
 def initialize_database():
     """Initialize the database tables"""
-    return BeverageQADatabase()
+    return get_db()
 
 def save_torque_tamper_data(data):
     """Save torque and tamper evidence data"""
-    db = BeverageQADatabase()
+    db = get_db()
     return db.save_torque_tamper(data)
 
 def save_net_content_data(data):
     """Save net content measurement data"""
-    db = BeverageQADatabase()
+    db = get_db()
     return db.save_net_content(data)
 
 def save_quality_check_data(data):
     """Save 30-minute quality check data"""
-    db = BeverageQADatabase()
+    db = get_db()
     return db.save_quality_check(data)
 
 def get_all_users_data():
     """Get all users data for user management"""
-    db = BeverageQADatabase()
+    db = get_db()
     return db.get_all_users_data()
 
 def get_recent_checks(limit=10):
     """Get recent checks from all tables"""
-    db = BeverageQADatabase()
+    db = get_db()
     return db.get_recent_checks(limit)
 
 def get_user_checks(username, limit=10, include_measurements=False):
     """Get checks for a specific user"""
-    db = BeverageQADatabase()
+    db = get_db()
     return db.get_user_checks(username, limit)
 
 def get_public_checks(self, limit=5, include_measurements=False):
     """Get public checks (limited information)"""
-    db = BeverageQADatabase()
+    db = get_db()
     return db.get_public_checks(limit)
 
 # Make sure these are available for import
@@ -1021,6 +1881,7 @@ __all__ = [
     'get_public_checks',
     'get_db',
     'get_conn',
+    'LazyDatabase',
     'get_user_last_tab',
     'update_user_last_tab',
     'update_user_role',
@@ -0,0 +1,191 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+# Pool tuning (environment overrides)
+POOL_SIZE = int(os.getenv('QA_POOL_SIZE', '5'))
+POOL_PREWARM = int(os.getenv('QA_POOL_PREWARM', '2'))               # connections opened at startup
+POOL_RECYCLE = int(os.getenv('QA_POOL_RECYCLE', '300'))             # seconds before a connection is replaced
+POOL_KEEPALIVE = float(os.getenv('QA_POOL_KEEPALIVE_SECONDS', '60'))  # 0 disables the keepalive thread
+POOL_PING_BATCH = int(os.getenv('QA_POOL_PING_BATCH', '2'))          # idle connections pinged at a time
+SLOW_CHECKOUT_SECONDS = float(os.getenv('QA_SLOW_CHECKOUT_SECONDS', '1.0'))
+
+# libpq TCP keepalives so idle sockets aren't silently dropped by NAT/poolers
+CONNECT_ARGS = {
+    'keepalives': 1,
+    'keepalives_idle': 30,
+    'keepalives_interval': 10,
+    'keepalives_count': 3,
+}
+
+
+class CheckoutMetrics:
+    """Thread-safe rolling record of connection checkout latency"""
+
+    def __init__(self, window=1000):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.slow = 0
+        self.max_seconds = 0.0
+
+    def record(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+            self.count += 1
+            self.max_seconds = max(self.max_seconds, seconds)
+            if seconds >= SLOW_CHECKOUT_SECONDS:
+                self.slow += 1
+        if seconds >= SLOW_CHECKOUT_SECONDS:
+            logger.warning(f"Slow connection checkout: {seconds * 1000:.0f} ms")
+
+    def snapshot(self):
+        """
+        Summarise recorded checkouts
+
+        Returns:
+            dict with checkouts, slow_checkouts and mean/p50/p95/max latency in ms
+            (latency figures cover the most recent `window` checkouts)
+        """
+        with self._lock:
+            samples = np.array(self._samples)
+            summary = {'checkouts': self.count, 'slow_checkouts': self.slow,
+                       'max_ms': self.max_seconds * 1000}
+        if samples.size:
+            summary.update({
+                'mean_ms': float(samples.mean() * 1000),
+                'p50_ms': float(np.percentile(samples, 50) * 1000),
+                'p95_ms': float(np.percentile(samples, 95) * 1000),
+            })
+        else:
+            summary.update({'mean_ms': None, 'p50_ms': None, 'p95_ms': None})
+        return summary
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout takes (including any reconnect)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = CheckoutMetrics()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            self.metrics.record(time.perf_counter() - start)
+
+    def connect_untimed(self):
+        """Check out a connection for pool maintenance without counting it"""
+        return super().connect()
+
+    def recreate(self):
+        new_pool = super().recreate()
+        new_pool.metrics = self.metrics
+        return new_pool
+
+
+def prewarm_pool(pool, target):
+    """
+    Make sure at least `target` idle connections are sitting in the pool
+
+    Connections are all held open before being returned, so each one is a
+    distinct pooled connection.
+
+    Returns:
+        Number of connections checked out to reach the target
+    """
+    needed = max(0, min(target, pool.size()) - pool.checkedin())
+    connections = []
+    try:
+        for _ in range(needed):
+            connections.append(pool.connect_untimed())
+    except Exception as e:
+        logger.warning(f"Pool prewarm stopped after {len(connections)} connections: {e}")
+    finally:
+        for connection in connections:
+            connection.close()
+    return len(connections)
+
+
+def ping_idle_connections(pool, batch_size=POOL_PING_BATCH):
+    """
+    Ping every idle connection, batch_size connections at a time
+
+    Checkout applies pool_recycle, so stale connections are replaced here
+    rather than on a user's request. Connections that fail the ping are
+    invalidated and dropped from the pool. Only a small batch is held at
+    once, so requests arriving during the keepalive still find idle
+    connections. The pool hands out connections in FIFO order, so each
+    batch returned goes to the back of the queue.
+
+    Returns:
+        (pinged, invalidated) counts
+    """
+    pinged = 0
+    invalidated = 0
+    remaining = pool.checkedin()
+    try:
+        while remaining > 0:
+            connections = []
+            try:
+                for _ in range(min(batch_size, remaining, pool.checkedin())):
+                    connections.append(pool.connect_untimed())
+                if not connections:
+                    break
+                for connection in connections:
+                    try:
+                        cursor = connection.cursor()
+                        cursor.execute("SELECT 1")
+                        cursor.close()
+                    except Exception:
+                        connection.invalidate()
+                        invalidated += 1
+            finally:
+                for connection in connections:
+                    connection.close()
+            pinged += len(connections)
+            remaining -= len(connections)
+    except Exception as e:
+        logger.warning(f"Pool keepalive failed: {e}")
+    return pinged, invalidated
+
+
+class PoolKeepalive:
+    """Background thread that keeps the engine's idle connections alive and topped up"""
+
+    def __init__(self, engine, interval=POOL_KEEPALIVE, target=POOL_PREWARM):
+        self.engine = engine
+        self.interval = interval
+        self.target = target
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="db-pool-keepalive", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        opened = prewarm_pool(self.engine.pool, self.target)
+        logger.info(f"Prewarmed database pool with {opened} connections")
+
+        if self.interval <= 0:
+            return
+        while not self._stop.wait(self.interval):
+            pinged, invalidated = ping_idle_connections(self.engine.pool)
+            replaced = prewarm_pool(self.engine.pool, self.target)
+            if invalidated or replaced:
+                logger.info(
+                    f"Pool keepalive: pinged {pinged}, invalidated {invalidated}, opened {replaced}"
+                )
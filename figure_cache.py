@@ -0,0 +1,126 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Number of built figures kept in memory (shared by every session)
+FIGURE_CACHE_SIZE = int(os.getenv('QA_FIGURE_CACHE_SIZE', '64'))
+
+
+def _feed(digest, obj):
+    """Add a stable byte representation of obj to the hash"""
+    if isinstance(obj, pd.DataFrame):
+        digest.update(b'df')
+        digest.update(repr(list(obj.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, pd.Series):
+        digest.update(b'series')
+        digest.update(str(obj.name).encode())
+        digest.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        digest.update(b'array')
+        digest.update(str(obj.dtype).encode() + repr(obj.shape).encode())
+        digest.update(np.ascontiguousarray(obj).tobytes() if obj.dtype != object else repr(obj.tolist()).encode())
+    elif isinstance(obj, dict):
+        digest.update(b'dict')
+        for key in sorted(obj, key=repr):
+            _feed(digest, key)
+            _feed(digest, obj[key])
+    elif isinstance(obj, (list, tuple, range)):
+        digest.update(b'seq')
+        for item in obj:
+            _feed(digest, item)
+    else:
+        digest.update(repr(obj).encode())
+    digest.update(b'|')
+
+
+def data_fingerprint(*parts):
+    """
+    Cheap content hash of chart inputs (DataFrames, arrays, limits dicts, options)
+
+    DataFrames and Series are hashed with the vectorised
+    pd.util.hash_pandas_object, so the cost is one pass over the data.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        _feed(digest, part)
+    return digest.hexdigest()
+
+
+class FigureCache:
+    """
+    LRU cache of built Plotly figures keyed by builder and input fingerprint
+
+    Cached figures are shared, so callers must not modify a returned figure.
+    """
+
+    def __init__(self, max_entries=FIGURE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_build(self, builder, *args, **kwargs):
+        """
+        Return the cached figure for these inputs, building it on a miss
+
+        Args:
+            builder: Function returning a Plotly figure (e.g. create_xbar_chart)
+            *args, **kwargs: Passed to builder and included in the key
+        """
+        key = (builder.__module__, builder.__qualname__, data_fingerprint(args, kwargs))
+        with self._lock:
+            figure = self._figures.get(key)
+            if figure is not None:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                return figure
+            self.misses += 1
+
+        figure = builder(*args, **kwargs)
+
+        with self._lock:
+            self._figures[key] = figure
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.max_entries:
+                self._figures.popitem(last=False)
+                self.evictions += 1
+        return figure
+
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
+
+    def stats(self):
+        """
+        Returns:
+            dict with hits, misses, evictions, entries, max_entries and hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._figures),
+                'max_entries': self.max_entries,
+                'hit_rate': self.hits / lookups if lookups else None,
+            }
+
+
+# Process-wide cache used by the chart pages
+figure_cache = FigureCache()
+
+
+def cached_figure(builder, *args, **kwargs):
+    """Build a figure through the shared figure_cache"""
+    return figure_cache.get_or_build(builder, *args, **kwargs)
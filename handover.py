@@ -284,11 +284,10 @@ def generate_production_summary(shift_date, shift_type):
         if 'product' in shift_data.columns:
             summary['products_produced'] = shift_data['product'].dropna().unique().tolist()
         
+        # Out-of-spec measurements are flagged when each check is saved
         quality_issues = 0
-        for head in ['head1_torque', 'head2_torque', 'head3_torque', 'head4_torque', 'head5_torque']:
-            if head in shift_data.columns:
-                torque_values = pd.to_numeric(shift_data[head], errors='coerce')
-                quality_issues += ((torque_values < 5) | (torque_values > 12)).sum()
+        if 'out_of_spec' in shift_data.columns:
+            quality_issues += int(pd.to_numeric(shift_data['out_of_spec'], errors='coerce').fillna(0).sum())
         
         if 'tamper_evidence' in shift_data.columns:
             quality_issues += shift_data['tamper_evidence'].str.contains('FAIL').sum()
@@ -0,0 +1,178 @@
+import atexit
+import copy
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FILE = os.getenv('QA_LOG_FILE', 'database_operations.log')
+LOG_LEVEL = os.getenv('QA_LOG_LEVEL', 'INFO')
+DEDUP_INTERVAL = float(os.getenv('QA_LOG_DEDUP_SECONDS', '60'))
+QUEUE_SIZE = int(os.getenv('QA_LOG_QUEUE_SIZE', '10000'))
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+class JsonLineFormatter(logging.Formatter):
+    """Format records as one JSON object per line"""
+
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'msg': record.getMessage(),
+        }
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            payload['suppressed'] = suppressed
+        dropped = getattr(record, 'dropped', 0)
+        if dropped:
+            payload['dropped'] = dropped
+        # Queued records carry the traceback as exc_text (see NonBlockingQueueHandler.prepare)
+        exc = record.exc_text or (self.formatException(record.exc_info) if record.exc_info else None)
+        if exc:
+            payload['exc'] = exc
+        return json.dumps(payload, default=str)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Drop repeats of the same message emitted within `interval` seconds.
+
+    The next record that gets through for a key carries the number of
+    copies that were dropped in its `suppressed` attribute.
+    """
+
+    def __init__(self, interval=DEDUP_INTERVAL, max_keys=1024):
+        super().__init__()
+        self.interval = interval
+        self.max_keys = max_keys
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.interval <= 0:
+            return True
+
+        key = (record.name, record.levelno, record.getMessage())
+        now = time.monotonic()
+        with self._lock:
+            last, suppressed = self._seen.get(key, (None, 0))
+            if last is not None and now - last < self.interval:
+                self._seen[key] = (last, suppressed + 1)
+                return False
+            self._seen[key] = (now, 0)
+            self._seen.move_to_end(key)
+            while len(self._seen) > self.max_keys:
+                self._seen.popitem(last=False)
+
+        record.suppressed = suppressed
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    QueueHandler that drops records instead of blocking when the queue is full
+
+    The next record that gets through carries the number of records dropped
+    since the last one in its `dropped` attribute; drops not reported that
+    way are logged at shutdown.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.reported = 0
+
+    def prepare(self, record):
+        """
+        Copy of the record with its message merged and the traceback kept
+        as exc_text, so formatters on the listener thread can still report
+        it separately (QueueHandler.prepare folds it into the message and
+        clears exc_info/exc_text)
+        """
+        record = copy.copy(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        unreported = self.dropped - self.reported
+        if unreported:
+            record.dropped = unreported
+        try:
+            self.queue.put_nowait(record)
+            self.reported += unreported
+        except queue.Full:
+            self.dropped += 1
+
+
+def _stop_listener(listener, queue_handler):
+    """Flush and stop the listener, then log any drops no queued record reported"""
+    listener.stop()
+    unreported = queue_handler.dropped - queue_handler.reported
+    if unreported:
+        record = logging.makeLogRecord({
+            'name': __name__, 'levelno': logging.WARNING, 'levelname': 'WARNING',
+            'msg': f"{unreported} log records were dropped because the log queue was full",
+            'dropped': unreported,
+        })
+        for handler in listener.handlers:
+            handler.handle(record)
+        queue_handler.reported += unreported
+
+
+def configure_logging(log_file=LOG_FILE, level=LOG_LEVEL):
+    """
+    Route all logging through a background QueueListener.
+
+    Callers only pay for a dict lookup and a queue put; formatting and
+    file/console I/O happen on the listener thread. Safe to call more
+    than once - only the first call installs handlers.
+
+    Returns:
+        The running QueueListener
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return _listener
+
+        file_handler = RotatingFileHandler(
+            log_file,
+            maxBytes=1024*1024,  # 1MB
+            backupCount=5
+        )
+        file_handler.setFormatter(JsonLineFormatter())
+
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(
+            '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        ))
+
+        log_queue = queue.Queue(maxsize=QUEUE_SIZE)
+        queue_handler = NonBlockingQueueHandler(log_queue)
+        queue_handler.addFilter(RateLimitFilter())
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(queue_handler)
+
+        _listener = QueueListener(
+            log_queue, file_handler, console_handler,
+            respect_handler_level=True
+        )
+        _listener.start()
+        atexit.register(_stop_listener, _listener, queue_handler)
+        return _listener
@@ -6,11 +6,8 @@ from plotly.subplots import make_subplots
 import datetime as dt
 from scipy import stats
 from database import get_check_data
+from spec_limits import get_spec_registry
 from utils import format_timestamp
-import statsmodels.api as sm
-from statsmodels.tsa.arima.model import ARIMA
-from statsmodels.tsa.statespace.sarimax import SARIMAX
-from statsmodels.tsa.holtwinters import ExponentialSmoothing
 
 def prepare_time_series_data(data, column, min_samples=30):
     """
@@ -62,6 +59,10 @@ def train_forecast_models(time_series, forecast_days=30):
     if time_series is None:
         return None
     
+    # statsmodels is slow to import, so only load it when a forecast is run
+    from statsmodels.tsa.arima.model import ARIMA
+    from statsmodels.tsa.holtwinters import ExponentialSmoothing
+    
     results = {}
     models = {}
     forecasts = {}
@@ -497,42 +498,40 @@ def display_prediction_page():
         st.warning("No data available for the selected filters. Please adjust the date range or product filter.")
         return
     
-    # Select parameter for forecasting
+    # Select parameter for forecasting (limits from the spec registry; a single
+    # selected product gets its own limits)
     forecast_params = {
         "brix": {
-            "name": "BRIX",
-            "spec_limits": {"lsl": 8.0, "usl": 9.5}
+            "name": "BRIX"
         },
         "head1_torque": {
-            "name": "Torque (Head 1)",
-            "spec_limits": {"lsl": 5.0, "usl": 12.0}
+            "name": "Torque (Head 1)"
         },
         "head2_torque": {
-            "name": "Torque (Head 2)",
-            "spec_limits": {"lsl": 5.0, "usl": 12.0}
+            "name": "Torque (Head 2)"
         },
         "head3_torque": {
-            "name": "Torque (Head 3)",
-            "spec_limits": {"lsl": 5.0, "usl": 12.0}
+            "name": "Torque (Head 3)"
         },
         "head4_torque": {
-            "name": "Torque (Head 4)",
-            "spec_limits": {"lsl": 5.0, "usl": 12.0}
+            "name": "Torque (Head 4)"
         },
         "head5_torque": {
-            "name": "Torque (Head 5)",
-            "spec_limits": {"lsl": 5.0, "usl": 12.0}
+            "name": "Torque (Head 5)"
         },
         "titration_acid": {
-            "name": "Titration Acid",
-            "spec_limits": {"lsl": None, "usl": None}
+            "name": "Titration Acid"
         },
         "density": {
-            "name": "Density",
-            "spec_limits": {"lsl": None, "usl": None}
+            "name": "Density"
         }
     }
     
+    spec_product = product_filter[0] if len(product_filter) == 1 and product_filter[0] != "All" else None
+    registry = get_spec_registry()
+    for param, details in forecast_params.items():
+        details["spec_limits"] = registry.limits_for(param, spec_product)
+    
     # Filter to show only parameters that exist in the data
     available_params = [param for param in forecast_params.keys() if param in data.columns]
     
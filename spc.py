@@ -1,12 +1,43 @@
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from database import BeverageQADatabase  # Updated import
+from database import LazyDatabase  # Updated import
+from spc_rules import NELSON_RULES, evaluate_nelson_rules
+from spc_stats import ALL_PRODUCTS, D2_MR
+from spc_drift import ewma_statistics, cusum_statistics, EWMA_LAMBDA, EWMA_L, CUSUM_K, CUSUM_H
+from spc_multivariate import t2_chart_data
+from chart_downsampling import downsample_indices, scatter_class, add_envelope
+from figure_cache import cached_figure, data_fingerprint, figure_cache
+from spec_limits import get_spec_registry
+
+logger = logging.getLogger(__name__)
+
+# Database connection (connects on first use)
+db = LazyDatabase()
+
+# Render only the open SPC tab (set QA_SPC_LAZY_TABS=0 to render every tab, e.g. to benchmark)
+SPC_LAZY_TABS = os.getenv('QA_SPC_LAZY_TABS', '1') != '0'
+
+# Builds the next tab's figures into the figure cache while the current one is viewed
+_prefetch_executor = None
+
+# Predefined look-back windows in days (spc_batch.py precomputes each of them)
+SPC_PERIODS = {"Last Week": 7, "Last Month": 30, "Last Quarter": 90, "Last Year": 365}
+
+# Batch results older than this are ignored and the page computes limits itself
+SPC_BATCH_MAX_AGE_MINUTES = int(os.getenv('QA_SPC_BATCH_MAX_AGE_MINUTES', '60'))
 
-# Initialize database connection
-db = BeverageQADatabase()
+def period_dates(period, end_date=None):
+    """Start and end date of a predefined period ending on end_date (default: today)"""
+    end_date = end_date or pd.Timestamp.now().date()
+    return end_date - pd.Timedelta(days=SPC_PERIODS[period]), end_date
 
 def calculate_control_limits(data, column, n_sigma=3):
     """
@@ -47,7 +78,532 @@ def calculate_control_limits(data, column, n_sigma=3):
         'sigma': sigma
     }
 
-def create_xbar_chart(data, value_column, date_column='timestamp', title=None, n_sigma=3):
+# Parameters charted on the SPC page and the check sources they are recorded in
+SPC_PARAMETERS = {
+    'head1_torque': ['torque_tamper'],
+    'head2_torque': ['torque_tamper'],
+    'head3_torque': ['torque_tamper'],
+    'head4_torque': ['torque_tamper'],
+    'head5_torque': ['torque_tamper'],
+    'brix': ['net_content', 'quality_check'],
+    'average_weight': ['net_content'],
+    'net_content': ['net_content'],
+}
+
+def to_long_format(data, parameters=None):
+    """
+    Reshape combined check data into long format
+    
+    Args:
+        data: DataFrame from get_check_data (one column per parameter)
+        parameters: Dict of parameter -> list of sources (default: SPC_PARAMETERS)
+        
+    Returns:
+        DataFrame with timestamp, product, parameter and value columns
+    """
+    parameters = parameters or SPC_PARAMETERS
+    columns = ['timestamp', 'product', 'parameter', 'value']
+    
+    frames = []
+    for parameter, sources in parameters.items():
+        if data.empty or parameter not in data.columns:
+            continue
+        rows = data[data['source'].isin(sources)] if 'source' in data.columns else data
+        frame = pd.DataFrame({
+            'timestamp': pd.to_datetime(rows['timestamp']),
+            'product': rows['product'] if 'product' in rows.columns else np.nan,
+            'parameter': parameter,
+            'value': pd.to_numeric(rows[parameter], errors='coerce')
+        })
+        frames.append(frame.dropna(subset=['value']))
+    
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+def prepare_spc_series(long_data, include_all_products=True):
+    """
+    Sort long-format data by (product, parameter, timestamp) once and add moving ranges
+    
+    Args:
+        long_data: DataFrame from to_long_format
+        include_all_products: Also add every row under the ALL_PRODUCTS group
+        
+    Returns:
+        Sorted DataFrame with an extra moving_range column (NaN on each group's first row)
+    """
+    series = long_data.dropna(subset=['product'])
+    if include_all_products:
+        series = pd.concat([series, long_data.assign(product=ALL_PRODUCTS)], ignore_index=True)
+    series = series.sort_values(['product', 'parameter', 'timestamp'], kind='stable', ignore_index=True)
+    
+    values = series['value'].to_numpy(dtype=float)
+    products = series['product'].to_numpy()
+    params = series['parameter'].to_numpy()
+    same_group = (products[1:] == products[:-1]) & (params[1:] == params[:-1])
+    
+    moving_range = np.full(len(values), np.nan)
+    moving_range[1:] = np.where(same_group, np.abs(np.diff(values)), np.nan)
+    series['moving_range'] = moving_range
+    return series
+
+def calculate_control_limits_batch(series, n_sigma=3):
+    """
+    Calculate control limits for every (product, parameter) group in one pass
+    
+    Args:
+        series: DataFrame from prepare_spc_series (long data is prepared automatically)
+        n_sigma: Number of standard deviations for control limits (default: 3)
+        
+    Returns:
+        DataFrame indexed by (product, parameter) with n, CL, sigma, UCL, LCL,
+        mean, std, min, max, MR_bar, MR_UCL and sigma_mr (MR-bar / d2).
+        mean/std always describe the data; CL/sigma are the limits in use
+        and may be replaced by frozen values (see apply_frozen_limits).
+    """
+    if 'moving_range' not in series.columns:
+        series = prepare_spc_series(series)
+    
+    limits = series.groupby(['product', 'parameter'], sort=True).agg(
+        n=('value', 'size'),
+        CL=('value', 'mean'),
+        sigma=('value', 'std'),
+        min=('value', 'min'),
+        max=('value', 'max'),
+        MR_bar=('moving_range', 'mean')
+    )
+    
+    limits['UCL'] = limits['CL'] + n_sigma * limits['sigma']
+    limits['LCL'] = limits['CL'] - n_sigma * limits['sigma']
+    # If LCL is negative and that doesn't make sense for the data, set to 0
+    limits.loc[(limits['LCL'] < 0) & (limits['min'] >= 0), 'LCL'] = 0
+    
+    limits['sigma_mr'] = limits['MR_bar'] / D2_MR
+    limits['MR_UCL'] = limits['MR_bar'] + 3 * limits['MR_bar'] / D2_MR
+    
+    # Match calculate_control_limits: fewer than 2 points gives no limits
+    limits.loc[limits['n'] < 2, ['CL', 'UCL', 'LCL', 'sigma']] = np.nan
+    limits['mean'] = limits['CL']
+    limits['std'] = limits['sigma']
+    limits['phase'] = 'Phase I'
+    return limits
+
+# Limit columns that frozen (Phase II) limits replace
+FROZEN_LIMIT_COLUMNS = ['CL', 'UCL', 'LCL', 'sigma', 'MR_bar', 'MR_UCL']
+
+def apply_frozen_limits(limits, frozen):
+    """
+    Evaluate groups against their frozen Phase I limits (Phase II monitoring)
+    
+    Args:
+        limits: DataFrame from calculate_control_limits_batch for the current data
+        frozen: DataFrame from db.get_active_control_limits
+        
+    Returns:
+        Copy of limits where every group with frozen limits uses them
+        (phase 'Phase II', with the frozen version); other groups keep the
+        limits calculated from the current data
+    """
+    limits = limits.copy()
+    limits['version'] = np.nan
+    shared = limits.index.intersection(frozen.index)
+    if shared.empty:
+        return limits
+    
+    limits.loc[shared, FROZEN_LIMIT_COLUMNS] = frozen.loc[shared, FROZEN_LIMIT_COLUMNS].astype(float).to_numpy()
+    limits.loc[shared, 'sigma_mr'] = limits.loc[shared, 'MR_bar'] / D2_MR
+    limits.loc[shared, 'version'] = frozen.loc[shared, 'version'].astype(float).to_numpy()
+    limits.loc[shared, 'phase'] = 'Phase II'
+    return limits
+
+def freeze_baseline_limits(baseline_start, baseline_end, username, notes=None):
+    """
+    Establish Phase I limits from a baseline period and store them as new versions
+    
+    Args:
+        baseline_start: First day of the baseline period
+        baseline_end: Last day of the baseline period
+        username: User establishing the limits
+        notes: Optional reason for the new version
+        
+    Returns:
+        Number of (product, parameter) groups frozen
+    """
+    data = db.get_check_data(baseline_start, baseline_end)
+    if data.empty:
+        return 0
+    limits = calculate_control_limits_batch(prepare_spc_series(to_long_format(data)))
+    return db.freeze_control_limits(limits, baseline_start, baseline_end, username, notes)
+
+def get_group_limits(limits, product, parameter):
+    """
+    Look up one group's row of calculate_control_limits_batch as a dict
+    
+    Returns:
+        dict with the keys of calculate_control_limits (plus the MR columns),
+        values None when the group is missing or has no limits
+    """
+    if (product, parameter) not in limits.index:
+        return {'UCL': None, 'LCL': None, 'CL': None, 'sigma': None, 'MR_bar': None, 'MR_UCL': None}
+    row = limits.loc[(product, parameter)]
+    return {key: (None if pd.isna(value) else value) for key, value in row.items()}
+
+# Columns of the rule violation tables
+VIOLATION_COLUMNS = ['product', 'parameter', 'timestamp', 'value', 'chart', 'rule', 'description']
+
+def calculate_group_violations(timestamps, values, moving_ranges, control_limits):
+    """
+    Control chart signals for one (product, parameter) group
+    
+    Matches what the individuals and moving range charts mark: points beyond
+    UCL/LCL (rule 1), Nelson rules 2-8 against CL and sigma, and moving
+    ranges above MR_UCL.
+    
+    Args:
+        timestamps: Group timestamps in time order
+        values: Group values in the same order
+        moving_ranges: Moving ranges in the same order (NaN on the first point)
+        control_limits: dict from get_group_limits
+        
+    Returns:
+        DataFrame with timestamp, value, chart, rule and description columns
+    """
+    columns = VIOLATION_COLUMNS[2:]
+    values = np.asarray(values, dtype=float)
+    if control_limits.get('CL') is None or len(values) < 2:
+        return pd.DataFrame(columns=columns)
+    timestamps = np.asarray(timestamps)
+    moving_ranges = np.asarray(moving_ranges, dtype=float)
+    
+    flags = {1: (values > control_limits['UCL']) | (values < control_limits['LCL'])}
+    flags.update(evaluate_nelson_rules(values, control_limits['CL'], control_limits['sigma'],
+                                       rules=range(2, 9)))
+    
+    frames = [pd.DataFrame({'timestamp': timestamps[mask], 'value': values[mask], 'chart': 'Individuals',
+                            'rule': rule, 'description': NELSON_RULES[rule]})
+              for rule, mask in flags.items() if mask.any()]
+    
+    if control_limits.get('MR_UCL') is not None:
+        high_range = moving_ranges > control_limits['MR_UCL']
+        if high_range.any():
+            frames.append(pd.DataFrame({'timestamp': timestamps[high_range], 'value': moving_ranges[high_range],
+                                        'chart': 'Moving Range', 'rule': 1,
+                                        'description': "Moving range above the upper control limit"}))
+    
+    if not frames:
+        return pd.DataFrame(columns=columns)
+    return pd.concat(frames, ignore_index=True)
+
+def calculate_violations(series, limits):
+    """
+    Rule violations for every (product, parameter) group
+    
+    Args:
+        series: DataFrame from prepare_spc_series
+        limits: DataFrame from calculate_control_limits_batch (or stored limits)
+        
+    Returns:
+        DataFrame with VIOLATION_COLUMNS, newest first
+    """
+    frames = []
+    for (product, parameter), group in series.groupby(['product', 'parameter'], sort=False):
+        found = calculate_group_violations(group['timestamp'], group['value'], group['moving_range'],
+                                           get_group_limits(limits, product, parameter))
+        if not found.empty:
+            frames.append(found.assign(product=product, parameter=parameter))
+    if not frames:
+        return pd.DataFrame(columns=VIOLATION_COLUMNS)
+    return (pd.concat(frames, ignore_index=True)[VIOLATION_COLUMNS]
+            .sort_values(['timestamp', 'product', 'parameter', 'rule'], ascending=[False, True, True, True],
+                         ignore_index=True))
+
+def cached_violations(series, limits):
+    """
+    calculate_violations, reused from session state while series and limits are unchanged
+    
+    Reruns (tab switches, widget changes) on the same data then skip the
+    per-group rule evaluation.
+    """
+    key = data_fingerprint(series, limits)
+    cached = st.session_state.get('_spc_violations')
+    if cached is None or cached[0] != key:
+        cached = (key, calculate_violations(series, limits))
+        st.session_state['_spc_violations'] = cached
+    return cached[1]
+
+def _group_frame(groups, product, parameter):
+    """Rows of one (product, parameter) group with the value under the parameter's name"""
+    try:
+        frame = groups.get_group((product, parameter))
+    except KeyError:
+        return pd.DataFrame(columns=['timestamp', 'product', parameter])
+    return frame[['timestamp', 'product', 'value']].rename(columns={'value': parameter})
+
+# Rational subgroups recorded in one check (five filler heads / five bottles)
+HEAD_COLUMNS = ['head1_torque', 'head2_torque', 'head3_torque', 'head4_torque', 'head5_torque']
+BOTTLE_COLUMNS = ['bottle1_weight', 'bottle2_weight', 'bottle3_weight', 'bottle4_weight', 'bottle5_weight']
+
+# Control chart constants by subgroup size n (ASTM STP 15D)
+SUBGROUP_CONSTANTS = pd.DataFrame({
+    'A2': [1.880, 1.023, 0.729, 0.577, 0.483, 0.419, 0.373, 0.337, 0.308],
+    'A3': [2.659, 1.954, 1.628, 1.427, 1.287, 1.182, 1.099, 1.032, 0.975],
+    'c4': [0.7979, 0.8862, 0.9213, 0.9400, 0.9515, 0.9594, 0.9650, 0.9693, 0.9727],
+    'B3': [0, 0, 0, 0, 0.030, 0.118, 0.185, 0.239, 0.284],
+    'B4': [3.267, 2.568, 2.266, 2.089, 1.970, 1.882, 1.815, 1.761, 1.716],
+    'd2': [1.128, 1.693, 2.059, 2.326, 2.534, 2.704, 2.847, 2.970, 3.078],
+    'D3': [0, 0, 0, 0, 0, 0.076, 0.136, 0.184, 0.223],
+    'D4': [3.267, 2.574, 2.282, 2.114, 2.004, 1.924, 1.864, 1.816, 1.777],
+}, index=pd.RangeIndex(2, 11, name='n'))
+
+def _constants_for(sizes, name):
+    """Look up a constant for an array of subgroup sizes (NaN outside 2-10)"""
+    table = np.full(SUBGROUP_CONSTANTS.index.max() + 1, np.nan)
+    table[SUBGROUP_CONSTANTS.index] = SUBGROUP_CONSTANTS[name].to_numpy()
+    return table[np.clip(sizes, 0, len(table) - 1)]
+
+def calculate_subgroup_statistics(data, columns, chart_type='R'):
+    """
+    Subgroup means, ranges/std devs and X̄-R or X̄-S limits for every row at once
+    
+    Each row of `columns` is one rational subgroup. Statistics are row-wise
+    NumPy reductions over the whole block; missing readings shrink that
+    subgroup and its limits use the constants for its actual size.
+    
+    Args:
+        data: DataFrame with one subgroup per row
+        columns: The subgroup columns (e.g. HEAD_COLUMNS)
+        chart_type: 'R' for X̄-R or 'S' for X̄-S
+        
+    Returns:
+        (stats, summary): stats is a DataFrame aligned to the kept rows with n,
+        xbar, dispersion and per-subgroup limits (xbar_ucl/xbar_lcl,
+        disp_cl/disp_ucl/disp_lcl); summary is a dict with grand_mean, sigma,
+        dispersion_bar and the number of subgroups
+    """
+    values = data[columns].to_numpy(dtype=float)
+    sizes = np.count_nonzero(~np.isnan(values), axis=1)
+    keep = sizes >= 2
+    values, sizes = values[keep], sizes[keep]
+    
+    stats = pd.DataFrame(index=data.index[keep])
+    if not keep.any():
+        return stats, {'grand_mean': None, 'sigma': None, 'dispersion_bar': None, 'subgroups': 0}
+    
+    xbar = np.nanmean(values, axis=1)
+    if chart_type == 'S':
+        dispersion = np.nanstd(values, axis=1, ddof=1)
+        unbias = _constants_for(sizes, 'c4')
+    else:
+        dispersion = np.nanmax(values, axis=1) - np.nanmin(values, axis=1)
+        unbias = _constants_for(sizes, 'd2')
+    
+    # Pooled estimates: grand mean over all readings, sigma from mean of R/d2 (or S/c4)
+    grand_mean = np.nansum(values) / sizes.sum()
+    sigma = np.mean(dispersion / unbias)
+    
+    # 3σ limits for each subgroup's size; for equal sizes these reduce to
+    # X̄ ± A2·R̄, D3·R̄ / D4·R̄ (X̄-R) and X̄ ± A3·S̄, B3·S̄ / B4·S̄ (X̄-S)
+    half_width = 3 * sigma / np.sqrt(sizes)
+    disp_cl = unbias * sigma
+    lower, upper = ('B3', 'B4') if chart_type == 'S' else ('D3', 'D4')
+    
+    stats['n'] = sizes
+    stats['xbar'] = xbar
+    stats['dispersion'] = dispersion
+    stats['xbar_ucl'] = grand_mean + half_width
+    stats['xbar_lcl'] = grand_mean - half_width
+    stats['disp_cl'] = disp_cl
+    stats['disp_ucl'] = _constants_for(sizes, upper) * disp_cl
+    stats['disp_lcl'] = _constants_for(sizes, lower) * disp_cl
+    
+    summary = {
+        'grand_mean': grand_mean,
+        'sigma': sigma,
+        'dispersion_bar': dispersion.mean(),
+        'subgroups': int(keep.sum()),
+    }
+    return stats, summary
+
+def create_subgroup_chart(data, columns, chart_type='R', date_column='timestamp', title=None):
+    """
+    Create an X̄-R or X̄-S chart (subgroup means above, ranges/std devs below)
+    
+    Args:
+        data: DataFrame with one subgroup per row
+        columns: The subgroup columns (e.g. HEAD_COLUMNS)
+        chart_type: 'R' for X̄-R or 'S' for X̄-S
+        date_column: Column for dates (default: 'timestamp')
+        title: Chart title (default: None)
+        
+    Returns:
+        Plotly figure object
+    """
+    dispersion_name = 'Standard Deviation (S)' if chart_type == 'S' else 'Range (R)'
+    if data.empty or not all(col in data.columns for col in columns):
+        fig = go.Figure()
+        fig.update_layout(title="No data available for subgroup chart")
+        return fig
+    
+    data = data.sort_values(by=date_column)
+    stats, summary = calculate_subgroup_statistics(data, columns, chart_type)
+    if summary['subgroups'] < 2:
+        fig = go.Figure()
+        fig.update_layout(title="Insufficient data for subgroup chart")
+        return fig
+    
+    x = data.loc[stats.index, date_column]
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.08,
+                        subplot_titles=("Subgroup Mean (X̄)", dispersion_name))
+    
+    panels = [
+        (1, 'xbar', 'X̄', np.full(len(stats), summary['grand_mean']), 'xbar_ucl', 'xbar_lcl'),
+        (2, 'dispersion', chart_type, stats['disp_cl'], 'disp_ucl', 'disp_lcl'),
+    ]
+    for row, value_col, label, center, ucl_col, lcl_col in panels:
+        fig.add_trace(go.Scatter(x=x, y=stats[value_col], mode='lines+markers', name=label,
+                                 line=dict(color='blue')), row=row, col=1)
+        fig.add_trace(go.Scatter(x=x, y=center, mode='lines', name=f'{label} CL',
+                                 line=dict(color='green', dash='dash', shape='hv')), row=row, col=1)
+        for limit_col, limit_name in [(ucl_col, 'UCL'), (lcl_col, 'LCL')]:
+            fig.add_trace(go.Scatter(x=x, y=stats[limit_col], mode='lines', name=f'{label} {limit_name}',
+                                     line=dict(color='red', dash='dash', shape='hv')), row=row, col=1)
+        
+        out = (stats[value_col] > stats[ucl_col]) | (stats[value_col] < stats[lcl_col])
+        if out.any():
+            fig.add_trace(go.Scatter(x=x[out.to_numpy()], y=stats.loc[out, value_col], mode='markers',
+                                     name=f'{label} Out of Control',
+                                     marker=dict(color='red', size=10, symbol='circle-open')),
+                          row=row, col=1)
+    
+    fig.update_layout(
+        title=title or f"X̄-{chart_type} Chart",
+        height=600,
+        showlegend=False,
+        hovermode="x unified"
+    )
+    return fig
+
+def create_t2_chart(chart, title=None):
+    """
+    Create a Hotelling T² chart using Plotly
+    
+    Args:
+        chart: DataFrame from spc_multivariate.t2_chart_data
+        title: Chart title (default: None)
+        
+    Returns:
+        Plotly figure object
+    """
+    if chart.empty:
+        fig = go.Figure()
+        fig.update_layout(title="Insufficient data for T² chart")
+        return fig
+    
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=chart['timestamp'], y=chart['t2'], mode='lines+markers', name='T²',
+                             line=dict(color='blue')))
+    fig.add_trace(go.Scatter(x=chart['timestamp'], y=chart['ucl'], mode='lines', name='UCL',
+                             line=dict(color='red', dash='dash', shape='hv')))
+    
+    out = chart[chart['out_of_control']]
+    if not out.empty:
+        fig.add_trace(go.Scatter(x=out['timestamp'], y=out['t2'], mode='markers', name='Out of Control',
+                                 marker=dict(color='red', size=10, symbol='circle-open')))
+    
+    phase_two = chart[chart['phase'] == 'Phase II']
+    if not phase_two.empty:
+        fig.add_vline(x=phase_two['timestamp'].iloc[0], line_dash="dot", line_color="gray")
+    
+    fig.update_layout(
+        title=title or "Hotelling T² Chart",
+        xaxis_title="Date",
+        yaxis_title="T²",
+        height=450,
+        hovermode="x unified"
+    )
+    return fig
+
+def create_t2_contribution_chart(row, columns, title=None):
+    """Bar chart of each variable's share of one point's T²"""
+    contributions = row[columns].astype(float)
+    fig = go.Figure(go.Bar(
+        x=[col.replace('_', ' ').title() for col in columns],
+        y=contributions,
+        marker_color=['red' if value == contributions.max() else 'steelblue' for value in contributions]
+    ))
+    fig.update_layout(
+        title=title or f"T² Contributions (T² = {row['t2']:.2f})",
+        yaxis_title="Contribution to T²",
+        height=350
+    )
+    return fig
+
+def show_chart(fig, **kwargs):
+    """st.plotly_chart that records the dashboard's time to first chart"""
+    start = st.session_state.get('_spc_render_start')
+    if start is not None:
+        st.session_state['_spc_render_start'] = None
+        st.session_state['spc_first_chart_s'] = time.perf_counter() - start
+        logger.info(f"SPC time to first chart: {st.session_state['spc_first_chart_s'] * 1000:.0f} ms")
+    st.plotly_chart(fig, **kwargs)
+
+def individuals_chart_pair(frame, parameter, control_limits, label):
+    """
+    Individuals and moving range figures for one group, through the figure cache
+    
+    Used by the dashboard sections and by prefetch_section, so both produce
+    the same cache keys.
+    
+    Returns:
+        (xbar_figure, moving_range_figure)
+    """
+    fig_xbar = cached_figure(create_xbar_chart, frame, parameter,
+                             title=f"Individual Values Chart - {label}",
+                             control_limits=control_limits)
+    fig_mr = cached_figure(create_moving_range_chart, frame, parameter,
+                           title=f"Moving Range Chart - {label}",
+                           control_limits=control_limits)
+    return fig_xbar, fig_mr
+
+def display_t2_section(torque_data):
+    """Show the multivariate T² chart for the five heads with contribution breakdown"""
+    st.markdown("#### Multivariate T² Chart - Heads 1-5")
+    torque_data = torque_data.sort_values('timestamp')
+    
+    baseline_share = st.slider(
+        "Baseline (share of checks, oldest first)", 20, 100, 100, 10, key="t2_baseline",
+        format="%d%%",
+        help="Mean and covariance are estimated once from the baseline; later checks are "
+             "monitored against it (Phase II)"
+    )
+    baseline_mask = np.arange(len(torque_data)) < int(np.ceil(len(torque_data) * baseline_share / 100))
+    chart, baseline = t2_chart_data(torque_data, HEAD_COLUMNS, baseline_mask)
+    
+    if baseline is None:
+        st.info("A T² chart needs more complete checks than heads in the baseline, and heads "
+                "that vary independently (no constant or exactly correlated heads)")
+        return
+    
+    show_chart(cached_figure(create_t2_chart, chart, title="Hotelling T² Chart - Torque Heads"),
+               use_container_width=True)
+    
+    out = chart[chart['out_of_control']]
+    if out.empty:
+        st.success("No multivariate out-of-control points")
+        return
+    
+    st.warning(f"{len(out)} checks are out of control across the five heads")
+    labels = out['timestamp'].astype(str).tolist()
+    selected = st.selectbox("Out-of-control check", labels, key="t2_point")
+    row = out.iloc[labels.index(selected)]
+    show_chart(cached_figure(create_t2_contribution_chart, row, HEAD_COLUMNS), use_container_width=True)
+    
+    summary = out[['timestamp', 't2', 'ucl']].copy()
+    summary['largest_contributor'] = out[HEAD_COLUMNS].idxmax(axis=1).str.replace('_', ' ').str.title()
+    st.dataframe(summary, use_container_width=True, hide_index=True)
+
+def create_xbar_chart(data, value_column, date_column='timestamp', title=None, n_sigma=3,
+                      control_limits=None):
     """
     Create an X-bar control chart using Plotly
     
@@ -57,6 +613,8 @@ def create_xbar_chart(data, value_column, date_column='timestamp', title=None, n
         date_column: Column for dates (default: 'timestamp')
         title: Chart title (default: None)
         n_sigma: Number of standard deviations for control limits (default: 3)
+        control_limits: Precomputed limits dict (CL, UCL, LCL, sigma), e.g. from
+                        get_group_limits; calculated from data when omitted
         
     Returns:
         Plotly figure object
@@ -68,7 +626,8 @@ def create_xbar_chart(data, value_column, date_column='timestamp', title=None, n
         return fig
     
     # Calculate control limits
-    control_limits = calculate_control_limits(data, value_column, n_sigma)
+    if control_limits is None:
+        control_limits = calculate_control_limits(data, value_column, n_sigma)
     
     # If no valid statistics, return empty chart
     if control_limits['CL'] is None:
@@ -79,13 +638,30 @@ def create_xbar_chart(data, value_column, date_column='timestamp', title=None, n
     # Sort data by date
     data = data.sort_values(by=date_column)
     
+    # Flag run/trend patterns (Nelson rules 2-8; rule 1 is the UCL/LCL check below)
+    rule_flags = evaluate_nelson_rules(
+        data[value_column].to_numpy(dtype=float),
+        control_limits['CL'],
+        control_limits['sigma'],
+        rules=range(2, 9)
+    )
+    rule_matrix = np.column_stack(list(rule_flags.values()))
+    violated = rule_matrix.any(axis=1)
+    beyond_limits = ((data[value_column] > control_limits['UCL']) |
+                     (data[value_column] < control_limits['LCL'])).to_numpy()
+    
+    # Draw at most MAX_CHART_POINTS, always keeping flagged points
+    shown = data.iloc[downsample_indices(data[date_column].to_numpy(), data[value_column].to_numpy(dtype=float),
+                                         keep=violated | beyond_limits)]
+    
     # Create figure
     fig = go.Figure()
+    add_envelope(fig, data[date_column].to_numpy(), data[value_column].to_numpy(dtype=float))
     
     # Add data points
-    fig.add_trace(go.Scatter(
-        x=data[date_column],
-        y=data[value_column],
+    fig.add_trace(scatter_class(len(shown))(
+        x=shown[date_column],
+        y=shown[value_column],
         mode='lines+markers',
         name='Data',
         line=dict(color='blue')
@@ -119,10 +695,7 @@ def create_xbar_chart(data, value_column, date_column='timestamp', title=None, n
     ))
     
     # Find out-of-control points
-    out_of_control = data[
-        (data[value_column] > control_limits['UCL']) | 
-        (data[value_column] < control_limits['LCL'])
-    ]
+    out_of_control = data[beyond_limits]
     
     # Add out-of-control points as different markers
     if not out_of_control.empty:
@@ -134,6 +707,23 @@ def create_xbar_chart(data, value_column, date_column='timestamp', title=None, n
             marker=dict(color='red', size=10, symbol='circle-open')
         ))
     
+    # Mark run/trend patterns
+    if violated.any():
+        rule_numbers = np.array(list(rule_flags.keys()))
+        hover_text = [
+            "<br>".join(f"Rule {rule}: {NELSON_RULES[rule]}" for rule in rule_numbers[row])
+            for row in rule_matrix[violated]
+        ]
+        fig.add_trace(scatter_class(violated.sum())(
+            x=data[date_column][violated],
+            y=data[value_column][violated],
+            mode='markers',
+            name='Rule Violation',
+            text=hover_text,
+            hovertemplate='%{x}<br>%{y}<br>%{text}<extra></extra>',
+            marker=dict(color='orange', size=12, symbol='diamond-open')
+        ))
+    
     # Set title and layout
     fig.update_layout(
         title=title if title else f'Control Chart for {value_column}',
@@ -151,7 +741,167 @@ def create_xbar_chart(data, value_column, date_column='timestamp', title=None, n
     
     return fig
 
-def create_moving_range_chart(data, value_column, date_column='timestamp', title=None, n_sigma=3):
+def create_ewma_chart(data, value_column, date_column='timestamp', title=None,
+                      center=None, sigma=None, lam=EWMA_LAMBDA, L=EWMA_L):
+    """
+    Create an EWMA control chart using Plotly
+    
+    Args:
+        data: DataFrame containing the data
+        value_column: Column for values to smooth
+        date_column: Column for dates (default: 'timestamp')
+        title: Chart title (default: None)
+        center: Target / center line (default: data mean)
+        sigma: Process standard deviation (default: data std)
+        lam: Smoothing constant (default: EWMA_LAMBDA)
+        L: Limit width in EWMA standard deviations (default: EWMA_L)
+        
+    Returns:
+        Plotly figure object
+    """
+    if data.empty or value_column not in data.columns:
+        fig = go.Figure()
+        fig.update_layout(title="No data available for EWMA chart")
+        return fig
+    
+    data = data.dropna(subset=[value_column]).sort_values(by=date_column)
+    if len(data) < 2:
+        fig = go.Figure()
+        fig.update_layout(title="Insufficient data for EWMA chart")
+        return fig
+    
+    ewma = ewma_statistics(data[value_column].to_numpy(dtype=float), center, sigma, lam, L)
+    x = data[date_column]
+    
+    out = ewma['out_of_control']
+    shown = downsample_indices(x.to_numpy(), ewma['ewma'], keep=out)
+    trace = scatter_class(len(shown))
+    xs = x.iloc[shown]
+    
+    fig = go.Figure()
+    fig.add_trace(trace(x=xs, y=data[value_column].iloc[shown], mode='markers', name='Data',
+                        marker=dict(color='lightgray', size=6)))
+    fig.add_trace(trace(x=xs, y=ewma['ewma'][shown], mode='lines+markers', name=f'EWMA (λ={lam})',
+                        line=dict(color='blue')))
+    fig.add_trace(go.Scatter(x=[x.min(), x.max()], y=[ewma['center'], ewma['center']], mode='lines',
+                             name='Center Line', line=dict(color='green', dash='dash')))
+    fig.add_trace(trace(x=xs, y=ewma['ucl'][shown], mode='lines', name=f'UCL ({L}σ EWMA)',
+                        line=dict(color='red', dash='dash')))
+    fig.add_trace(trace(x=xs, y=ewma['lcl'][shown], mode='lines', name=f'LCL ({L}σ EWMA)',
+                        line=dict(color='red', dash='dash')))
+    
+    if out.any():
+        fig.add_trace(scatter_class(out.sum())(x=x[out], y=ewma['ewma'][out], mode='markers', name='Drift Signal',
+                                               marker=dict(color='red', size=10, symbol='circle-open')))
+    
+    fig.update_layout(
+        title=title or f"EWMA Chart for {value_column}",
+        xaxis_title="Date",
+        yaxis_title=value_column,
+        height=500,
+        hovermode="x unified",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    return fig
+
+def create_cusum_chart(data, value_column, date_column='timestamp', title=None,
+                       center=None, sigma=None, k=CUSUM_K, h=CUSUM_H):
+    """
+    Create a tabular CUSUM chart using Plotly
+    
+    Args:
+        data: DataFrame containing the data
+        value_column: Column for values to accumulate
+        date_column: Column for dates (default: 'timestamp')
+        title: Chart title (default: None)
+        center: Target / center line (default: data mean)
+        sigma: Process standard deviation (default: data std)
+        k: Reference value in sigma units (default: CUSUM_K)
+        h: Decision interval in sigma units (default: CUSUM_H)
+        
+    Returns:
+        Plotly figure object
+    """
+    if data.empty or value_column not in data.columns:
+        fig = go.Figure()
+        fig.update_layout(title="No data available for CUSUM chart")
+        return fig
+    
+    data = data.dropna(subset=[value_column]).sort_values(by=date_column)
+    if len(data) < 2:
+        fig = go.Figure()
+        fig.update_layout(title="Insufficient data for CUSUM chart")
+        return fig
+    
+    cusum = cusum_statistics(data[value_column].to_numpy(dtype=float), center, sigma, k, h)
+    x = data[date_column]
+    
+    out = cusum['out_of_control']
+    fig = go.Figure()
+    # Plot the lower CUSUM below zero so both sides share one decision band
+    for values, name, color in [(cusum['upper'], 'C+ (upward shift)', 'blue'),
+                                (-cusum['lower'], 'C- (downward shift)', 'purple')]:
+        shown = downsample_indices(x.to_numpy(), values, keep=out)
+        fig.add_trace(scatter_class(len(shown))(x=x.iloc[shown], y=values[shown], mode='lines+markers',
+                                                name=name, line=dict(color=color)))
+    for level, name in [(cusum['threshold'], f'H = {h}σ'), (-cusum['threshold'], f'-H = -{h}σ')]:
+        fig.add_trace(go.Scatter(x=[x.min(), x.max()], y=[level, level], mode='lines', name=name,
+                                 line=dict(color='red', dash='dash')))
+    
+    if out.any():
+        signal = np.where(cusum['upper'] > cusum['threshold'], cusum['upper'], -cusum['lower'])
+        fig.add_trace(scatter_class(out.sum())(x=x[out], y=signal[out], mode='markers', name='Drift Signal',
+                                               marker=dict(color='red', size=10, symbol='circle-open')))
+    
+    fig.update_layout(
+        title=title or f"CUSUM Chart for {value_column}",
+        xaxis_title="Date",
+        yaxis_title="Cumulative Sum",
+        height=500,
+        hovermode="x unified",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    return fig
+
+def display_drift_charts(data, value_column, control_limits, label, key):
+    """
+    Show an EWMA or CUSUM chart for one parameter with its tuning controls
+    
+    Args:
+        data: DataFrame with timestamp and value_column
+        value_column: Column to chart
+        control_limits: Limits dict for the group (CL and sigma_mr/sigma are used)
+        label: Parameter name shown in titles
+        key: Unique widget key prefix
+    """
+    st.markdown(f"#### Drift Detection - {label}")
+    center = control_limits.get('CL')
+    # Short-term sigma from the moving range, as for the individuals chart
+    sigma = control_limits.get('sigma_mr')
+    if sigma is None or not np.isfinite(sigma) or sigma <= 0:
+        sigma = control_limits.get('sigma')
+    
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        chart = st.radio("Chart", ["EWMA", "CUSUM"], horizontal=True, key=f"{key}_drift_chart",
+                         help="EWMA and CUSUM accumulate evidence over many points, "
+                              "so they catch small sustained shifts the individuals chart misses")
+    with col2:
+        if chart == "EWMA":
+            lam = st.slider("λ (weight of newest point)", 0.05, 1.0, EWMA_LAMBDA, 0.05, key=f"{key}_ewma_lambda")
+        else:
+            k = st.slider("k (allowance, σ)", 0.25, 1.5, CUSUM_K, 0.25, key=f"{key}_cusum_k")
+    
+    if chart == "EWMA":
+        fig = cached_figure(create_ewma_chart, data, value_column, title=f"EWMA Chart - {label}",
+                            center=center, sigma=sigma, lam=lam)
+    else:
+        fig = cached_figure(create_cusum_chart, data, value_column, title=f"CUSUM Chart - {label}",
+                            center=center, sigma=sigma, k=k)
+    show_chart(fig, use_container_width=True)
+
+def create_moving_range_chart(data, value_column, date_column='timestamp', title=None, n_sigma=3,
+                              control_limits=None):
     """
     Create a Moving Range chart using Plotly
     
@@ -161,6 +911,8 @@ def create_moving_range_chart(data, value_column, date_column='timestamp', title
         date_column: Column for dates (default: 'timestamp')
         title: Chart title (default: None)
         n_sigma: Number of standard deviations for control limits (default: 3)
+        control_limits: Precomputed limits dict with MR_bar and MR_UCL, e.g. from
+                        get_group_limits; calculated from data when omitted
         
     Returns:
         Plotly figure object
@@ -186,12 +938,15 @@ def create_moving_range_chart(data, value_column, date_column='timestamp', title
     moving_ranges = values.diff().abs()
     
     # Calculate control limits for moving ranges
-    mr_mean = moving_ranges.mean()
-    mr_std = moving_ranges.std()
-    
-    # For moving range charts, the standard formula for control limits is different
-    d2 = 1.128  # Constant for n=2 (moving range of 2 consecutive points)
-    mr_ucl = mr_mean + (3 * mr_mean / d2)
+    if control_limits is not None and control_limits.get('MR_bar') is not None:
+        mr_mean = control_limits['MR_bar']
+        mr_ucl = control_limits['MR_UCL']
+    else:
+        mr_mean = moving_ranges.mean()
+        
+        # For moving range charts, the standard formula for control limits is different
+        d2 = D2_MR  # Constant for n=2 (moving range of 2 consecutive points)
+        mr_ucl = mr_mean + (3 * mr_mean / d2)
     mr_lcl = 0  # Lower control limit for ranges is always 0
     
     # Create DataFrame for plotting
@@ -200,13 +955,19 @@ def create_moving_range_chart(data, value_column, date_column='timestamp', title
         'moving_range': moving_ranges.iloc[1:].reset_index(drop=True)
     })
     
+    # Draw at most MAX_CHART_POINTS, always keeping points above the UCL
+    mr_values = mr_data['moving_range'].to_numpy(dtype=float)
+    shown = mr_data.iloc[downsample_indices(mr_data[date_column].to_numpy(), mr_values,
+                                            keep=mr_values > mr_ucl)]
+    
     # Create figure
     fig = go.Figure()
+    add_envelope(fig, mr_data[date_column].to_numpy(), mr_values)
     
     # Add moving range data points
-    fig.add_trace(go.Scatter(
-        x=mr_data[date_column],
-        y=mr_data['moving_range'],
+    fig.add_trace(scatter_class(len(shown))(
+        x=shown[date_column],
+        y=shown['moving_range'],
         mode='lines+markers',
         name='Moving Range',
         line=dict(color='blue')
@@ -272,318 +1033,443 @@ def create_moving_range_chart(data, value_column, date_column='timestamp', title
     
     return fig
 
-def display_spc_dashboard(start_date, end_date, product_filter=None):
-    """
-    Display an SPC dashboard with multiple charts
+def _render_torque_section(data, groups, limits):
+    """Render the Torque tab of the SPC dashboard"""
+    st.subheader("Torque Statistical Process Control")
     
-    Args:
-        start_date: Start date for filtering data
-        end_date: End date for filtering data
-        product_filter: Optional product filter
-    """
-    # Get data using the class method
-    data = db.get_check_data(start_date, end_date, product_filter)
+    # Filter for torque data
+    torque_data = data[data['source'] == 'torque_tamper']
+    quality_torque_data = data[data['source'] == 'quality_check'].copy()
     
-    if data.empty:
-        st.warning("No data available for the selected time period")
-        return
+    # Check if we have torque test data in the quality checks
+    if 'torque_test' in quality_torque_data.columns:
+        st.markdown("#### Overall Torque Test Results")
+        # Convert PASS/FAIL to 1/0 for charting purposes
+        if quality_torque_data['torque_test'].notna().sum() > 0:
+            quality_torque_data['torque_numeric'] = quality_torque_data['torque_test'].apply(lambda x: 1 if x == 'PASS' else 0)
+            
+            # Calculate pass rate percentage
+            pass_rate = quality_torque_data['torque_numeric'].mean() * 100
+            st.metric("Torque Test Pass Rate", f"{pass_rate:.1f}%")
+            
+            # Display torque test trend if we have enough data
+            if quality_torque_data['torque_numeric'].notna().sum() >= 5:
+                fig = go.Figure()
+                fig.add_trace(go.Scatter(
+                    x=quality_torque_data['timestamp'],
+                    y=quality_torque_data['torque_numeric'].rolling(window=5, min_periods=1).mean() * 100,
+                    mode='lines+markers',
+                    name='Pass Rate (5-point moving average)',
+                    line=dict(color='blue')
+                ))
+                fig.update_layout(
+                    title="Torque Test Pass Rate Trend",
+                    xaxis_title="Date",
+                    yaxis_title="Pass Rate (%)",
+                    yaxis=dict(range=[0, 105]),
+                    height=300
+                )
+                show_chart(fig, use_container_width=True)
+    
+    if not torque_data.empty and all(col in torque_data.columns for col in HEAD_COLUMNS):
+        st.markdown("#### Subgroup Chart - Heads 1-5")
+        torque_chart_type = st.radio(
+            "Chart Type", ["X̄-R", "X̄-S"], horizontal=True, key="torque_subgroup_chart",
+            help="Each check's five head readings form one subgroup"
+        )[-1]
+        show_chart(
+            cached_figure(create_subgroup_chart, torque_data, HEAD_COLUMNS, torque_chart_type,
+                          title=f"X̄-{torque_chart_type} Chart - Torque (Heads 1-5)"),
+            use_container_width=True
+        )
+        
+        display_t2_section(torque_data)
+    
+    if not torque_data.empty:
+        st.markdown("#### Individual Torque Measurements")
+        # Create individual charts for each head
+        for head in HEAD_COLUMNS:
+            head_data = _group_frame(groups, ALL_PRODUCTS, head)
+            head_limits = get_group_limits(limits, ALL_PRODUCTS, head)
+            
+            # Skip if no non-NA values
+            if len(head_data) < 2:
+                continue
+                
+            st.markdown(f"#### {head.replace('_', ' ').title()}")
+            
+            fig_xbar, fig_mr = individuals_chart_pair(head_data, head, head_limits, head.replace('_', ' ').title())
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                # X-bar chart
+                show_chart(fig_xbar, use_container_width=True)
+            
+            with col2:
+                # Moving Range chart
+                show_chart(fig_mr, use_container_width=True)
+            
+            # Add torque metrics
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Average Torque", f"{head_limits['mean']:.2f}")
+            with col2:
+                st.metric("Min Torque", f"{head_limits['min']:.2f}")
+            with col3:
+                st.metric("Max Torque", f"{head_limits['max']:.2f}")
+            
+            # Add specification limits (torque is not product-specific)
+            registry = get_spec_registry()
+            st.markdown(f"**Specification Limits**: {registry.spec_text(head)}")
+            
+            # Calculate percentage within the limits in force at each measurement
+            out_of_spec, _ = registry.flag_out_of_spec(head_data[['timestamp', head]], [head])
+            within_spec = ((out_of_spec == 0) & head_data[head].notna().to_numpy()).mean() * 100
+            st.metric("Percentage Within Spec", f"{within_spec:.1f}%")
+            
+            st.markdown("---")
+    else:
+        st.info("No torque data available for the selected time period")
+
+def _render_brix_section(data, groups, limits):
+    """Render the BRIX tab of the SPC dashboard"""
+    st.subheader("BRIX Statistical Process Control")
     
-    # Create tabs for different chart types
-    tab_torque, tab_brix, tab_weight, tab_net_content = st.tabs(["Torque", "BRIX", "Average Weight", "Net Content"])
+    # BRIX data (from net_content and quality_check) is already grouped per product
+    brix_data = _group_frame(groups, ALL_PRODUCTS, 'brix')
+    brix_limits = get_group_limits(limits, ALL_PRODUCTS, 'brix')
     
-    with tab_torque:
-        st.subheader("Torque Statistical Process Control")
+    if len(brix_data) >= 2:
+        # Add product-specific analysis if we have product information
+        products = sorted(
+            product for product, parameter in limits.index
+            if parameter == 'brix' and product != ALL_PRODUCTS
+        )
+        if len(products) > 1:
+            selected_product = st.selectbox("Select Product for BRIX Analysis", 
+                                          [ALL_PRODUCTS] + products)
+            
+            if selected_product != ALL_PRODUCTS:
+                brix_data = _group_frame(groups, selected_product, 'brix')
+                brix_limits = get_group_limits(limits, selected_product, 'brix')
+                st.subheader(f"BRIX Analysis for {selected_product}")
         
-        # Filter for torque data
-        torque_data = data[data['source'] == 'torque_tamper'].copy()
-        quality_torque_data = data[data['source'] == 'quality_check'].copy()
+        fig_brix, fig_brix_mr = individuals_chart_pair(brix_data, 'brix', brix_limits, "BRIX")
+        col1, col2 = st.columns(2)
         
-        # Check if we have torque test data in the quality checks
-        if 'torque_test' in quality_torque_data.columns:
-            st.markdown("#### Overall Torque Test Results")
-            # Convert PASS/FAIL to 1/0 for charting purposes
-            if quality_torque_data['torque_test'].notna().sum() > 0:
-                quality_torque_data['torque_numeric'] = quality_torque_data['torque_test'].apply(lambda x: 1 if x == 'PASS' else 0)
+        with col1:
+            # X-bar chart for BRIX
+            show_chart(fig_brix, use_container_width=True)
+        
+        with col2:
+            # Moving Range chart for BRIX
+            show_chart(fig_brix_mr, use_container_width=True)
+        
+        # Add BRIX metrics
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Average BRIX", f"{brix_limits['mean']:.2f}")
+        with col2:
+            st.metric("Min BRIX", f"{brix_limits['min']:.2f}")
+        with col3:
+            st.metric("Max BRIX", f"{brix_limits['max']:.2f}")
+        with col4:
+            st.metric("BRIX Std Dev", f"{brix_limits['std']:.3f}")
+        
+        # BRIX trend chart
+        st.markdown("#### BRIX Trend")
+        fig = go.Figure()
+        
+        # Group rows are already in timestamp order
+        trend_data = brix_data
+        timestamps = trend_data['timestamp'].to_numpy()
+        brix_values = trend_data['brix'].to_numpy(dtype=float)
+        
+        # Add individual data points (min/max per bucket so spikes survive downsampling)
+        add_envelope(fig, timestamps, brix_values)
+        shown = downsample_indices(timestamps, brix_values, method='minmax')
+        fig.add_trace(scatter_class(len(shown))(
+            x=timestamps[shown],
+            y=brix_values[shown],
+            mode='markers',
+            name='BRIX Values',
+            marker=dict(color='blue', size=8)
+        ))
+        
+        # Add trend line (moving average)
+        if len(trend_data) >= 3:
+            trend = trend_data['brix'].rolling(window=3, min_periods=1).mean().to_numpy()
+            shown = downsample_indices(timestamps, trend)
+            fig.add_trace(scatter_class(len(shown))(
+                x=timestamps[shown],
+                y=trend[shown],
+                mode='lines',
+                name='Trend (3-point MA)',
+                line=dict(color='red', width=2)
+            ))
+        
+        fig.update_layout(
+            title="BRIX Trend Over Time",
+            xaxis_title="Date",
+            yaxis_title="BRIX Value",
+            height=400
+        )
+        show_chart(fig, use_container_width=True)
+        
+        display_drift_charts(brix_data, 'brix', brix_limits, "BRIX", key="brix")
+    else:
+        st.info("Insufficient BRIX data for SPC analysis")
+
+def _render_weight_section(data, groups, limits):
+    """Render the Average Weight tab of the SPC dashboard"""
+    st.subheader("Average Weight Statistical Process Control")
+    
+    # Filter for average weight data
+    weight_data = _group_frame(groups, ALL_PRODUCTS, 'average_weight')
+    weight_limits = get_group_limits(limits, ALL_PRODUCTS, 'average_weight')
+    bottle_data = data[data['source'] == 'net_content']
+    
+    if not bottle_data.empty and 'average_weight' in bottle_data.columns:
+        # Check if enough non-NA values
+        if len(weight_data) >= 2:
+            fig_weight, fig_weight_mr = individuals_chart_pair(weight_data, 'average_weight', weight_limits,
+                                                               "Average Weight")
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                # X-bar chart for Average Weight
+                show_chart(fig_weight, use_container_width=True)
+            
+            with col2:
+                # Moving Range chart for Average Weight
+                show_chart(fig_weight_mr, use_container_width=True)
+            
+            # Weight metrics
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                st.metric("Average Weight", f"{weight_limits['mean']:.2f}")
+            with col2:
+                st.metric("Min Weight", f"{weight_limits['min']:.2f}")
+            with col3:
+                st.metric("Max Weight", f"{weight_limits['max']:.2f}")
+            with col4:
+                st.metric("Weight Std Dev", f"{weight_limits['std']:.3f}")
+            
+            display_drift_charts(weight_data, 'average_weight', weight_limits, "Average Weight",
+                                 key="weight")
+            
+            # Show individual bottle weights as subgroups and as a distribution
+            if all(col in bottle_data.columns for col in BOTTLE_COLUMNS):
+                st.markdown("#### Subgroup Chart - Bottles 1-5")
+                weight_chart_type = st.radio(
+                    "Chart Type", ["X̄-R", "X̄-S"], horizontal=True, key="weight_subgroup_chart",
+                    help="Each check's five bottle weights form one subgroup"
+                )[-1]
+                show_chart(
+                    cached_figure(create_subgroup_chart, bottle_data, BOTTLE_COLUMNS, weight_chart_type,
+                                  title=f"X̄-{weight_chart_type} Chart - Bottle Weights"),
+                    use_container_width=True
+                )
                 
-                # Calculate pass rate percentage
-                pass_rate = quality_torque_data['torque_numeric'].mean() * 100
-                st.metric("Torque Test Pass Rate", f"{pass_rate:.1f}%")
+                st.markdown("#### Individual Bottle Weights Distribution")
                 
-                # Display torque test trend if we have enough data
-                if quality_torque_data['torque_numeric'].notna().sum() >= 5:
+                # All individual bottle weights
+                all_weights = bottle_data[BOTTLE_COLUMNS].to_numpy(dtype=float).ravel()
+                all_weights = all_weights[~np.isnan(all_weights)]
+                
+                if all_weights.size:
+                    # Create histogram
                     fig = go.Figure()
-                    fig.add_trace(go.Scatter(
-                        x=quality_torque_data['timestamp'],
-                        y=quality_torque_data['torque_numeric'].rolling(window=5, min_periods=1).mean() * 100,
-                        mode='lines+markers',
-                        name='Pass Rate (5-point moving average)',
-                        line=dict(color='blue')
+                    fig.add_trace(go.Histogram(
+                        x=all_weights,
+                        nbinsx=20,
+                        marker_color='blue',
+                        opacity=0.7
                     ))
-                    fig.update_layout(
-                        title="Torque Test Pass Rate Trend",
-                        xaxis_title="Date",
-                        yaxis_title="Pass Rate (%)",
-                        yaxis=dict(range=[0, 105]),
-                        height=300
-                    )
-                    st.plotly_chart(fig, use_container_width=True)
-        
-        if not torque_data.empty:
-            st.markdown("#### Individual Torque Measurements")
-            # Create individual charts for each head
-            for head in ['head1_torque', 'head2_torque', 'head3_torque', 'head4_torque', 'head5_torque']:
-                # Skip if no non-NA values
-                if torque_data[head].notna().sum() < 2:
-                    continue
                     
-                st.markdown(f"#### {head.replace('_', ' ').title()}")
-                
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    # X-bar chart
-                    fig_xbar = create_xbar_chart(
-                        torque_data, 
-                        head, 
-                        title=f"Individual Values Chart - {head.replace('_', ' ').title()}"
-                    )
-                    st.plotly_chart(fig_xbar, use_container_width=True)
-                
-                with col2:
-                    # Moving Range chart
-                    fig_mr = create_moving_range_chart(
-                        torque_data,
-                        head,
-                        title=f"Moving Range Chart - {head.replace('_', ' ').title()}"
+                    fig.update_layout(
+                        title="Distribution of Individual Bottle Weights",
+                        xaxis_title="Weight",
+                        yaxis_title="Count",
+                        height=400
                     )
-                    st.plotly_chart(fig_mr, use_container_width=True)
-                
-                # Add torque metrics
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("Average Torque", f"{torque_data[head].mean():.2f}")
-                with col2:
-                    st.metric("Min Torque", f"{torque_data[head].min():.2f}")
-                with col3:
-                    st.metric("Max Torque", f"{torque_data[head].max():.2f}")
-                
-                # Add specification limits
-                st.markdown("**Specification Limits**: 5.0 - 12.0")
-                
-                # Calculate percentage within specs
-                within_spec = ((torque_data[head] >= 5.0) & (torque_data[head] <= 12.0)).mean() * 100
-                st.metric("Percentage Within Spec", f"{within_spec:.1f}%")
-                
-                st.markdown("---")
+                    show_chart(fig, use_container_width=True)
         else:
-            st.info("No torque data available for the selected time period")
-    
-    with tab_brix:
-        st.subheader("BRIX Statistical Process Control")
-        
-        # Filter for brix data (can be in either net_content or quality_check)
-        brix_data = pd.concat([
-            data[data['source'] == 'net_content'][['timestamp', 'brix', 'product']],
-            data[data['source'] == 'quality_check'][['timestamp', 'brix', 'product']]
-        ]).dropna(subset=['brix'])
-        
-        if len(brix_data) >= 2:
-            # Add product-specific analysis if we have product information
-            if 'product' in brix_data.columns and brix_data['product'].notna().any():
-                # Get unique products for selection
-                products = sorted(brix_data['product'].dropna().unique())
-                if len(products) > 1:
-                    selected_product = st.selectbox("Select Product for BRIX Analysis", 
-                                                  ["All Products"] + list(products))
-                    
-                    if selected_product != "All Products":
-                        brix_data = brix_data[brix_data['product'] == selected_product]
-                        st.subheader(f"BRIX Analysis for {selected_product}")
-            
+            st.info("Insufficient Average Weight data for SPC analysis")
+    else:
+        st.info("No Average Weight data available for the selected time period")
+
+def _render_net_content_section(data, groups, limits):
+    """Render the Net Content tab of the SPC dashboard"""
+    st.subheader("Net Content Statistical Process Control")
+    
+    # Filter for net content data
+    net_content_data = _group_frame(groups, ALL_PRODUCTS, 'net_content')
+    net_content_limits = get_group_limits(limits, ALL_PRODUCTS, 'net_content')
+    
+    if not data[data['source'] == 'net_content'].empty and 'net_content' in data.columns:
+        # Check if enough non-NA values
+        if len(net_content_data) >= 2:
+            fig_nc, fig_nc_mr = individuals_chart_pair(net_content_data, 'net_content', net_content_limits,
+                                                       "Net Content")
             col1, col2 = st.columns(2)
             
             with col1:
-                # X-bar chart for BRIX
-                fig_brix = create_xbar_chart(
-                    brix_data, 
-                    'brix', 
-                    title="Individual Values Chart - BRIX"
-                )
-                st.plotly_chart(fig_brix, use_container_width=True)
+                # X-bar chart for Net Content
+                show_chart(fig_nc, use_container_width=True)
             
             with col2:
-                # Moving Range chart for BRIX
-                fig_brix_mr = create_moving_range_chart(
-                    brix_data,
-                    'brix',
-                    title="Moving Range Chart - BRIX"
-                )
-                st.plotly_chart(fig_brix_mr, use_container_width=True)
+                # Moving Range chart for Net Content
+                show_chart(fig_nc_mr, use_container_width=True)
             
-            # Add BRIX metrics
+            # Net content metrics
             col1, col2, col3, col4 = st.columns(4)
             with col1:
-                st.metric("Average BRIX", f"{brix_data['brix'].mean():.2f}")
+                st.metric("Average Net Content", f"{net_content_limits['mean']:.2f}")
             with col2:
-                st.metric("Min BRIX", f"{brix_data['brix'].min():.2f}")
+                st.metric("Min Net Content", f"{net_content_limits['min']:.2f}")
             with col3:
-                st.metric("Max BRIX", f"{brix_data['brix'].max():.2f}")
+                st.metric("Max Net Content", f"{net_content_limits['max']:.2f}")
             with col4:
-                st.metric("BRIX Std Dev", f"{brix_data['brix'].std():.3f}")
+                st.metric("Net Content Std Dev", f"{net_content_limits['std']:.3f}")
             
-            # BRIX trend chart
-            st.markdown("#### BRIX Trend")
-            fig = go.Figure()
-            
-            # Sort data by timestamp for trend analysis
-            trend_data = brix_data.sort_values('timestamp')
-            
-            # Add individual data points
-            fig.add_trace(go.Scatter(
-                x=trend_data['timestamp'],
-                y=trend_data['brix'],
-                mode='markers',
-                name='BRIX Values',
-                marker=dict(color='blue', size=8)
-            ))
-            
-            # Add trend line (moving average)
-            if len(trend_data) >= 3:
-                fig.add_trace(go.Scatter(
-                    x=trend_data['timestamp'],
-                    y=trend_data['brix'].rolling(window=3, min_periods=1).mean(),
-                    mode='lines',
-                    name='Trend (3-point MA)',
-                    line=dict(color='red', width=2)
-                ))
-            
-            fig.update_layout(
-                title="BRIX Trend Over Time",
-                xaxis_title="Date",
-                yaxis_title="BRIX Value",
-                height=400
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            display_drift_charts(net_content_data, 'net_content', net_content_limits, "Net Content",
+                                 key="net_content")
         else:
-            st.info("Insufficient BRIX data for SPC analysis")
+            st.info("Insufficient Net Content data for SPC analysis")
+    else:
+        st.info("No Net Content data available for the selected time period")
+
+# Dashboard tabs in display order
+SPC_SECTIONS = {
+    "Torque": _render_torque_section,
+    "BRIX": _render_brix_section,
+    "Average Weight": _render_weight_section,
+    "Net Content": _render_net_content_section,
+}
+
+# Parameters whose individuals / moving range charts each tab opens with, and their labels
+SECTION_CHARTS = {
+    "Torque": [(head, head.replace('_', ' ').title()) for head in HEAD_COLUMNS],
+    "BRIX": [('brix', "BRIX")],
+    "Average Weight": [('average_weight', "Average Weight")],
+    "Net Content": [('net_content', "Net Content")],
+}
+
+def _prefetch_figures(section, groups, limits):
+    for parameter, label in SECTION_CHARTS[section]:
+        frame = _group_frame(groups, ALL_PRODUCTS, parameter)
+        if len(frame) >= 2:
+            individuals_chart_pair(frame, parameter, get_group_limits(limits, ALL_PRODUCTS, parameter), label)
+
+def prefetch_section(section, groups, limits):
+    """
+    Build a tab's default charts into the figure cache on a background thread
     
-    with tab_weight:
-        st.subheader("Average Weight Statistical Process Control")
-        
-        # Filter for average weight data
-        weight_data = data[data['source'] == 'net_content'].copy()
-        
-        if not weight_data.empty and 'average_weight' in weight_data.columns:
-            # Check if enough non-NA values
-            if weight_data['average_weight'].notna().sum() >= 2:
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    # X-bar chart for Average Weight
-                    fig_weight = create_xbar_chart(
-                        weight_data, 
-                        'average_weight', 
-                        title="Individual Values Chart - Average Weight"
-                    )
-                    st.plotly_chart(fig_weight, use_container_width=True)
-                
-                with col2:
-                    # Moving Range chart for Average Weight
-                    fig_weight_mr = create_moving_range_chart(
-                        weight_data,
-                        'average_weight',
-                        title="Moving Range Chart - Average Weight"
-                    )
-                    st.plotly_chart(fig_weight_mr, use_container_width=True)
-                
-                # Weight metrics
-                col1, col2, col3, col4 = st.columns(4)
-                with col1:
-                    st.metric("Average Weight", f"{weight_data['average_weight'].mean():.2f}")
-                with col2:
-                    st.metric("Min Weight", f"{weight_data['average_weight'].min():.2f}")
-                with col3:
-                    st.metric("Max Weight", f"{weight_data['average_weight'].max():.2f}")
-                with col4:
-                    st.metric("Weight Std Dev", f"{weight_data['average_weight'].std():.3f}")
-                
-                # Show individual bottle weights distribution if available
-                bottle_cols = ['bottle1_weight', 'bottle2_weight', 'bottle3_weight', 
-                               'bottle4_weight', 'bottle5_weight']
-                if all(col in weight_data.columns for col in bottle_cols):
-                    st.markdown("#### Individual Bottle Weights Distribution")
-                    
-                    # Gather all individual bottle weights
-                    all_weights = []
-                    for col in bottle_cols:
-                        all_weights.extend(weight_data[col].dropna().tolist())
-                    
-                    if all_weights:
-                        # Create histogram
-                        fig = go.Figure()
-                        fig.add_trace(go.Histogram(
-                            x=all_weights,
-                            nbinsx=20,
-                            marker_color='blue',
-                            opacity=0.7
-                        ))
-                        
-                        fig.update_layout(
-                            title="Distribution of Individual Bottle Weights",
-                            xaxis_title="Weight",
-                            yaxis_title="Count",
-                            height=400
-                        )
-                        st.plotly_chart(fig, use_container_width=True)
-            else:
-                st.info("Insufficient Average Weight data for SPC analysis")
+    Only pure figure building runs off the script thread; nothing here calls
+    Streamlit. When the user opens the tab the charts are cache hits.
+    
+    Returns:
+        The Future for the prefetch
+    """
+    global _prefetch_executor
+    if _prefetch_executor is None:
+        _prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="spc-prefetch")
+    future = _prefetch_executor.submit(_prefetch_figures, section, groups, limits)
+    future.add_done_callback(
+        lambda f: f.exception() and logger.warning(f"Prefetching {section} charts failed: {f.exception()}")
+    )
+    return future
+
+def display_spc_dashboard(start_date, end_date, product_filter=None, use_frozen_limits=False, period=None):
+    """
+    Display an SPC dashboard with multiple charts
+    
+    Args:
+        start_date: Start date for filtering data
+        end_date: End date for filtering data
+        product_filter: Optional product filter
+        use_frozen_limits: Evaluate against stored Phase I limits (Phase II)
+                           instead of limits from the selected period
+        period: Predefined period name (key of SPC_PERIODS); when a recent
+                spc_batch run covers it, its limits and violations are used
+    """
+    render_start = time.perf_counter()
+    st.session_state['_spc_render_start'] = render_start
+    
+    # Get data using the class method
+    data = db.get_check_data(start_date, end_date, product_filter)
+    
+    if data.empty:
+        st.warning("No data available for the selected time period")
+        return
+    
+    # Sort once and compute limits for every (product, parameter) group in one pass
+    series = prepare_spc_series(to_long_format(data))
+    groups = series.groupby(['product', 'parameter'], sort=False)
+    
+    # Use the batch job's results when it has covered this period recently
+    batch_run = None
+    if period in SPC_PERIODS and not product_filter:
+        batch_run = db.get_latest_spc_batch_run(period, end_date, 'Phase II' if use_frozen_limits else 'Phase I',
+                                                SPC_BATCH_MAX_AGE_MINUTES)
+    if batch_run is not None:
+        limits = db.get_spc_batch_limits(batch_run['id'])
+        violations = db.get_spc_batch_violations(batch_run['id'])
+        st.caption(f"Limits and rule violations precomputed by the SPC batch job at "
+                   f"{pd.Timestamp(batch_run['finished_at']):%Y-%m-%d %H:%M}")
+    else:
+        limits = calculate_control_limits_batch(series)
+        if use_frozen_limits:
+            limits = apply_frozen_limits(limits, db.get_active_control_limits())
+        violations = None
+    
+    if use_frozen_limits:
+        frozen_groups = limits[limits['phase'] == 'Phase II']
+        if frozen_groups.empty:
+            st.warning("No frozen control limits found - showing limits calculated from the selected period")
         else:
-            st.info("No Average Weight data available for the selected time period")
+            st.info(f"Phase II: {len(frozen_groups)} of {len(limits)} product/parameter groups are "
+                    f"evaluated against frozen limits; the rest use limits from the selected period")
     
-    with tab_net_content:
-        st.subheader("Net Content Statistical Process Control")
-        
-        # Filter for net content data
-        net_content_data = data[data['source'] == 'net_content'].copy()
-        
-        if not net_content_data.empty and 'net_content' in net_content_data.columns:
-            # Check if enough non-NA values
-            if net_content_data['net_content'].notna().sum() >= 2:
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    # X-bar chart for Net Content
-                    fig_nc = create_xbar_chart(
-                        net_content_data, 
-                        'net_content', 
-                        title="Individual Values Chart - Net Content"
-                    )
-                    st.plotly_chart(fig_nc, use_container_width=True)
-                
-                with col2:
-                    # Moving Range chart for Net Content
-                    fig_nc_mr = create_moving_range_chart(
-                        net_content_data,
-                        'net_content',
-                        title="Moving Range Chart - Net Content"
-                    )
-                    st.plotly_chart(fig_nc_mr, use_container_width=True)
-                
-                # Net content metrics
-                col1, col2, col3, col4 = st.columns(4)
-                with col1:
-                    st.metric("Average Net Content", f"{net_content_data['net_content'].mean():.2f}")
-                with col2:
-                    st.metric("Min Net Content", f"{net_content_data['net_content'].min():.2f}")
-                with col3:
-                    st.metric("Max Net Content", f"{net_content_data['net_content'].max():.2f}")
-                with col4:
-                    st.metric("Net Content Std Dev", f"{net_content_data['net_content'].std():.3f}")
+    # Create tabs for different chart types; only the open one is computed
+    section_names = list(SPC_SECTIONS)
+    tabs = st.tabs(section_names, key="spc_tabs", on_change="rerun" if SPC_LAZY_TABS else "ignore")
+    
+    for index, (name, tab) in enumerate(zip(section_names, tabs)):
+        if SPC_LAZY_TABS and tab.open is False:
+            continue
+        with tab:
+            SPC_SECTIONS[name](data, groups, limits)
+        if SPC_LAZY_TABS:
+            # Warm the next tab while this one is being read
+            prefetch_section(section_names[(index + 1) % len(section_names)], groups, limits)
+    
+    # Like the tabs, these expanders are only computed while open
+    panel_change = "rerun" if SPC_LAZY_TABS else "ignore"
+    violations_panel = st.expander("Rule Violations", key="spc_violations", on_change=panel_change)
+    if violations_panel.open is not False:
+        with violations_panel:
+            if violations is None:
+                violations = cached_violations(series, limits)
+            if violations.empty:
+                st.info("No control chart signals in the selected period")
             else:
-                st.info("Insufficient Net Content data for SPC analysis")
-        else:
-            st.info("No Net Content data available for the selected time period")
-            
+                st.dataframe(violations, use_container_width=True, hide_index=True)
+    
+    cache_stats = figure_cache.stats()
+    st.caption(f"Chart cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+               f"{cache_stats['entries']}/{cache_stats['max_entries']} figures cached")
+    
+    history_panel = st.expander("Control Limit History", key="spc_limit_history", on_change=panel_change)
+    if history_panel.open is not False:
+        with history_panel:
+            history = db.get_control_limit_history()
+            if history.empty:
+                st.info("No control limits have been frozen yet")
+            else:
+                st.dataframe(history, use_container_width=True, hide_index=True)
+    
     # Add explanations about SPC charts
     with st.expander("About Statistical Process Control Charts"):
         st.markdown("""
@@ -596,6 +1482,22 @@ def display_spc_dashboard(start_date, end_date, product_filter=None):
         - The green dashed line is the mean (average) of all measurements
         - The red dashed lines are the Upper and Lower Control Limits (UCL/LCL), set at 3 standard deviations from the mean
         - Red circles indicate out-of-control points that exceed the control limits
+        - Orange diamonds mark points that break a run or trend rule (Nelson rules 2-8); hover to see which
+        
+        #### X̄-R and X̄-S Charts
+        - Each check's five head torques (or five bottle weights) form one subgroup
+        - The upper panel plots subgroup means against limits from the pooled within-subgroup variation
+        - The lower panel plots the subgroup range (R) or standard deviation (S); use S when subgroups are larger or you want every reading to count
+        
+        #### Hotelling T² Chart
+        - Combines the five head torques into one statistic that accounts for their correlation
+        - Catches shifts where no single head is out of its own limits but the pattern across heads is unusual
+        - For an out-of-control check, the contribution chart shows which heads drove the signal
+        
+        #### EWMA and CUSUM Charts
+        - EWMA smooths the measurements (each point weights the newest value by λ); its limits widen over the first points to their steady-state value
+        - CUSUM accumulates deviations beyond an allowance of k·σ above (C+) and below (C-) the center line and signals when either passes H
+        - Both detect small sustained drifts (e.g. a slow BRIX or fill-weight shift) much earlier than the individuals chart
         
         #### Moving Range Chart
         - Shows the absolute difference between consecutive measurements
@@ -608,13 +1510,27 @@ def display_spc_dashboard(start_date, end_date, product_filter=None):
         - All points fall within the control limits
         - No unusual patterns or trends exist
         
-        Signs of an "out of control" process:
-        - Points outside the control limits
-        - Runs of 7+ points all above or below the center line
-        - Trends of 7+ points continuously increasing or decreasing
+        Signs of an "out of control" process (checked automatically):
+        - Points outside the control limits (rule 1)
+        - 9 points in a row on the same side of the center line (rule 2)
+        - 6 points in a row continuously increasing or decreasing (rule 3)
+        - 14 points in a row alternating up and down (rule 4)
+        - 2 of 3 points beyond 2σ, or 4 of 5 beyond 1σ, on the same side (rules 5 and 6)
+        - 15 points in a row within 1σ of the center line (rule 7)
+        - 8 points in a row more than 1σ from the center line on either side (rule 8)
         
         When a process is out of control, investigate the causes and take corrective action.
+        
+        ### Phase I and Phase II
+        
+        - **Phase I**: limits are calculated from the data in the selected period. Use this to
+          study a stable baseline and freeze its limits.
+        - **Phase II**: new data is evaluated against the frozen baseline limits, so a drifting
+          process cannot drag its own limits along with it. Each freeze creates a new version;
+          earlier versions are kept in the Control Limit History.
         """)
+    
+    st.session_state['spc_dashboard_s'] = time.perf_counter() - render_start
 
 def display_spc_page():
     """Display the SPC page with filters and charts"""
@@ -636,7 +1552,7 @@ def display_spc_page():
     st.sidebar.header("SPC Analysis Filters")
     
     # Time period selection
-    time_periods = ["Last Week", "Last Month", "Last Quarter", "Last Year", "Custom Range"]
+    time_periods = list(SPC_PERIODS) + ["Custom Range"]
     selected_period = st.sidebar.selectbox("Time Period", time_periods)
     
     if selected_period == "Custom Range":
@@ -648,16 +1564,7 @@ def display_spc_page():
             end_date = st.date_input("End Date")
     else:
         # Predefined time periods
-        end_date = pd.Timestamp.now().date()
-        
-        if selected_period == "Last Week":
-            start_date = end_date - pd.Timedelta(days=7)
-        elif selected_period == "Last Month":
-            start_date = end_date - pd.Timedelta(days=30)
-        elif selected_period == "Last Quarter":
-            start_date = end_date - pd.Timedelta(days=90)
-        else:  # Last Year
-            start_date = end_date - pd.Timedelta(days=365)
+        start_date, end_date = period_dates(selected_period)
     
     # Filter by product
     products = []
@@ -680,9 +1587,34 @@ def display_spc_page():
     else:
         product_filter = None
     
+    # Control limit phase
+    st.sidebar.header("Control Limits")
+    limit_phase = st.sidebar.radio(
+        "Limits",
+        ["Phase I (selected period)", "Phase II (frozen limits)"],
+        help="Phase II evaluates the selected period against limits frozen from a baseline period"
+    )
+    
+    if st.session_state.get('role') in ['admin', 'supervisor']:
+        with st.sidebar.expander("Freeze Phase I Limits"):
+            baseline = st.date_input("Baseline Period", value=(start_date, end_date), key="spc_baseline")
+            notes = st.text_input("Notes", key="spc_baseline_notes")
+            if st.button("Freeze Limits from Baseline"):
+                if len(baseline) != 2:
+                    st.error("Select a start and end date for the baseline")
+                else:
+                    frozen = freeze_baseline_limits(baseline[0], baseline[1],
+                                                    st.session_state.username, notes or None)
+                    if frozen:
+                        st.success(f"Froze control limits for {frozen} product/parameter groups")
+                    else:
+                        st.warning("No baseline data with enough points to freeze limits")
+    
     # Reset button
     if st.sidebar.button("Reset Filters"):
         st.rerun()
     
     # Display SPC dashboard
-    display_spc_dashboard(start_date, end_date, product_filter)
\ No newline at end of file
+    display_spc_dashboard(start_date, end_date, product_filter,
+                          use_frozen_limits=limit_phase.startswith("Phase II"),
+                          period=selected_period)
\ No newline at end of file
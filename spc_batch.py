@@ -0,0 +1,130 @@
+"""
+Headless SPC batch job.
+
+Computes control limits, moving ranges and rule violations for every
+product/parameter group of each predefined SPC period and stores them in
+spc_batch_runs / spc_batch_limits / spc_batch_violations. The SPC page reads
+the latest run for its period instead of computing limits and violations
+itself, so it opens quickly at shift start.
+
+Groups are evaluated in a process pool; loading data and writing results
+stay in the main process.
+
+Usage:
+    python spc_batch.py [--period "Last Week" ...] [--workers 4] [--phase-ii]
+                        [--every 30] [--keep 10]
+
+Run it from cron (or a systemd timer) before each shift, or keep it running
+with --every MINUTES.
+"""
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from spc import (SPC_PERIODS, VIOLATION_COLUMNS, apply_frozen_limits, calculate_control_limits_batch,
+                 calculate_group_violations, db, get_group_limits, period_dates, prepare_spc_series,
+                 to_long_format)
+
+logger = logging.getLogger(__name__)
+
+# Worker processes (default: one per CPU)
+BATCH_WORKERS = int(os.getenv('QA_SPC_BATCH_WORKERS', '0')) or os.cpu_count() or 1
+
+
+def _evaluate_group(task):
+    """Rule violations for one group (runs in a worker process)"""
+    product, parameter, timestamps, values, moving_ranges, control_limits = task
+    violations = calculate_group_violations(timestamps, values, moving_ranges, control_limits)
+    return violations.assign(product=product, parameter=parameter)
+
+
+def _group_tasks(series, limits):
+    for (product, parameter), group in series.groupby(['product', 'parameter'], sort=False):
+        yield (product, parameter, group['timestamp'].to_numpy(), group['value'].to_numpy(dtype=float),
+               group['moving_range'].to_numpy(dtype=float), get_group_limits(limits, product, parameter))
+
+
+def run_period(pool, period, end_date=None, use_frozen_limits=False, keep_runs=10):
+    """
+    Compute and store one period's SPC results
+
+    Args:
+        pool: Executor the groups are evaluated on
+        period: Key of spc.SPC_PERIODS
+        end_date: Last day of the window (default: today)
+        use_frozen_limits: Evaluate against the active frozen limits (Phase II)
+        keep_runs: Stored runs kept per period and phase
+
+    Returns:
+        The new run id, or None when the period has no data
+    """
+    started_at = pd.Timestamp.now().to_pydatetime()
+    start_date, end_date = period_dates(period, end_date)
+
+    data = db.get_check_data(start_date, end_date)
+    if data.empty:
+        logger.info(f"SPC batch: no data for {period} ({start_date} - {end_date})")
+        return None
+
+    series = prepare_spc_series(to_long_format(data))
+    limits = calculate_control_limits_batch(series)
+    if use_frozen_limits:
+        limits = apply_frozen_limits(limits, db.get_active_control_limits())
+
+    tasks = list(_group_tasks(series, limits))
+    chunksize = max(1, len(tasks) // (4 * BATCH_WORKERS))
+    frames = [frame for frame in pool.map(_evaluate_group, tasks, chunksize=chunksize) if not frame.empty]
+    violations = (pd.concat(frames, ignore_index=True)[VIOLATION_COLUMNS] if frames
+                  else pd.DataFrame(columns=VIOLATION_COLUMNS))
+
+    phase = 'Phase II' if use_frozen_limits else 'Phase I'
+    return db.save_spc_batch_run(period, start_date, end_date, phase, limits, violations,
+                                 started_at, keep_runs=keep_runs)
+
+
+def run_batch(periods=None, workers=BATCH_WORKERS, use_frozen_limits=False, keep_runs=10):
+    """
+    Compute and store SPC results for several periods with one process pool
+
+    Returns:
+        dict of period -> run id (None for periods without data)
+    """
+    periods = periods or list(SPC_PERIODS)
+    runs = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for period in periods:
+            start = time.perf_counter()
+            runs[period] = run_period(pool, period, use_frozen_limits=use_frozen_limits, keep_runs=keep_runs)
+            logger.info(f"SPC batch: {period} done in {time.perf_counter() - start:.2f}s (run {runs[period]})")
+    return runs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--period', action='append', choices=list(SPC_PERIODS),
+                        help="Period to compute (repeatable; default: all)")
+    parser.add_argument('--workers', type=int, default=BATCH_WORKERS)
+    parser.add_argument('--phase-ii', action='store_true',
+                        help="Evaluate against the active frozen limits instead of the period's own")
+    parser.add_argument('--keep', type=int, default=10, help="Runs kept per period and phase")
+    parser.add_argument('--every', type=float, default=None,
+                        help="Repeat every N minutes instead of running once")
+    args = parser.parse_args()
+
+    while True:
+        start = time.perf_counter()
+        runs = run_batch(args.period, args.workers, args.phase_ii, args.keep)
+        for period, run_id in runs.items():
+            print(f"{period}: {'no data' if run_id is None else f'run {run_id}'}")
+        print(f"SPC batch finished in {time.perf_counter() - start:.2f}s")
+        if args.every is None:
+            break
+        time.sleep(max(0.0, args.every * 60 - (time.perf_counter() - start)))
+
+
+if __name__ == '__main__':
+    main()
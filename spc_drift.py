@@ -0,0 +1,99 @@
+import numpy as np
+from scipy.signal import lfilter
+
+# Defaults from Montgomery, Introduction to Statistical Quality Control
+EWMA_LAMBDA = 0.2   # weight of the newest observation
+EWMA_L = 3.0        # limit width in EWMA standard deviations
+CUSUM_K = 0.5       # reference value (allowance) in sigma units
+CUSUM_H = 5.0       # decision interval in sigma units
+
+
+def _center_and_sigma(x, center, sigma):
+    if center is None:
+        center = np.nanmean(x)
+    if sigma is None:
+        sigma = np.nanstd(x, ddof=1) if len(x) > 1 else 0.0
+    return float(center), float(sigma)
+
+
+def ewma_statistics(values, center=None, sigma=None, lam=EWMA_LAMBDA, L=EWMA_L):
+    """
+    EWMA statistic with exact time-varying control limits
+
+    z_t = lam * x_t + (1 - lam) * z_(t-1), starting from z_0 = center, is a
+    first-order IIR filter and is computed in one lfilter call. The limits
+    center ± L·sigma·sqrt(lam / (2 - lam) · (1 - (1 - lam)^(2t))) widen
+    over the first points instead of using the asymptotic value.
+
+    Args:
+        values: 1-D array of observations in time order (no missing values)
+        center: Target / center line (default: mean of values)
+        sigma: Process standard deviation (default: std of values)
+        lam: Smoothing constant, 0 < lam <= 1
+        L: Limit width in EWMA standard deviations
+
+    Returns:
+        dict with ewma, ucl, lcl (arrays), center, sigma and a boolean
+        out_of_control array
+    """
+    x = np.asarray(values, dtype=float)
+    center, sigma = _center_and_sigma(x, center, sigma)
+    if x.size == 0:
+        empty = np.array([])
+        return {'ewma': empty, 'ucl': empty, 'lcl': empty, 'center': center, 'sigma': sigma,
+                'out_of_control': empty.astype(bool)}
+
+    ewma, _ = lfilter([lam], [1.0, lam - 1.0], x, zi=[(1.0 - lam) * center])
+
+    t = np.arange(1, x.size + 1)
+    width = L * sigma * np.sqrt(lam / (2.0 - lam) * (1.0 - (1.0 - lam) ** (2 * t)))
+    ucl = center + width
+    lcl = center - width
+    return {
+        'ewma': ewma,
+        'ucl': ucl,
+        'lcl': lcl,
+        'center': center,
+        'sigma': sigma,
+        'out_of_control': (ewma > ucl) | (ewma < lcl),
+    }
+
+
+def cusum_statistics(values, center=None, sigma=None, k=CUSUM_K, h=CUSUM_H):
+    """
+    Tabular (upper and lower) CUSUM without a Python loop
+
+    The recursion C+_t = max(0, x_t - (center + K) + C+_(t-1)) equals
+    S_t - min(0, min_(j<=t) S_j) for the running sum S_t of
+    x - (center + K), so both sides are a cumulative sum followed by a
+    running minimum.
+
+    Args:
+        values: 1-D array of observations in time order (no missing values)
+        center: Target / center line (default: mean of values)
+        sigma: Process standard deviation (default: std of values)
+        k: Reference value K in sigma units
+        h: Decision interval H in sigma units
+
+    Returns:
+        dict with upper and lower (arrays), threshold (H), center, sigma and
+        a boolean out_of_control array
+    """
+    x = np.asarray(values, dtype=float)
+    center, sigma = _center_and_sigma(x, center, sigma)
+    allowance = k * sigma
+
+    upper_sum = np.cumsum(x - (center + allowance))
+    lower_sum = np.cumsum((center - allowance) - x)
+    upper = upper_sum - np.minimum(np.minimum.accumulate(upper_sum), 0.0) if x.size else upper_sum
+    lower = lower_sum - np.minimum(np.minimum.accumulate(lower_sum), 0.0) if x.size else lower_sum
+
+    threshold = h * sigma
+    return {
+        'upper': upper,
+        'lower': lower,
+        'threshold': threshold,
+        'center': center,
+        'sigma': sigma,
+        'out_of_control': (upper > threshold) | (lower > threshold),
+    }
@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# False alarm rate matching 3-sigma univariate limits
+T2_ALPHA = 0.0027
+
+# Covariance matrices worse conditioned than this are treated as singular
+# (a constant variable, or variables that are exact combinations of others)
+MAX_COV_CONDITION = 1e10
+
+
+def estimate_baseline(values):
+    """
+    Mean vector and covariance matrix from complete baseline rows
+
+    Args:
+        values: 2-D array (observations x variables)
+
+    Returns:
+        dict with mean, cov, m (rows used) and p (variables), or None when
+        there are not more rows than variables or the covariance is singular
+    """
+    x = np.asarray(values, dtype=float)
+    x = x[~np.isnan(x).any(axis=1)]
+    m, p = x.shape
+    if m <= p + 1:
+        return None
+
+    cov = np.cov(x, rowvar=False)
+    condition = np.linalg.cond(cov)
+    if not np.isfinite(condition) or condition > MAX_COV_CONDITION:
+        return None
+    return {'mean': x.mean(axis=0), 'cov': cov, 'm': m, 'p': p}
+
+
+def t2_upper_limit(m, p, alpha=T2_ALPHA, phase=2):
+    """
+    T² upper control limit for a baseline of m individual observations
+
+    Phase 1 (points that are part of the baseline) uses the beta
+    distribution; phase 2 (new points) uses the F distribution.
+    """
+    if phase == 1:
+        return (m - 1) ** 2 / m * stats.beta.ppf(1 - alpha, p / 2, (m - p - 1) / 2)
+    return p * (m + 1) * (m - 1) / (m * (m - p)) * stats.f.ppf(1 - alpha, p, m - p)
+
+
+def hotelling_t2(values, baseline):
+    """
+    Hotelling T² for every row plus each variable's contribution
+
+    All rows are handled by one batched solve S·W = Dᵀ for the deviations
+    D = X - mean; T² is the row-wise sum of D ∘ Wᵀ. Each term of that sum,
+    d_j · (S⁻¹d)_j, is the variable's contribution, so the contributions of a
+    row add up to its T² (a term can be negative when correlated variables
+    move against their usual relationship).
+
+    Args:
+        values: 2-D array (observations x variables); rows with missing
+                values get NaN
+        baseline: dict from estimate_baseline
+
+    Returns:
+        (t2, contributions): 1-D array and 2-D array shaped like values
+    """
+    x = np.asarray(values, dtype=float)
+    deviations = x - baseline['mean']
+    complete = ~np.isnan(deviations).any(axis=1)
+
+    contributions = np.full(x.shape, np.nan)
+    if complete.any():
+        solved = np.linalg.solve(baseline['cov'], deviations[complete].T).T
+        contributions[complete] = deviations[complete] * solved
+    t2 = contributions.sum(axis=1)
+    t2[~complete] = np.nan
+    return t2, contributions
+
+
+def t2_chart_data(data, columns, baseline_mask=None, alpha=T2_ALPHA, time_column='timestamp'):
+    """
+    Build the T² chart table for a DataFrame
+
+    Args:
+        data: DataFrame in time order with the variable columns
+        columns: Variable columns (e.g. the five head torques)
+        baseline_mask: Boolean array selecting the baseline rows
+                       (default: every row, i.e. a pure Phase I study)
+        alpha: False alarm probability per point
+        time_column: Column copied into the output when present
+
+    Returns:
+        (chart, baseline): chart is a DataFrame with timestamp, t2, ucl,
+        phase, out_of_control and one contribution column per variable;
+        baseline is the estimate (None when there is too little data)
+    """
+    values = data[columns].to_numpy(dtype=float)
+    if baseline_mask is None:
+        baseline_mask = np.ones(len(values), dtype=bool)
+    baseline_mask = np.asarray(baseline_mask, dtype=bool)
+
+    baseline = estimate_baseline(values[baseline_mask])
+    if baseline is None:
+        return pd.DataFrame(), None
+
+    t2, contributions = hotelling_t2(values, baseline)
+    m, p = baseline['m'], baseline['p']
+    ucl = np.where(baseline_mask,
+                   t2_upper_limit(m, p, alpha, phase=1),
+                   t2_upper_limit(m, p, alpha, phase=2))
+
+    chart = pd.DataFrame(contributions, columns=columns, index=data.index)
+    chart.insert(0, 'timestamp', data[time_column].to_numpy() if time_column in data.columns else pd.NaT)
+    chart.insert(1, 't2', t2)
+    chart.insert(2, 'ucl', ucl)
+    chart.insert(3, 'phase', np.where(baseline_mask, 'Phase I', 'Phase II'))
+    chart.insert(4, 'out_of_control', t2 > ucl)
+    return chart.dropna(subset=['t2']), baseline
@@ -0,0 +1,104 @@
+"""
+Time-to-first-chart benchmark for the SPC dashboard.
+
+Each run renders the SPC page with its default filters in a fresh
+interpreter (empty figure cache) against the database in DATABASE_URL
+and reports:
+  - first_chart_s: display_spc_dashboard start until the first chart is sent
+  - full_run_s: the whole script run
+  - rerun_s: a second script run in the same session, as after a tab
+    switch or any widget change (figures are cache hits by then)
+  - dashboard_s / rerun_dashboard_s: time spent in display_spc_dashboard
+    itself on each of those runs (excludes imports and data loading setup)
+  - charts: number of charts rendered
+
+Runs are made with every tab rendered eagerly (QA_SPC_LAZY_TABS=0, the old
+behaviour) and with lazy tabs, so the two can be compared.
+
+Usage:
+    python spc_render_benchmark.py [--runs 3]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_PAGE_SCRIPT = """
+import streamlit as st
+st.session_state.setdefault('role', 'admin')
+st.session_state.setdefault('username', 'benchmark')
+from spc import display_spc_page
+display_spc_page()
+"""
+
+_RENDER_SNIPPET = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+
+at = AppTest.from_string(sys.argv[1], default_timeout=300)
+start = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - start
+dashboard = at.session_state["spc_dashboard_s"] if "spc_dashboard_s" in at.session_state else None
+start = time.perf_counter()
+at.run()
+rerun = time.perf_counter() - start
+rerun_dashboard = at.session_state["spc_dashboard_s"] if "spc_dashboard_s" in at.session_state else None
+print(json.dumps({
+    "first_chart_s": at.session_state["spc_first_chart_s"] if "spc_first_chart_s" in at.session_state else None,
+    "full_run_s": elapsed,
+    "rerun_s": rerun,
+    "dashboard_s": dashboard,
+    "rerun_dashboard_s": rerun_dashboard,
+    "charts": len(at.get("plotly_chart")),
+    "errors": [e.value for e in at.exception],
+}))
+"""
+
+
+def measure_render(lazy):
+    """Render the SPC page once in a new interpreter"""
+    env = dict(os.environ, QA_SPC_LAZY_TABS='1' if lazy else '0')
+    result = subprocess.run(
+        [sys.executable, '-c', _RENDER_SNIPPET, _PAGE_SCRIPT],
+        capture_output=True, text=True, cwd=APP_DIR, env=env
+    )
+    for line in reversed(result.stdout.splitlines()):
+        if line.startswith('{'):
+            return json.loads(line)
+    raise RuntimeError(f"SPC render failed:\n{result.stderr[-2000:]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+
+    summary = {'runs': args.runs}
+    for mode, lazy in [('eager', False), ('lazy', True)]:
+        results = [measure_render(lazy) for _ in range(args.runs)]
+        for run, result in enumerate(results, 1):
+            if result['errors']:
+                print(f"{mode} run {run}: page raised {result['errors']}", file=sys.stderr)
+            print(f"{mode} run {run}: first_chart={result['first_chart_s']:.2f}s "
+                  f"full_run={result['full_run_s']:.2f}s rerun={result['rerun_s']:.2f}s "
+                  f"dashboard={result['dashboard_s']:.3f}s rerun_dashboard={result['rerun_dashboard_s']:.3f}s "
+                  f"charts={result['charts']}")
+        summary[mode] = {
+            'first_chart_median_s': statistics.median(r['first_chart_s'] for r in results),
+            'full_run_median_s': statistics.median(r['full_run_s'] for r in results),
+            'rerun_median_s': statistics.median(r['rerun_s'] for r in results),
+            'dashboard_median_s': statistics.median(r['dashboard_s'] for r in results),
+            'rerun_dashboard_median_s': statistics.median(r['rerun_dashboard_s'] for r in results),
+            'charts': results[-1]['charts'],
+        }
+
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == '__main__':
+    main()
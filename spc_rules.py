@@ -0,0 +1,170 @@
+import numpy as np
+import pandas as pd
+
+# Nelson rules (rule 1-4 and 5-8 extend the Western Electric zone rules)
+NELSON_RULES = {
+    1: "1 point more than 3σ from the center line",
+    2: "9 points in a row on the same side of the center line",
+    3: "6 points in a row steadily increasing or decreasing",
+    4: "14 points in a row alternating up and down",
+    5: "2 of 3 points more than 2σ from the center line (same side)",
+    6: "4 of 5 points more than 1σ from the center line (same side)",
+    7: "15 points in a row within 1σ of the center line",
+    8: "8 points in a row more than 1σ from the center line (either side)",
+}
+
+
+def _window_count(condition, window):
+    """
+    Count True values in the `window` rows ending at each row
+
+    Uses a cumulative sum so the cost is O(n) regardless of window size.
+    Rows without a full window behind them get a count of 0.
+    """
+    counts = np.cumsum(condition, axis=0, dtype=np.int32)
+    counts[window:] = counts[window:] - counts[:-window]
+    counts[:window - 1] = 0
+    return counts
+
+
+def _run_of(condition, length):
+    """True where `condition` has held for `length` consecutive rows"""
+    return _window_count(condition, length) >= length
+
+
+def _diff_run(condition, length):
+    """
+    True at row i when `condition` (defined on row-to-row differences)
+    held for the `length` differences ending at row i
+    """
+    padded = np.zeros_like(condition, shape=(condition.shape[0] + 1,) + condition.shape[1:])
+    padded[1:] = condition
+    return _run_of(padded, length)
+
+
+def evaluate_nelson_rules(values, center=None, sigma=None, rules=None):
+    """
+    Evaluate Nelson rules for one or many series at once
+
+    All rules are computed with vectorised differences and cumulative sums
+    over the whole (n_points x n_parameters) matrix, so the cost is O(n).
+    Missing values never satisfy a rule condition, so they break runs.
+    Columns whose sigma is not positive (e.g. a constant series) are never
+    flagged: without a spread there are no zones to test against.
+
+    Args:
+        values: 1-D array/Series or 2-D array/DataFrame (rows in time order,
+                one column per parameter)
+        center: Center line per column (default: column mean)
+        sigma: Standard deviation per column (default: column std, ddof=1)
+        rules: Iterable of rule numbers to evaluate (default: all eight)
+
+    Returns:
+        dict mapping rule number to a boolean array shaped like `values`
+        (True where the rule is violated at that point)
+    """
+    x = np.asarray(values, dtype=float)
+    one_dimensional = x.ndim == 1
+    if one_dimensional:
+        x = x[:, None]
+
+    rules = sorted(rules) if rules is not None else list(NELSON_RULES)
+    if x.shape[0] == 0:
+        return {rule: np.zeros(np.shape(values), dtype=bool) for rule in rules}
+
+    if center is None:
+        center = np.nanmean(x, axis=0)
+    if sigma is None:
+        sigma = np.nanstd(x, axis=0, ddof=1) if len(x) > 1 else np.zeros(x.shape[1])
+    center = np.broadcast_to(np.asarray(center, dtype=float), x.shape[1:])
+    sigma = np.broadcast_to(np.asarray(sigma, dtype=float), x.shape[1:])
+
+    scaled = sigma > 0
+    valid = ~np.isnan(x) & scaled
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = np.where(sigma > 0, (x - center) / sigma, 0.0)
+    z[~valid] = 0.0
+
+    results = {}
+    if 1 in rules:
+        results[1] = np.abs(z) > 3
+    if 2 in rules:
+        results[2] = _run_of(valid & (z > 0), 9) | _run_of(valid & (z < 0), 9)
+    if 3 in rules or 4 in rules:
+        diffs = np.diff(x, axis=0)
+        diff_valid = ~np.isnan(diffs)
+        if 3 in rules:
+            results[3] = (_diff_run(diff_valid & (diffs > 0), 5) |
+                          _diff_run(diff_valid & (diffs < 0), 5)) & scaled
+        if 4 in rules:
+            signs = np.sign(np.where(diff_valid, diffs, 0.0))
+            alternating = np.zeros_like(diff_valid)
+            alternating[1:] = (signs[1:] * signs[:-1]) < 0
+            # 14 points -> 13 differences -> 12 sign changes between them
+            results[4] = _diff_run(alternating, 12) & scaled
+    if 5 in rules:
+        results[5] = ((_window_count(z > 2, 3) >= 2) | (_window_count(z < -2, 3) >= 2)) & scaled
+    if 6 in rules:
+        results[6] = ((_window_count(z > 1, 5) >= 4) | (_window_count(z < -1, 5) >= 4)) & scaled
+    if 7 in rules:
+        results[7] = _run_of(valid & (np.abs(z) < 1), 15)
+    if 8 in rules:
+        results[8] = _run_of(valid & (np.abs(z) > 1), 8)
+
+    if one_dimensional:
+        results = {rule: flags[:, 0] for rule, flags in results.items()}
+    return results
+
+
+def nelson_violations(data, columns, center=None, sigma=None, time_column='timestamp', rules=None):
+    """
+    Build a violations table for several parameters of a DataFrame
+
+    Args:
+        data: DataFrame already sorted in time order
+        columns: Parameter columns to evaluate together
+        center: Optional center line per column (dict, Series or array)
+        sigma: Optional sigma per column (dict, Series or array)
+        time_column: Column copied into the output when present
+        rules: Optional subset of rule numbers
+
+    Returns:
+        DataFrame with one row per (point, parameter, rule) violation:
+        index, timestamp, parameter, value, rule, description
+    """
+    output_columns = ['index', 'timestamp', 'parameter', 'value', 'rule', 'description']
+    columns = [col for col in columns if col in data.columns]
+    if data.empty or not columns:
+        return pd.DataFrame(columns=output_columns)
+
+    values = data[columns].to_numpy(dtype=float)
+    if isinstance(center, dict):
+        center = [center[col] for col in columns]
+    if isinstance(sigma, dict):
+        sigma = [sigma[col] for col in columns]
+    if isinstance(center, pd.Series):
+        center = center.reindex(columns).to_numpy(dtype=float)
+    if isinstance(sigma, pd.Series):
+        sigma = sigma.reindex(columns).to_numpy(dtype=float)
+
+    flags = evaluate_nelson_rules(values, center, sigma, rules)
+
+    frames = []
+    for rule, mask in flags.items():
+        rows, cols = np.nonzero(mask)
+        if rows.size == 0:
+            continue
+        frames.append(pd.DataFrame({
+            'index': data.index.to_numpy()[rows],
+            'timestamp': (data[time_column].to_numpy()[rows]
+                          if time_column in data.columns else pd.NaT),
+            'parameter': np.asarray(columns, dtype=object)[cols],
+            'value': values[rows, cols],
+            'rule': rule,
+            'description': NELSON_RULES[rule],
+        }))
+
+    if not frames:
+        return pd.DataFrame(columns=output_columns)
+    return pd.concat(frames, ignore_index=True).sort_values(['parameter', 'index', 'rule'],
+                                                             ignore_index=True)
@@ -0,0 +1,264 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+# Parameters whose running statistics are kept, by the table they are saved to
+TRACKED_PARAMETERS = {
+    'torque_tamper': ['head1_torque', 'head2_torque', 'head3_torque', 'head4_torque', 'head5_torque'],
+    'net_content': ['brix', 'average_weight', 'net_content'],
+    'quality_check': ['brix'],
+}
+
+# Product label for the group that pools every product
+ALL_PRODUCTS = "All Products"
+
+# Bias correction constant for moving ranges of 2 consecutive points
+D2_MR = 1.128
+
+STATS_COLUMNS = ['count', 'mean', 'm2', 'mr_count', 'mr_sum', 'min_value', 'max_value',
+                 'first_value', 'last_value', 'first_ts', 'last_ts']
+
+
+class RunningStats:
+    """
+    Welford accumulator for one (product, parameter) stream
+
+    Keeps count, mean and M2 (sum of squared deviations) plus the moving-range
+    sum of consecutive values, so control limits can be read without the raw
+    rows. Two accumulators combine exactly with `merge` (Chan et al.).
+    Values arriving with a timestamp earlier than the last one seen still
+    update mean/variance but do not add a moving range.
+    """
+
+    __slots__ = STATS_COLUMNS
+
+    def __init__(self, count=0, mean=0.0, m2=0.0, mr_count=0, mr_sum=0.0,
+                 min_value=None, max_value=None, first_value=None, last_value=None,
+                 first_ts=None, last_ts=None):
+        self.count = int(count)
+        self.mean = float(mean)
+        self.m2 = float(m2)
+        self.mr_count = int(mr_count)
+        self.mr_sum = float(mr_sum)
+        self.min_value = min_value
+        self.max_value = max_value
+        self.first_value = first_value
+        self.last_value = last_value
+        self.first_ts = first_ts
+        self.last_ts = last_ts
+
+    @classmethod
+    def from_values(cls, values, timestamps=None):
+        """Build an accumulator from values given in time order"""
+        stats = cls()
+        timestamps = timestamps if timestamps is not None else [None] * len(values)
+        for value, timestamp in zip(values, timestamps):
+            stats.push(value, timestamp)
+        return stats
+
+    def push(self, value, timestamp=None):
+        """Add one observation (NaN/None are ignored)"""
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return self
+        value = float(value)
+
+        in_order = self.count == 0 or timestamp is None or self.last_ts is None or timestamp >= self.last_ts
+        if self.count and in_order:
+            self.mr_count += 1
+            self.mr_sum += abs(value - self.last_value)
+
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+        self.min_value = value if self.min_value is None else min(self.min_value, value)
+        self.max_value = value if self.max_value is None else max(self.max_value, value)
+        if self.first_value is None:
+            self.first_value, self.first_ts = value, timestamp
+        if in_order:
+            self.last_value, self.last_ts = value, timestamp
+        return self
+
+    def merge(self, other):
+        """
+        Combine with another accumulator (parallel Welford)
+
+        The moving range across the boundary is added when one stream ends
+        before the other starts; overlapping streams only keep their own ranges.
+
+        Returns:
+            New RunningStats covering both
+        """
+        if other.count == 0:
+            return RunningStats(*(getattr(self, name) for name in STATS_COLUMNS))
+        if self.count == 0:
+            return RunningStats(*(getattr(other, name) for name in STATS_COLUMNS))
+
+        first, second = self, other
+        if self.first_ts is not None and other.first_ts is not None and other.first_ts < self.first_ts:
+            first, second = other, self
+
+        count = first.count + second.count
+        delta = second.mean - first.mean
+        merged = RunningStats(
+            count=count,
+            mean=first.mean + delta * second.count / count,
+            m2=first.m2 + second.m2 + delta * delta * first.count * second.count / count,
+            mr_count=first.mr_count + second.mr_count,
+            mr_sum=first.mr_sum + second.mr_sum,
+            min_value=min(first.min_value, second.min_value),
+            max_value=max(first.max_value, second.max_value),
+            first_value=first.first_value, first_ts=first.first_ts,
+            last_value=second.last_value, last_ts=second.last_ts,
+        )
+
+        if first.last_ts is None or second.first_ts is None or second.first_ts >= first.last_ts:
+            merged.mr_count += 1
+            merged.mr_sum += abs(second.first_value - first.last_value)
+        elif second.last_ts is not None and first.last_ts > second.last_ts:
+            merged.last_value, merged.last_ts = first.last_value, first.last_ts
+        return merged
+
+    __add__ = merge
+
+    @property
+    def variance(self):
+        """Sample variance (ddof=1), None with fewer than 2 values"""
+        return self.m2 / (self.count - 1) if self.count > 1 else None
+
+    @property
+    def std(self):
+        variance = self.variance
+        return math.sqrt(max(variance, 0.0)) if variance is not None else None
+
+    @property
+    def mr_bar(self):
+        return self.mr_sum / self.mr_count if self.mr_count else None
+
+    def control_limits(self, n_sigma=3):
+        """
+        Control limits in the same form as spc.calculate_control_limits
+
+        Returns:
+            dict with UCL, LCL, CL, sigma, n, MR_bar, MR_UCL and sigma_mr
+        """
+        limits = {'UCL': None, 'LCL': None, 'CL': None, 'sigma': None, 'n': self.count,
+                  'MR_bar': self.mr_bar, 'MR_UCL': None, 'sigma_mr': None}
+        if self.mr_bar is not None:
+            limits['MR_UCL'] = self.mr_bar + 3 * self.mr_bar / D2_MR
+            limits['sigma_mr'] = self.mr_bar / D2_MR
+        if self.count < 2:
+            return limits
+
+        sigma = self.std
+        lcl = self.mean - n_sigma * sigma
+        # If LCL is negative and that doesn't make sense for the data, set to 0
+        if lcl < 0 and self.min_value >= 0:
+            lcl = 0
+        limits.update({'UCL': self.mean + n_sigma * sigma, 'LCL': lcl, 'CL': self.mean, 'sigma': sigma})
+        return limits
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in STATS_COLUMNS}
+
+    def __repr__(self):
+        return f"<RunningStats n={self.count} mean={self.mean:.4g} std={self.std}>"
+
+
+def merge_stats_frame(frame, stream_column='product'):
+    """
+    Merge many stored accumulators in one vectorised step
+
+    Rows of the same stream (e.g. product) are chained in first_ts order,
+    adding the moving range across consecutive buckets. Different streams
+    interleave in time, so no range is added between them.
+
+    Args:
+        frame: DataFrame with STATS_COLUMNS (one row per stored bucket)
+        stream_column: Column identifying independent streams, or None
+
+    Returns:
+        RunningStats covering every row
+    """
+    frame = frame[frame['count'] > 0]
+    if frame.empty:
+        return RunningStats()
+
+    sort_columns = [stream_column, 'first_ts'] if stream_column else ['first_ts']
+    frame = frame.sort_values(sort_columns, kind='stable')
+
+    counts = frame['count'].to_numpy(dtype=float)
+    means = frame['mean'].to_numpy(dtype=float)
+    total = counts.sum()
+    mean = (counts * means).sum() / total
+    m2 = frame['m2'].to_numpy(dtype=float).sum() + (counts * (means - mean) ** 2).sum()
+
+    first_ts = frame['first_ts'].to_numpy()
+    last_ts = frame['last_ts'].to_numpy()
+    boundary = first_ts[1:] >= last_ts[:-1]
+    if stream_column:
+        streams = frame[stream_column].to_numpy()
+        boundary &= streams[1:] == streams[:-1]
+    jumps = np.abs(frame['first_value'].to_numpy(dtype=float)[1:] -
+                   frame['last_value'].to_numpy(dtype=float)[:-1])
+
+    latest = int(np.argmax(last_ts))
+    earliest = int(np.argmin(first_ts))
+    return RunningStats(
+        count=total,
+        mean=mean,
+        m2=m2,
+        mr_count=frame['mr_count'].sum() + boundary.sum(),
+        mr_sum=frame['mr_sum'].sum() + jumps[boundary].sum(),
+        min_value=frame['min_value'].min(),
+        max_value=frame['max_value'].max(),
+        first_value=frame['first_value'].iloc[earliest],
+        last_value=frame['last_value'].iloc[latest],
+        first_ts=first_ts[earliest],
+        last_ts=last_ts[latest],
+    )
+
+
+def summarise_series(long_data, freq='D'):
+    """
+    Build accumulators per (product, parameter, bucket) from raw long-format rows
+
+    Args:
+        long_data: DataFrame with timestamp, product, parameter and value columns
+        freq: Bucket size passed to Series.dt.floor (default: one day)
+
+    Returns:
+        DataFrame with product, parameter, bucket and STATS_COLUMNS
+    """
+    columns = ['product', 'parameter', 'bucket'] + STATS_COLUMNS
+    data = long_data.dropna(subset=['value'])
+    if data.empty:
+        return pd.DataFrame(columns=columns)
+
+    data = data.assign(
+        product=data['product'].fillna(''),
+        bucket=pd.to_datetime(data['timestamp']).dt.floor(freq).dt.date
+    ).sort_values(['product', 'parameter', 'timestamp'], kind='stable')
+
+    keys = ['product', 'parameter', 'bucket']
+    same_group = (data[keys].shift() == data[keys]).all(axis=1)
+    data['moving_range'] = data['value'].diff().abs().where(same_group)
+
+    grouped = data.groupby(keys, sort=False)
+    summary = grouped.agg(
+        count=('value', 'size'),
+        mean=('value', 'mean'),
+        variance=('value', 'var'),
+        mr_count=('moving_range', 'count'),
+        mr_sum=('moving_range', 'sum'),
+        min_value=('value', 'min'),
+        max_value=('value', 'max'),
+        first_value=('value', 'first'),
+        last_value=('value', 'last'),
+        first_ts=('timestamp', 'first'),
+        last_ts=('timestamp', 'last'),
+    ).reset_index()
+    summary['m2'] = summary['variance'].fillna(0) * (summary['count'] - 1)
+    return summary[columns]
@@ -0,0 +1,198 @@
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Product key for limits that apply to every product
+ANY_PRODUCT = ''
+
+# Limits the spec_limits table is seeded with (all products, effective from the start)
+DEFAULT_SPEC_LIMITS = {
+    'brix': {'lsl': 8.0, 'usl': 9.5},
+    'head1_torque': {'lsl': 5.0, 'usl': 12.0},
+    'head2_torque': {'lsl': 5.0, 'usl': 12.0},
+    'head3_torque': {'lsl': 5.0, 'usl': 12.0},
+    'head4_torque': {'lsl': 5.0, 'usl': 12.0},
+    'head5_torque': {'lsl': 5.0, 'usl': 12.0},
+}
+DEFAULT_EFFECTIVE_FROM = pd.Timestamp('1900-01-01')
+
+SPEC_COLUMNS = ['product', 'parameter', 'lsl', 'usl', 'effective_from']
+
+# Seconds between checks that the loaded registry still matches the table
+# (limits may be edited from another process)
+SPEC_REGISTRY_TTL = float(os.getenv('QA_SPEC_REGISTRY_TTL', '60'))
+
+
+def default_spec_versions():
+    """DEFAULT_SPEC_LIMITS as spec_limits rows"""
+    return pd.DataFrame([
+        {'product': ANY_PRODUCT, 'parameter': parameter, 'lsl': specs['lsl'], 'usl': specs['usl'],
+         'effective_from': DEFAULT_EFFECTIVE_FROM}
+        for parameter, specs in DEFAULT_SPEC_LIMITS.items()
+    ], columns=SPEC_COLUMNS)
+
+
+class SpecRegistry:
+    """
+    In-memory lookup of versioned specification limits
+
+    Each version applies to one parameter, one product (or ANY_PRODUCT) and
+    every measurement taken at or after its effective_from, until the next
+    version. A product's own limits take precedence over ANY_PRODUCT ones.
+    """
+
+    def __init__(self, versions):
+        versions = pd.DataFrame(versions, columns=SPEC_COLUMNS).copy()
+        versions['product'] = versions['product'].fillna(ANY_PRODUCT)
+        versions['effective_from'] = pd.to_datetime(versions['effective_from'])
+        versions[['lsl', 'usl']] = versions[['lsl', 'usl']].astype(float)
+        self.versions = versions.sort_values(['parameter', 'product', 'effective_from'], ignore_index=True)
+        self._groups = {key: group for key, group in self.versions.groupby(['parameter', 'product'])}
+
+    @property
+    def parameters(self):
+        return sorted(self.versions['parameter'].unique())
+
+    def _lookup(self, parameter, product, times):
+        """(lsl, usl) arrays for one product at the given times"""
+        lsl = np.full(len(times), np.nan)
+        usl = np.full(len(times), np.nan)
+        keys = [(parameter, ANY_PRODUCT)] + ([(parameter, product)] if product != ANY_PRODUCT else [])
+        for key in keys:
+            group = self._groups.get(key)
+            if group is None:
+                continue
+            index = np.searchsorted(group['effective_from'].to_numpy(), times, side='right') - 1
+            found = index >= 0
+            lsl[found] = group['lsl'].to_numpy()[index[found]]
+            usl[found] = group['usl'].to_numpy()[index[found]]
+        return lsl, usl
+
+    def limits_for(self, parameter, product=None, at=None):
+        """
+        Limits in force for one parameter
+
+        Args:
+            parameter: Parameter name
+            product: Product name (None: limits for every product)
+            at: Time the limits apply at (default: now)
+
+        Returns:
+            dict with lsl and usl (None when there is no limit)
+        """
+        at = pd.Timestamp.now() if at is None else pd.Timestamp(at)
+        lsl, usl = self._lookup(parameter, product or ANY_PRODUCT, np.array([at.to_datetime64()]))
+        return {'lsl': None if np.isnan(lsl[0]) else float(lsl[0]),
+                'usl': None if np.isnan(usl[0]) else float(usl[0])}
+
+    def limits_map(self, product=None, at=None):
+        """dict of parameter -> {'lsl', 'usl'} for every parameter with a limit in force"""
+        limits = {parameter: self.limits_for(parameter, product, at) for parameter in self.parameters}
+        return {parameter: specs for parameter, specs in limits.items()
+                if specs['lsl'] is not None or specs['usl'] is not None}
+
+    def limits_array(self, parameter, products, times):
+        """
+        Limits in force for each measurement
+
+        Args:
+            parameter: Parameter name
+            products: Product per measurement (None/NaN means no product)
+            times: Measurement times
+
+        Returns:
+            (lsl, usl) float arrays, NaN where there is no limit
+        """
+        times = pd.to_datetime(pd.Series(times)).to_numpy()
+        products = pd.Series(products, dtype=object).fillna(ANY_PRODUCT).to_numpy()
+        lsl = np.full(len(times), np.nan)
+        usl = np.full(len(times), np.nan)
+        for product in pd.unique(products):
+            mask = products == product
+            lsl[mask], usl[mask] = self._lookup(parameter, product, times[mask])
+        return lsl, usl
+
+    def flag_out_of_spec(self, frame, parameters=None):
+        """
+        Count out-of-spec measurements per row
+
+        Args:
+            frame: DataFrame with timestamp, optional product and parameter columns
+            parameters: Parameters to check (default: every registered one present in frame)
+
+        Returns:
+            (counts, names): int array of out-of-spec measurements per row and
+            the comma-separated names of those parameters ('' when none)
+        """
+        parameters = [p for p in (parameters or self.parameters) if p in frame.columns]
+        products = frame['product'] if 'product' in frame.columns else [None] * len(frame)
+        flags = np.zeros((len(frame), len(parameters)), dtype=bool)
+        for column, parameter in enumerate(parameters):
+            values = pd.to_numeric(frame[parameter], errors='coerce').to_numpy(dtype=float)
+            lsl, usl = self.limits_array(parameter, products, frame['timestamp'])
+            flags[:, column] = (values < lsl) | (values > usl)
+        names = np.array([','.join(np.asarray(parameters, dtype=object)[row]) for row in flags], dtype=object)
+        return flags.sum(axis=1), names
+
+    def spec_text(self, parameter, product=None, at=None):
+        """Limits as display text, e.g. '5.0 - 12.0' or '≤ 12.0'"""
+        specs = self.limits_for(parameter, product, at)
+        if specs['lsl'] is not None and specs['usl'] is not None:
+            return f"{specs['lsl']} - {specs['usl']}"
+        if specs['usl'] is not None:
+            return f"≤ {specs['usl']}"
+        if specs['lsl'] is not None:
+            return f"≥ {specs['lsl']}"
+        return "not set"
+
+
+_registry = None
+_registry_version = None
+_registry_checked = 0.0
+_registry_lock = threading.Lock()
+
+
+def get_spec_registry():
+    """
+    The process-wide SpecRegistry, loaded from the spec_limits table on first use
+
+    At most every SPEC_REGISTRY_TTL seconds the table's version (row count
+    and latest created_at) is compared with the loaded one, so limits saved
+    by another process are picked up. Falls back to DEFAULT_SPEC_LIMITS when
+    the table cannot be read.
+    """
+    global _registry, _registry_version, _registry_checked
+    with _registry_lock:
+        try:
+            from database import get_db
+            db = get_db()
+            if _registry is not None and time.monotonic() - _registry_checked >= SPEC_REGISTRY_TTL:
+                _registry_checked = time.monotonic()
+                if db.get_spec_limits_version() != _registry_version:
+                    logger.info("Specification limits changed, reloading")
+                    _registry = None
+            if _registry is None:
+                # Version first: an edit in between only causes one more reload
+                _registry_version = db.get_spec_limits_version()
+                _registry = SpecRegistry(db.get_spec_limits())
+                _registry_checked = time.monotonic()
+        except Exception as e:
+            if _registry is not None:
+                logger.warning(f"Could not check specification limits, keeping loaded ones: {str(e)}")
+                return _registry
+            logger.warning(f"Could not load specification limits, using defaults: {str(e)}")
+            return SpecRegistry(default_spec_versions())
+        return _registry
+
+
+def reload_spec_registry():
+    """Drop the loaded registry so the next lookup reads the table again (call after edits)"""
+    global _registry
+    with _registry_lock:
+        _registry = None